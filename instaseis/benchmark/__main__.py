@@ -54,12 +54,22 @@ class InstaseisBenchmark(metaclass=ABCMeta):
         save_output=False,
         seed=None,
         count=None,
+        buffer_policy="lru",
     ):
         self.path = path
         self.time_per_benchmark = time_per_benchmark
         self.save_output = save_output
         self.seed = seed
         self.count = count
+        self.buffer_policy = buffer_policy
+
+    def open_db(self, **kwargs):
+        """
+        Open the database with the buffer policy of the benchmark.
+        """
+        if "://" not in self.path:
+            kwargs["buffer_policy"] = self.buffer_policy
+        return open_db(self.path, **kwargs)
 
     @abstractmethod
     def setup(self):
@@ -138,6 +148,15 @@ class InstaseisBenchmark(metaclass=ABCMeta):
                     p, np.percentile(all_times, p)
                 )
             )
+        # Buffer statistics to compare the buffer policies.
+        mesh = getattr(self.db, "parsed_mesh", None)
+        if mesh is not None:
+            for name in ["strain_buffer", "displ_buffer"]:
+                buf = getattr(mesh, name)
+                print(
+                    "\t%s: %i hits, %i misses, %i evictions"
+                    % (name, buf.hits, buf.misses, buf.evictions)
+                )
         sys.stdout.flush()
         plot_gnuplot(all_times)
         time.sleep(0.1)
@@ -163,9 +182,7 @@ class InstaseisBenchmark(metaclass=ABCMeta):
 
 class BufferedFixedSrcRecRoDOffSeismogramGeneration(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=False, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=250)
 
     def iterate(self):
         src = Source(latitude=10, longitude=10)
@@ -179,9 +196,7 @@ class BufferedFixedSrcRecRoDOffSeismogramGeneration(InstaseisBenchmark):
 
 class BufferedFixedSrcRecRoDOffSeismogramGenerationNoObsPy(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=False, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=250)
 
     def iterate(self):
         src = Source(latitude=10, longitude=10)
@@ -202,7 +217,7 @@ class UnbufferedFixedSrcRecRoDOffSeismogramGenerationNoObsPy(
     InstaseisBenchmark
 ):
     def setup(self):
-        self.db = open_db(self.path, read_on_demand=False, buffer_size_in_mb=0)
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=0)
 
     def iterate(self):
         src = Source(latitude=10, longitude=10)
@@ -216,9 +231,7 @@ class UnbufferedFixedSrcRecRoDOffSeismogramGenerationNoObsPy(
 
 class BufferedFixedSrcRecRoDOnSeismogramGeneration(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=True, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=True, buffer_size_in_mb=250)
 
     def iterate(self):
         src = Source(latitude=10, longitude=10)
@@ -232,9 +245,7 @@ class BufferedFixedSrcRecRoDOnSeismogramGeneration(InstaseisBenchmark):
 
 class Buffered2DegreeLatLngDepthScatter(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=False, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=250)
         self.max_depth = self.db.info.max_radius - self.db.info.min_radius
 
     def iterate(self):
@@ -254,9 +265,7 @@ class Buffered2DegreeLatLngDepthScatter(InstaseisBenchmark):
 
 class BufferedHalfDegreeLatLngDepthScatter(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=False, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=250)
 
     def iterate(self):
         rec = Receiver(latitude=20, longitude=20)
@@ -275,9 +284,7 @@ class BufferedHalfDegreeLatLngDepthScatter(InstaseisBenchmark):
 
 class BufferedFullyRandom(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=False, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=250)
         self.max_depth = self.db.info.max_radius - self.db.info.min_radius
 
     def iterate(self):
@@ -300,7 +307,7 @@ class BufferedFullyRandom(InstaseisBenchmark):
 
 class UnbufferedFullyRandom(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(self.path, read_on_demand=False, buffer_size_in_mb=0)
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=0)
         self.max_depth = self.db.info.max_radius - self.db.info.min_radius
 
     def iterate(self):
@@ -323,7 +330,7 @@ class UnbufferedFullyRandom(InstaseisBenchmark):
 
 class UnbufferedAndRandomReadOnDemandTrue(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(self.path, read_on_demand=True, buffer_size_in_mb=0)
+        self.db = self.open_db(read_on_demand=True, buffer_size_in_mb=0)
         self.max_depth = self.db.info.max_radius - self.db.info.min_radius
 
     def iterate(self):
@@ -349,9 +356,7 @@ class UnbufferedAndRandomReadOnDemandTrue(InstaseisBenchmark):
 
 class FiniteSourceEmulation(InstaseisBenchmark):
     def setup(self):
-        self.db = open_db(
-            self.path, read_on_demand=False, buffer_size_in_mb=250
-        )
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=250)
         self.counter = 0
         self.current_depth_counter = 0
         # Depth increases in 1 km steps up to a depth of 25 km.
@@ -384,6 +389,56 @@ class FiniteSourceEmulation(InstaseisBenchmark):
         return "Finite source emulation."
 
 
+class BufferedFiniteSourceSweepAndHotSources(InstaseisBenchmark):
+    def setup(self):
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=50)
+        max_depth = self.db.info.max_radius - self.db.info.min_radius
+        # A small set of frequently requested sources.
+        self.hot_sources = [
+            Source(
+                latitude=random.random() * 10.0 + 30.0,
+                longitude=random.random() * 10.0 + 30.0,
+                depth_in_m=random.random() * min(50000, max_depth),
+            )
+            for _ in range(20)
+        ]
+        self.rec = Receiver(latitude=45.0, longitude=45.0)
+        self.counter = 0
+
+    def iterate(self):
+        self.counter += 1
+        # Every other seismogram is part of a sweep over a large fault
+        # which never hits the same element twice.
+        if self.counter % 2:
+            src = random.choice(self.hot_sources)
+        else:
+            src = Source(
+                latitude=0.0, longitude=self.counter * 0.01, depth_in_m=10000
+            )
+        self.db.get_seismograms(source=src, receiver=self.rec)
+
+    @property
+    def description(self):
+        return "Buffered, finite source sweep mixed with frequent sources."
+
+
+class OpenDatabase(InstaseisBenchmark):
+    def setup(self):
+        self.db = None
+
+    def iterate(self):
+        # The kd-tree is always built. Everything else comes from the
+        # mesh index if the database has one.
+        self.db = self.open_db(read_on_demand=False, buffer_size_in_mb=0)
+
+    @property
+    def description(self):
+        return (
+            "Opening the database - run with and without mesh index to see "
+            "what it saves."
+        )
+
+
 parser = argparse.ArgumentParser(
     prog="python -m instaseis.benchmark", description="Benchmark Instaseis."
 )
@@ -414,6 +469,13 @@ parser.add_argument(
 parser.add_argument(
     "--save", action="store_true", help="save output to txt file"
 )
+parser.add_argument(
+    "--buffer_policy",
+    type=str,
+    default="lru",
+    choices=["lru", "lfu", "arc", "tinylfu"],
+    help="policy of the buffers of the local database",
+)
 args = parser.parse_args()
 path = (
     os.path.abspath(args.folder) if "://" not in args.folder else args.folder
@@ -448,7 +510,7 @@ def get_subclasses(cls):
 
 
 benchmarks = [
-    i(path, args.time, args.save, args.seed, args.count)
+    i(path, args.time, args.save, args.seed, args.count, args.buffer_policy)
     for i in get_subclasses(InstaseisBenchmark)
 ]
 benchmarks.sort(key=lambda x: x.description)
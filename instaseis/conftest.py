@@ -47,6 +47,7 @@ def repack_databases():
         return {"root_folder": None, "databases": {}}
 
     import h5py
+    from instaseis.database_interfaces.native_mesh import write_native_file
     from instaseis.scripts.repack_db import merge_files, repack_file
 
     root_folder = tempfile.mkdtemp()
@@ -255,6 +256,23 @@ def repack_databases():
         quiet=True,
     )
 
+    # Native versions of the merged databases.
+    native_bw_db = os.path.join(root_folder, "native_100s_db_bwd_displ_only")
+    os.makedirs(native_bw_db)
+    print("Creating a native test database ...")
+    write_native_file(
+        os.path.join(merged_bw_db, "merged_output.nc4"),
+        os.path.join(native_bw_db, "native_output.isdb"),
+    )
+
+    native_fwd_db = os.path.join(root_folder, "native_100s_db_fwd")
+    os.makedirs(native_fwd_db)
+    print("Creating a native forward test database ...")
+    write_native_file(
+        os.path.join(merged_fwd_db, "merged_output.nc4"),
+        os.path.join(native_fwd_db, "native_output.isdb"),
+    )
+
     # Actually test the shapes of the fields to see that something happened.
     with h5py.File(pz, mode="r") as f:
         original_shape = f["Snapshots"]["disp_z"].shape
@@ -310,6 +328,7 @@ def repack_databases():
     ] = repacked_transposed_bw_db
     dbs["merged_100s_db_bwd_displ_only"] = merged_bw_db
     dbs["merged_transposed_100s_db_bwd_displ_only"] = merged_transposed_bw_db
+    dbs["native_100s_db_bwd_displ_only"] = native_bw_db
 
     # Special databases.
     dbs["horizontal_only_merged_database"] = horizontal_only_merged_db
@@ -317,6 +336,7 @@ def repack_databases():
 
     # Forward databases.
     dbs["merged_100s_db_fwd"] = merged_fwd_db
+    dbs["native_100s_db_fwd"] = native_fwd_db
 
     return {"root_folder": root_folder, "databases": dbs}
 
@@ -15,8 +15,11 @@ import h5py
 from .. import InstaseisError, InstaseisNotFoundError
 from .forward_instaseis_db import ForwardInstaseisDB
 from .forward_merged_instaseis_db import ForwardMergedInstaseisDB
+from .forward_native_instaseis_db import ForwardNativeInstaseisDB
+from .native_mesh import NATIVE_FILENAME, read_header
 from .reciprocal_instaseis_db import ReciprocalInstaseisDB
 from .reciprocal_merged_instaseis_db import ReciprocalMergedInstaseisDB
+from .reciprocal_native_instaseis_db import ReciprocalNativeInstaseisDB
 
 
 def find_and_open_files(path, *args, **kwargs):
@@ -38,6 +41,7 @@ def find_and_open_files(path, *args, **kwargs):
                 "ordered_output.nc4",
                 "axisem_output.nc4",
                 "merged_output.nc4",
+                NATIVE_FILENAME,
             ]:
                 break
         else:
@@ -54,6 +58,21 @@ def find_and_open_files(path, *args, **kwargs):
             "Found %i: \t%s" % (len(found_files), "\n\t".join(found_files))
         )
 
+    # Native files are self-describing.
+    if len(found_files) == 1 and found_files[0].endswith(NATIVE_FILENAME):
+        # The shape of the elements is (npts, jpol, ipol, nvar).
+        dims = read_header(found_files[0])["elements"]["shape"][-1]
+        if dims in (2, 3, 5):
+            return ReciprocalNativeInstaseisDB(
+                db_path=path, netcdf_file=found_files[0], *args, **kwargs
+            )
+        elif dims == 10:
+            return ForwardNativeInstaseisDB(
+                db_path=path, netcdf_file=found_files[0], *args, **kwargs
+            )
+        else:  # pragma: no cover
+            raise NotImplementedError
+
     # Catch the merged file first because its easy.
     if len(found_files) == 1 and found_files[0].endswith("merged_output.nc4"):
         # Now we have to open the file and find the number of dimensions.
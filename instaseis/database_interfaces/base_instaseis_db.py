@@ -11,8 +11,13 @@ Abstract base class for all Instaseis database classes.
     (http://www.gnu.org/copyleft/lgpl.html)
 """
 from abc import ABCMeta, abstractmethod
+import collections
+import concurrent.futures
+import contextlib
 from distutils.version import LooseVersion
+import itertools
 import math
+import multiprocessing
 import warnings
 
 import numpy as np
@@ -20,15 +25,25 @@ from obspy.core import AttribDict, Stream, Trace, UTCDateTime
 from obspy.geodetics import locations2degrees
 from obspy.signal.interpolation import lanczos_interpolation
 from scipy.integrate import cumtrapz
+import scipy.linalg
 import scipy.signal
 
 from ..source import Source, ForceSource, Receiver, FiniteSource
-from ..helpers import get_band_code, sizeof_fmt, rfftfreq
+from ..helpers import get_band_code, get_morton_codes, sizeof_fmt, rfftfreq
 
 
 DEFAULT_MU = 32e9
 
 
+# Number of point sources of a finite source transformed at once.
+FINITE_SOURCE_BLOCK_SIZE = 128
+
+
+# Number of point sources of a finite source grouped at once when they are
+# summed as they are iterated.
+FINITE_SOURCE_CHUNK_SIZE = 4096
+
+
 KIND_MAP = {"displacement": 0, "velocity": 1, "acceleration": 2}
 
 
@@ -45,6 +60,60 @@ STF_MAP = {
 }
 
 
+# The finite source job of a forked worker process. Only ever set in the
+# workers, each pool has its own processes.
+_FINITE_SOURCE_JOB = None
+
+
+def _init_finite_source_worker(job):
+    """
+    Initialize a forked finite source worker process.
+
+    The job is passed as an argument of the worker process which is not
+    pickled when forking so the database does not have to be pickled.
+    """
+    global _FINITE_SOURCE_JOB
+    _FINITE_SOURCE_JOB = job
+    # Each worker needs its own HDF5 file handles - everything else has
+    # been inherited from the parent process.
+    for mesh in getattr(job[0], "meshes", None) or []:
+        if mesh is not None:
+            mesh.reopen()
+
+
+def _sum_finite_source_worker(start, stop, job=None):
+    """
+    Sum a range of the point source groups of a finite source job. Forked
+    workers use the job they have been initialized with.
+    """
+    if job is None:
+        job = _FINITE_SOURCE_JOB
+    (
+        db,
+        groups,
+        element_ids,
+        receiver,
+        components,
+        correct_mu,
+        counter,
+        cancel,
+    ) = job
+
+    def progress():
+        with counter.get_lock():
+            counter.value += 1
+        return cancel.is_set()
+
+    return db._sum_finite_source_groups(
+        groups=groups[start:stop],
+        element_ids=None if element_ids is None else element_ids[start:stop],
+        receiver=receiver,
+        components=components,
+        correct_mu=correct_mu,
+        progress=progress,
+    )
+
+
 def _diff_and_integrate(n_derivative, data, comp, dt_out):
     for _ in np.arange(n_derivative):
         # In some numpy version there is an incompatibility here - 1.11
@@ -90,11 +159,20 @@ class BaseInstaseisDB(metaclass=ABCMeta):
                 | *Geophysical Journal International* 174 (2): 585–592.
                 | http://dx.doi.org/10.1111/j.1365-246X.2008.03797.x
 
+        The moment tensor kernels are only extracted once and all ten
+        components are derived from them.
+
+        Arrays of distances and depths are a convenience: the Green's
+        functions are extracted one pair after the other, exactly as
+        separate calls would, and returned as a list in the order of the
+        flattened, broadcast arrays.
+
         :param epicentral_distance_in_degree: The epicentral distance in
             degree.
-        :type epicentral_distance_in_degree: float
+        :type epicentral_distance_in_degree: float or array of floats
         :param source_depth_in_m: The source depth in m below the surface.
-        :type source_depth_in_m: float
+            Arrays of distances and depths are broadcast against each other.
+        :type source_depth_in_m: float or array of floats
         :param origin_time: Origin time of the source.
         :type origin_time: :class:`obspy.core.utcdatetime.UTCDateTime`
         :param kind: The desired units of the seismogram:
@@ -110,15 +188,35 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         :param definition: The desired Green's function definition.
         :type definition: str
 
-        :returns: Multi component seismograms.
+        :returns: Multi component seismograms. A list with one item per
+            distance and depth pair if arrays are passed.
         :rtype: A :class:`obspy.core.stream.Stream` object or a dictionary
-            with NumPy arrays as values.
+            with NumPy arrays as values, or a list of these if arrays are
+            passed.
         """
         # Currently only the seiscomp definition is implemented. Other
         # implementations will require a refactoring of this method.
         if definition.lower() != "seiscomp":
             raise NotImplementedError
 
+        distances, depths = np.broadcast_arrays(
+            epicentral_distance_in_degree, source_depth_in_m
+        )
+        if distances.ndim:
+            return [
+                self.get_greens_function(
+                    epicentral_distance_in_degree=float(distance),
+                    source_depth_in_m=float(depth),
+                    origin_time=origin_time,
+                    kind=kind,
+                    return_obspy_stream=return_obspy_stream,
+                    dt=dt,
+                    kernelwidth=kernelwidth,
+                    definition=definition,
+                )
+                for distance, depth in zip(distances.ravel(), depths.ravel())
+            ]
+
         self._get_greens_seiscomp_sanity_checks(
             epicentral_distance_in_degree, source_depth_in_m, kind, dt=dt
         )
@@ -126,6 +224,30 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         src_latitude, src_longitude = 90.0, 0.0
         rec_latitude, rec_longitude = 90.0 - epicentral_distance_in_degree, 0.0
 
+        source = Source(
+            src_latitude,
+            src_longitude,
+            source_depth_in_m,
+            origin_time=origin_time,
+        )
+        receiver = Receiver(rec_latitude, rec_longitude)
+
+        # All Green's functions are linear combinations of the moment tensor
+        # kernels so these only have to be extracted and processed once.
+        components = ["Z", "R", "T"]
+        kernels, mu = self._get_moment_tensor_kernels(
+            source=source, receiver=receiver, components=components
+        )
+        kernels = self._process_traces(
+            data=kernels,
+            source=source,
+            kind=kind,
+            remove_source_shift=True,
+            reconvolve_stf=False,
+            dt=dt,
+            kernelwidth=kernelwidth,
+        )
+
         # sources according to https://github.com/krischer/instaseis/issues/8
         # transformed to r, theta, phi
         #
@@ -139,66 +261,12 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         #  0     0     0      1.0    0      0      m4
         #  1.0   1.0   1.0    0      0      0      m6
         #  2.0  -1.0  -1.0    0      0      0      cl
-
-        m1 = Source(
-            src_latitude,
-            src_longitude,
-            source_depth_in_m,
-            m_tp=-1.0,
-            origin_time=origin_time,
-        )
-        m2 = Source(
-            src_latitude,
-            src_longitude,
-            source_depth_in_m,
-            m_tt=1.0,
-            m_pp=-1.0,
-            origin_time=origin_time,
-        )
-        m3 = Source(
-            src_latitude,
-            src_longitude,
-            source_depth_in_m,
-            m_rp=-1.0,
-            origin_time=origin_time,
-        )
-        m4 = Source(
-            src_latitude,
-            src_longitude,
-            source_depth_in_m,
-            m_rt=1.0,
-            origin_time=origin_time,
-        )
-        m6 = Source(
-            src_latitude,
-            src_longitude,
-            source_depth_in_m,
-            m_rr=1.0,
-            m_tt=1.0,
-            m_pp=1.0,
-            origin_time=origin_time,
-        )
-        cl = Source(
-            src_latitude,
-            src_longitude,
-            source_depth_in_m,
-            m_rr=2.0,
-            m_tt=-1.0,
-            m_pp=-1.0,
-            origin_time=origin_time,
-        )
-
-        receiver = Receiver(rec_latitude, rec_longitude)
-
-        # Extract all seismograms - leverage the logic of the
-        # get_seismograms() method as much as possible.
-        args = {
-            "receiver": receiver,
-            "dt": dt,
-            "kind": kind,
-            "kernelwidth": kernelwidth,
-            "return_obspy_stream": return_obspy_stream,
-        }
+        m1 = [0.0, 0.0, 0.0, 0.0, 0.0, -1.0]
+        m2 = [0.0, 1.0, -1.0, 0.0, 0.0, 0.0]
+        m3 = [0.0, 0.0, 0.0, 0.0, -1.0, 0.0]
+        m4 = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+        m6 = [1.0, 1.0, 1.0, 0.0, 0.0, 0.0]
+        cl = [2.0, -1.0, -1.0, 0.0, 0.0, 0.0]
 
         items = [
             ("TSS", m1, "T"),
@@ -213,21 +281,28 @@ class BaseInstaseisDB(metaclass=ABCMeta):
             ("REP", m6, "R"),
         ]
 
-        if return_obspy_stream:
-            st = Stream()
-        else:
-            st = {}
-
-        for name, src, comp in items:
-            tr = self.get_seismograms(source=src, components=comp, **args)
-            if return_obspy_stream:
-                tr = tr[0]
-                tr.stats.channel = name
-                st.append(tr)
-            else:
-                st["mu"] = tr["mu"]
-                st[name] = tr[comp]
+        data = {"mu": mu}
+        for name, tensor, comp in items:
+            data[name] = np.dot(tensor, kernels[components.index(comp)])
+
+        if not return_obspy_stream:
+            return data
 
+        st = self._convert_to_stream(
+            receiver=receiver,
+            components=[_i[0] for _i in items],
+            data=data,
+            dt_out=self.info.dt if dt is None else dt,
+            starttime=_get_seismogram_times(
+                info=self.info,
+                origin_time=origin_time,
+                dt=dt,
+                kernelwidth=kernelwidth,
+                remove_source_shift=True,
+                reconvolve_stf=False,
+            )["starttime"],
+            add_band_code=False,
+        )
         return st
 
     def get_seismograms(
@@ -304,8 +379,6 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         else:
             dt_out = dt
 
-        stf_deconv_map = {0: self.info.sliprate, 1: self.info.slip}
-
         # Can never be negative with the current logic.
         n_derivative = KIND_MAP[kind] - STF_MAP[self.info.stf]
 
@@ -328,54 +401,12 @@ class BaseInstaseisDB(metaclass=ABCMeta):
             reconvolve_stf=reconvolve_stf,
         )
 
+        if reconvolve_stf:
+            f = self._get_stf_reconvolution_filter(source)
+
         for comp in components:
             if reconvolve_stf:
-                # We assume here that the sliprate is well-behaved,
-                # e.g. zeros at the boundaries and no energy above the mesh
-                # resolution.
-                if source.dt is None or source.sliprate is None:
-                    raise ValueError("source has no source time function")
-
-                if STF_MAP[self.info.stf] not in [0, 1]:
-                    raise NotImplementedError(
-                        "deconvolution not implemented for stf %s"
-                        % (self.info.stf)
-                    )
-
-                stf_deconv_f = np.fft.rfft(
-                    stf_deconv_map[STF_MAP[self.info.stf]], n=self.info.nfft
-                )
-
-                if abs((source.dt - self.info.dt) / self.info.dt) > 1e-7:
-                    raise ValueError("dt of the source not compatible")
-
-                stf_conv_f = np.fft.rfft(source.sliprate, n=self.info.nfft)
-
-                if source.time_shift is not None:
-                    stf_conv_f *= np.exp(
-                        -1j
-                        * rfftfreq(self.info.nfft)
-                        * 2.0
-                        * np.pi
-                        * source.time_shift
-                        / self.info.dt
-                    )
-
-                # Apply a 5 percent, at least 5 samples taper at the end.
-                # The first sample is guaranteed to be zero in any case.
-                tlen = max(int(math.ceil(0.05 * len(data[comp]))), 5)
-                taper = np.ones_like(data[comp])
-                taper[-tlen:] = scipy.signal.hann(tlen * 2)[tlen:]
-                dataf = np.fft.rfft(taper * data[comp], n=self.info.nfft)
-
-                # Ensure numerical stability by not dividing with zero.
-                f = stf_conv_f
-                _l = np.abs(stf_deconv_f)
-                _idx = np.where(_l > 0.0)
-                f[_idx] /= stf_deconv_f[_idx]
-                f[_l == 0] = 0 + 0j
-
-                data[comp] = np.fft.irfft(dataf * f)[: self.info.npts]
+                data[comp] = self._reconvolve_stf(data[comp], f)
 
             if dt is not None:
                 data[comp] = lanczos_interpolation(
@@ -419,6 +450,474 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         else:
             return data
 
+    def get_seismograms_batch(
+        self,
+        source,
+        receivers,
+        components=None,
+        kind="displacement",
+        remove_source_shift=True,
+        reconvolve_stf=False,
+        dt=None,
+        kernelwidth=12,
+    ):
+        """
+        Extract seismograms for one source and many receivers at once.
+
+        Equivalent to calling :meth:`get_seismograms` for each receiver but
+        all sanity checks, time calculations and source time function
+        operations are only performed once and the post-processing works on
+        all traces at the same time.
+
+        :param source: The source definition.
+        :type source: :class:`instaseis.source.Source` or
+            :class:`instaseis.source.ForceSource`
+        :param receivers: The seismic receivers. Anything that
+            :meth:`instaseis.source.Receiver.parse` can read is also
+            accepted.
+        :type receivers: list of :class:`instaseis.source.Receiver`
+        :type components: tuple of str, optional
+        :param components: Which components to calculate. Must be a tuple
+            containing any combination of ``"Z"``, ``"N"``, ``"E"``,
+            ``"R"``, and ``"T"``. Defaults to ``["Z", "N", "E"]`` for two
+            component databases, to ``["N", "E"]`` for horizontal only
+            databases, and to ``["Z"]`` for vertical only databases.
+        :type kind: str, optional
+        :param kind: The desired units of the seismogram:
+            ``"displacement"``, ``"velocity"``, or ``"acceleration"``.
+        :type remove_source_shift: bool, optional
+        :param remove_source_shift: Cut all samples before the peak of the
+            source time function. This has the effect that the first sample
+            is the origin time of the source.
+        :type reconvolve_stf: bool, optional
+        :param reconvolve_stf: Deconvolve the source time function used in
+            the AxiSEM run and convolve with the STF attached to the source.
+            For this to be stable, the new STF needs to bandlimited.
+        :type dt: float, optional
+        :param dt: Desired sampling rate of the seismograms. Resampling is done
+            using a Lanczos kernel.
+        :type kernelwidth: int, optional
+        :param kernelwidth: The width of the sinc kernel used for resampling in
+            terms of the original sampling interval. Best choose something
+            between 10 and 20.
+
+        :returns: The seismograms with shape
+            ``(n_receivers, n_components, npts)``. The order of the second
+            axis is the order of ``components``. The time of the first
+            sample is the same as for :meth:`get_seismograms`.
+        :rtype: :class:`numpy.ndarray`
+        """
+        if components is None:
+            components = self.default_components
+        components = list(components)
+
+        if not isinstance(receivers, (list, tuple)):
+            receivers = Receiver.parse(receivers)
+        receivers = [
+            _i if isinstance(_i, Receiver) else Receiver.parse(_i)[0]
+            for _i in receivers
+        ]
+        if not receivers:
+            raise ValueError("At least one receiver is required.")
+
+        # The full set of checks only has to be done once - the remaining
+        # receivers only have to be checked for their depths and epicentral
+        # distances.
+        source, _ = self._get_seismograms_sanity_checks(
+            source=source,
+            receiver=receivers[0],
+            components=components,
+            kind=kind,
+            dt=dt,
+        )
+        self._check_receivers(source=source, receivers=receivers[1:])
+
+        if reconvolve_stf and remove_source_shift:
+            raise ValueError(
+                "'remove_source_shift' argument not "
+                "compatible with 'reconvolve_stf'."
+            )
+
+        # Shape: (n_receivers, n_components, npts)
+        data = self._get_seismograms_batch(
+            source=source, receivers=receivers, components=components
+        )
+
+        return self._process_traces(
+            data=data,
+            source=source,
+            kind=kind,
+            remove_source_shift=remove_source_shift,
+            reconvolve_stf=reconvolve_stf,
+            dt=dt,
+            kernelwidth=kernelwidth,
+        )
+
+    def get_moment_tensor_kernels(
+        self,
+        source,
+        receiver,
+        components=None,
+        kind="displacement",
+        remove_source_shift=True,
+        reconvolve_stf=False,
+        dt=None,
+        kernelwidth=12,
+    ):
+        """
+        Extract the seismograms of the six independent moment tensor
+        components for one source location and one receiver.
+
+        Seismograms are linear in the moment tensor so the seismograms of
+        any moment tensor at this source location can be computed from the
+        kernels with a simple matrix multiplication - useful e.g. for moment
+        tensor inversions and grid searches:
+
+        >>> kernels = db.get_moment_tensor_kernels(src, rec)  # doctest: +SKIP
+        >>> # Shape: (n_tensors, 6) - one row of
+        >>> # [m_rr, m_tt, m_pp, m_rt, m_rp, m_tp] per tensor.
+        >>> tensors = np.array([...])  # doctest: +SKIP
+        >>> # Shape: (n_tensors, n_components, npts)
+        >>> data = np.einsum("cmt,nm->nct", kernels, tensors)  # doctest: +SKIP
+
+        The result is the same as calling :meth:`get_seismograms` for
+        each tensor but the data is only read, interpolated, and rotated
+        once.
+
+        :param source: The source location. The moment tensor of the source
+            is ignored.
+        :type source: :class:`instaseis.source.Source`
+        :param receiver: The seismic receiver.
+        :type receiver: :class:`instaseis.source.Receiver`
+        :type components: tuple of str, optional
+        :param components: Which components to calculate. Must be a tuple
+            containing any combination of ``"Z"``, ``"N"``, ``"E"``,
+            ``"R"``, and ``"T"``. Defaults to ``["Z", "N", "E"]`` for two
+            component databases, to ``["N", "E"]`` for horizontal only
+            databases, and to ``["Z"]`` for vertical only databases.
+        :type kind: str, optional
+        :param kind: The desired units of the seismogram:
+            ``"displacement"``, ``"velocity"``, or ``"acceleration"``.
+        :type remove_source_shift: bool, optional
+        :param remove_source_shift: Cut all samples before the peak of the
+            source time function. This has the effect that the first sample
+            is the origin time of the source.
+        :type reconvolve_stf: bool, optional
+        :param reconvolve_stf: Deconvolve the source time function used in
+            the AxiSEM run and convolve with the STF attached to the source.
+            For this to be stable, the new STF needs to bandlimited.
+        :type dt: float, optional
+        :param dt: Desired sampling rate of the seismograms. Resampling is done
+            using a Lanczos kernel.
+        :type kernelwidth: int, optional
+        :param kernelwidth: The width of the sinc kernel used for resampling in
+            terms of the original sampling interval. Best choose something
+            between 10 and 20.
+
+        :returns: The kernels with shape ``(n_components, 6, npts)``. The
+            order of the first axis is the order of ``components``, the
+            second axis is ``[m_rr, m_tt, m_pp, m_rt, m_rp, m_tp]`` in Nm.
+            The time of the first sample is the same as for
+            :meth:`get_seismograms`.
+        :rtype: :class:`numpy.ndarray`
+        """
+        if components is None:
+            components = self.default_components
+        components = list(components)
+
+        source, receiver = self._get_seismograms_sanity_checks(
+            source=source,
+            receiver=receiver,
+            components=components,
+            kind=kind,
+            dt=dt,
+        )
+        if not isinstance(source, Source):
+            raise ValueError(
+                "Moment tensor kernels can only be computed for moment "
+                "tensor sources."
+            )
+
+        if reconvolve_stf and remove_source_shift:
+            raise ValueError(
+                "'remove_source_shift' argument not "
+                "compatible with 'reconvolve_stf'."
+            )
+
+        # Shape: (n_components, 6, npts)
+        data, _ = self._get_moment_tensor_kernels(
+            source=source, receiver=receiver, components=components
+        )
+
+        return self._process_traces(
+            data=data,
+            source=source,
+            kind=kind,
+            remove_source_shift=remove_source_shift,
+            reconvolve_stf=reconvolve_stf,
+            dt=dt,
+            kernelwidth=kernelwidth,
+        )
+
+    def _get_moment_tensor_kernels(self, source, receiver, components):
+        """
+        Extract the raw, unprocessed moment tensor kernels.
+
+        Returns an array with shape ``(n_components, 6, npts)`` and the shear
+        modulus at the point of interest. This default implementation
+        extracts the seismograms of six unit moment tensors. Database
+        interfaces can override it with something faster.
+        """
+        data = np.empty((len(components), 6, self.info.npts), dtype=np.float64)
+        for _i, tensor in enumerate(np.eye(6)):
+            unit_source = Source(
+                latitude=source.latitude,
+                longitude=source.longitude,
+                depth_in_m=source.depth_in_m,
+                m_rr=tensor[0],
+                m_tt=tensor[1],
+                m_pp=tensor[2],
+                m_rt=tensor[3],
+                m_rp=tensor[4],
+                m_tp=tensor[5],
+                origin_time=source.origin_time,
+            )
+            d = self._get_seismograms(
+                source=unit_source, receiver=receiver, components=components
+            )
+            for _j, comp in enumerate(components):
+                data[_j, _i] = d[comp]
+        return data, d["mu"]
+
+    def _process_traces(
+        self,
+        data,
+        source,
+        kind,
+        remove_source_shift,
+        reconvolve_stf,
+        dt,
+        kernelwidth,
+    ):
+        """
+        Apply the same processing as :meth:`get_seismograms` to the raw
+        traces in ``data`` with shape ``(n, m, npts)``.
+        """
+        dt_out = self.info.dt if dt is None else dt
+
+        n_derivative = KIND_MAP[kind] - STF_MAP[self.info.stf]
+        if isinstance(source, ForceSource):
+            n_derivative += 1
+
+        time_information = _get_seismogram_times(
+            info=self.info,
+            origin_time=source.origin_time,
+            dt=dt,
+            kernelwidth=kernelwidth,
+            remove_source_shift=remove_source_shift,
+            reconvolve_stf=reconvolve_stf,
+        )
+
+        if reconvolve_stf:
+            data = self._reconvolve_stf(
+                data, self._get_stf_reconvolution_filter(source)
+            )
+
+        if dt is not None:
+            ti = time_information
+            resampled = np.empty(
+                data.shape[:2] + (ti["npts_before_shift_removal"],),
+                dtype=np.float64,
+            )
+            for _i in range(data.shape[0]):
+                for _j in range(data.shape[1]):
+                    resampled[_i, _j] = lanczos_interpolation(
+                        data=np.require(data[_i, _j], requirements=["C"]),
+                        old_start=0,
+                        old_dt=self.info.dt,
+                        new_start=ti["time_shift_at_beginning"],
+                        new_dt=dt,
+                        new_npts=ti["npts_before_shift_removal"],
+                        a=kernelwidth,
+                        window="blackman",
+                    )
+            data = resampled
+
+        # Same as _diff_and_integrate() but along the time axis of all
+        # traces at once.
+        for _ in range(n_derivative):
+            data = np.gradient(data, dt_out, axis=-1)
+        for _ in range(-n_derivative):  # pragma: no cover
+            data = cumtrapz(data, dx=dt_out, initial=0.0, axis=-1)
+
+        if remove_source_shift:
+            data = data[:, :, time_information["ref_sample"] :]  # NOQA
+
+        return np.require(data, requirements=["C"])
+
+    def _get_seismograms_batch(self, source, receivers, components):
+        """
+        Extract the raw, unprocessed seismograms for many receivers.
+
+        Returns an array with shape ``(n_receivers, n_components, npts)``.
+        This default implementation just loops over the receivers. Database
+        interfaces can override it with something faster.
+        """
+        data = np.empty(
+            (len(receivers), len(components), self.info.npts),
+            dtype=np.float64,
+        )
+        for _i, receiver in enumerate(receivers):
+            d = self._get_seismograms(
+                source=source, receiver=receiver, components=components
+            )
+            for _j, comp in enumerate(components):
+                data[_i, _j] = d[comp]
+        return data
+
+    def _check_receivers(self, source, receivers):
+        """
+        Checks that have to be done for every receiver: the receiver depth
+        and the epicentral distance. Used by the single and the batch
+        extraction.
+        """
+        if not receivers:
+            return
+
+        if self.info.is_reciprocal:
+            if any(_i.depth_in_m is not None for _i in receivers):
+                warnings.warn(
+                    "Receiver depth cannot be changed when reading "
+                    "from reciprocal DB. Using depth from the DB."
+                )
+        else:
+            for receiver in receivers:
+                if receiver.depth_in_m is None:
+                    continue
+                rec_radius = self.info.planet_radius - receiver.depth_in_m
+                if rec_radius < self.info.min_radius:
+                    msg = (
+                        "Receiver too deep. Receiver would be located at a "
+                        "radius of %.1f meters. The database supports "
+                        "receiver radii from %.1f to %.1f meters."
+                        % (
+                            rec_radius,
+                            self.info.min_radius,
+                            self.info.max_radius,
+                        )
+                    )
+                    raise ValueError(msg)
+                elif rec_radius > self.info.max_radius:
+                    msg = (
+                        "Receiver is too shallow. Receiver would be located "
+                        "at a radius of %.1f meters. The database supports "
+                        "receiver radii from %.1f to %.1f meters."
+                        % (
+                            rec_radius,
+                            self.info.min_radius,
+                            self.info.max_radius,
+                        )
+                    )
+                    raise ValueError(msg)
+
+        d = locations2degrees(
+            source.latitude,
+            source.longitude,
+            np.array([_i.latitude for _i in receivers]),
+            np.array([_i.longitude for _i in receivers]),
+        )
+        invalid = (d < self.info.min_d) | (d > self.info.max_d)
+        if np.any(invalid):
+            raise ValueError(
+                "Epicentral distance is %.1f but should be in [%.1f, "
+                "%.1f]." % (d[invalid][0], self.info.min_d, self.info.max_d)
+            )
+
+    def _get_stf_reconvolution_filter(self, source):
+        """
+        Frequency domain filter that deconvolves the source time function of
+        the database and convolves with the one of the given source.
+        """
+        return self._get_stf_reconvolution_filters([source])[0]
+
+    def _get_stf_reconvolution_filters(self, sources):
+        """
+        Batched version of :meth:`_get_stf_reconvolution_filter` returning
+        the filters of all sources with shape ``(n_sources, nfft // 2 + 1)``.
+        """
+        # We assume here that the sliprate is well-behaved,
+        # e.g. zeros at the boundaries and no energy above the mesh
+        # resolution.
+        for source in sources:
+            if source.dt is None or source.sliprate is None:
+                raise ValueError("source has no source time function")
+
+        if STF_MAP[self.info.stf] not in [0, 1]:
+            raise NotImplementedError(
+                "deconvolution not implemented for stf %s" % (self.info.stf)
+            )
+
+        stf_deconv_map = {0: self.info.sliprate, 1: self.info.slip}
+        stf_deconv_f = np.fft.rfft(
+            stf_deconv_map[STF_MAP[self.info.stf]], n=self.info.nfft
+        )
+
+        for source in sources:
+            if abs((source.dt - self.info.dt) / self.info.dt) > 1e-7:
+                raise ValueError("dt of the source not compatible")
+
+        # Zero padding to a common length does not change the transforms.
+        sliprates = np.zeros(
+            (len(sources), max(len(_i.sliprate) for _i in sources)),
+            dtype=np.float64,
+        )
+        for _i, source in enumerate(sources):
+            sliprates[_i, : len(source.sliprate)] = source.sliprate
+        stf_conv_f = np.fft.rfft(sliprates, n=self.info.nfft, axis=-1)
+
+        time_shifts = np.array(
+            [0.0 if _i.time_shift is None else _i.time_shift for _i in sources]
+        )
+        if np.any(time_shifts):
+            stf_conv_f *= np.exp(
+                -1j
+                * rfftfreq(self.info.nfft)
+                * 2.0
+                * np.pi
+                * time_shifts[:, np.newaxis]
+                / self.info.dt
+            )
+
+        # Ensure numerical stability by not dividing with zero.
+        f = stf_conv_f
+        _l = np.abs(stf_deconv_f)
+        _idx = np.where(_l > 0.0)[0]
+        f[:, _idx] /= stf_deconv_f[_idx]
+        f[:, _l == 0] = 0 + 0j
+
+        return f
+
+    def _get_tapered_spectra(self, data):
+        """
+        Taper the end of the traces along the last axis of ``data`` and
+        transform them to the frequency domain.
+        """
+        npts = data.shape[-1]
+        # Apply a 5 percent, at least 5 samples taper at the end.
+        # The first sample is guaranteed to be zero in any case.
+        tlen = max(int(math.ceil(0.05 * npts)), 5)
+        taper = np.ones(npts, dtype=data.dtype)
+        taper[-tlen:] = scipy.signal.hann(tlen * 2)[tlen:]
+        return np.fft.rfft(taper * data, n=self.info.nfft, axis=-1)
+
+    def _reconvolve_stf(self, data, f):
+        """
+        Apply a filter from _get_stf_reconvolution_filter() to the data. Works
+        with single traces and with arrays of traces along the last axis.
+        """
+        dataf = self._get_tapered_spectra(data)
+        return np.fft.irfft(dataf * f, axis=-1)[..., : self.info.npts]
+
     @staticmethod
     def _convert_to_stream(
         receiver, components, data, dt_out, starttime, add_band_code=True
@@ -475,13 +974,18 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         kernelwidth=12,
         correct_mu=False,
         progress_callback=None,
+        n_workers=1,
+        sort_sources=False,
     ):
         """
         Extract seismograms for a finite source from an Instaseis database.
 
-        :param sources: A collection of point sources.
-        :type sources: :class:`~instaseis.source.FiniteSource` or list of
-            :class:`~instaseis.source.Source` objects.
+        :param sources: A collection of point sources. Any iterable works,
+            e.g. the generator :meth:`FiniteSource.iter_srf_file()
+            <instaseis.source.FiniteSource.iter_srf_file>` - the point
+            sources are then summed while they are read.
+        :type sources: :class:`~instaseis.source.FiniteSource` or an
+            iterable of :class:`~instaseis.source.Source` objects.
         :param receiver: The seismic receiver.
         :type receiver: :class:`instaseis.source.Receiver`
         :type components: tuple of str, optional
@@ -509,6 +1013,27 @@ class BaseInstaseisDB(metaclass=ABCMeta):
             sources for each calculated source. Useful for integration into
             user interfaces to provide some kind of progress information. If
             the callback returns ``True``, the calculation will be cancelled.
+            The number of total sources is ``None`` if ``sources`` has no
+            length.
+        :type n_workers: int, optional
+        :param n_workers: The number of worker processes summing the point
+            sources in parallel. Each worker gets a contiguous range of the
+            point sources and the partial sums are added up at the end.
+            ``0`` uses one worker per CPU. All point sources are read
+            before the workers start. The workers are forked and open
+            the database files again. Forking a process in which other
+            threads are running can deadlock if one of them holds a lock,
+            e.g. of HDF5, at that moment - only use several workers in
+            multi-threaded programs if no other thread reads from a
+            database at the same time.
+        :type sort_sources: bool, optional
+        :param sort_sources: Visit the point sources in the order of the
+            mesh elements containing them (local databases) or along a
+            space-filling curve (all others) instead of the given order.
+            Neighbouring point sources then read neighbouring parts of the
+            files and mostly hit the buffers. The result is the same up to
+            floating point rounding. All point sources are read before
+            the summation starts.
 
         :returns: Multi component finite source seismogram.
         :rtype: :class:`obspy.core.stream.Stream`
@@ -519,44 +1044,26 @@ class BaseInstaseisDB(metaclass=ABCMeta):
         if not self.info.is_reciprocal:
             raise NotImplementedError
 
-        data_summed = {}
-        count = len(sources)
-        for _i, source in enumerate(sources):
-            # Don't perform the diff/integration here, but after the
-            # resampling later on.
-            data = self.get_seismograms(
-                source,
-                receiver,
-                components,
-                reconvolve_stf=True,
-                # Effectively results in nothing happening.
-                kind=INV_KIND_MAP[STF_MAP[self.info.stf]],
-                return_obspy_stream=False,
-                remove_source_shift=False,
-            )
-
-            if correct_mu:
-                corr_fac = (data["mu"] / DEFAULT_MU,)
-            else:
-                corr_fac = 1
-
-            for comp in components:
-                if comp in data_summed:
-                    data_summed[comp] += data[comp] * corr_fac
-                else:
-                    data_summed[comp] = data[comp] * corr_fac
-            # Only used for the GUI.
-            if progress_callback:  # pragma: no cover
-                cancel = progress_callback(_i + 1, count)
-                if cancel:
-                    return None
+        data_summed = self._sum_finite_source(
+            sources=sources,
+            receiver=receiver,
+            components=components,
+            correct_mu=correct_mu,
+            progress_callback=progress_callback,
+            n_workers=n_workers,
+            sort_sources=sort_sources,
+        )
+        # Cancelled by the progress callback.
+        if data_summed is None:
+            return None
 
         if dt is not None:
             for comp in components:
                 # We don't need to align a sample to the peak of the source
                 # time function here.
                 new_npts = int(
-                    round((len(data[comp]) - 1) * self.info.dt / dt, 6) + 1
+                    round((len(data_summed[comp]) - 1) * self.info.dt / dt, 6)
+                    + 1
                 )
                 data_summed[comp] = lanczos_interpolation(
                     data=np.require(data_summed[comp], requirements=["C"]),
@@ -617,6 +1124,430 @@ class BaseInstaseisDB(metaclass=ABCMeta):
             st += tr
         return st
 
+    def _sum_finite_source(
+        self,
+        sources,
+        receiver,
+        components,
+        correct_mu,
+        progress_callback,
+        n_workers=1,
+        sort_sources=False,
+    ):
+        """
+        Sum the seismograms of all point sources of a finite source, each
+        reconvolved with its own source time function.
+
+        Everything is linear so the sum is formed in the frequency domain.
+        Blocks of point sources are transformed at once, the source time
+        functions and time shifts of a block are applied in one batched
+        step, and there is only a single inverse transform per component at
+        the very end. Point sources sharing a location are only extracted
+        once as moment tensor kernels and their moment tensors are
+        contracted in the frequency domain. Locations in the same element
+        are extracted one after the other and share the reads of the
+        element.
+
+        ``sources`` can be any iterable. Unless all point sources are needed
+        at once to sort them or to split them between workers, they are
+        grouped and summed in chunks while they are iterated.
+
+        Returns a dictionary with the summed traces or ``None`` if the
+        calculation has been cancelled by the progress callback.
+        """
+        if n_workers == 0:
+            n_workers = multiprocessing.cpu_count()
+
+        try:
+            count = len(sources)
+        except TypeError:
+            count = None
+
+        if sort_sources or n_workers > 1:
+            groups, element_ids = self._group_finite_source(
+                sources=sources,
+                receiver=receiver,
+                components=components,
+                sort_sources=sort_sources,
+            )
+            n_workers = min(n_workers, len(groups))
+            chunks = [(groups, element_ids)]
+        else:
+
+            def iter_chunks():
+                iterator = iter(sources)
+                while True:
+                    chunk = list(
+                        itertools.islice(iterator, FINITE_SOURCE_CHUNK_SIZE)
+                    )
+                    if chunk:
+                        yield self._group_finite_source(
+                            sources=chunk,
+                            receiver=receiver,
+                            components=components,
+                        )
+                    # Stop at the first short chunk: finite sources are
+                    # their own iterators and start over once exhausted.
+                    if len(chunk) < FINITE_SOURCE_CHUNK_SIZE:
+                        return
+
+            chunks = iter_chunks()
+
+        if n_workers > 1:
+            partial_sums = self._sum_finite_source_parallel(
+                groups=groups,
+                element_ids=element_ids,
+                receiver=receiver,
+                components=components,
+                correct_mu=correct_mu,
+                progress_callback=progress_callback,
+                n_workers=n_workers,
+            )
+            if partial_sums is None:
+                return None
+        else:
+            current = [0]
+
+            def progress():
+                current[0] += 1
+                # Only used for the GUI.
+                if progress_callback:  # pragma: no cover
+                    return progress_callback(current[0], count)
+
+            partial_sums = []
+            for groups, element_ids in chunks:
+                partial_sum = self._sum_finite_source_groups(
+                    groups=groups,
+                    element_ids=element_ids,
+                    receiver=receiver,
+                    components=components,
+                    correct_mu=correct_mu,
+                    progress=progress,
+                )
+                if partial_sum is None:
+                    return None
+                partial_sums.append(partial_sum)
+
+        if not partial_sums:
+            # No point sources at all.
+            partial_sums = [
+                self._sum_finite_source_groups(
+                    groups=[],
+                    element_ids=None,
+                    receiver=receiver,
+                    components=components,
+                    correct_mu=correct_mu,
+                    progress=None,
+                )
+            ]
+
+        spectrum = sum(_i[0] for _i in partial_sums)
+        force_data = sum(_i[1] for _i in partial_sums)
+        data = (
+            np.fft.irfft(spectrum, axis=-1)[:, : self.info.npts] + force_data
+        )
+        return {comp: data[_i] for _i, comp in enumerate(components)}
+
+    def _group_finite_source(
+        self, sources, receiver, components, sort_sources=False
+    ):
+        """
+        Check the point sources and group them by location.
+
+        Returns the groups and the ids of the elements containing them, or
+        ``None`` if the database does not know them. Groups in the same
+        element directly follow each other, otherwise the given order is
+        kept unless the groups are sorted.
+        """
+        groups = collections.OrderedDict()
+        for source in sources:
+            source, receiver = self._get_seismograms_sanity_checks(
+                source=source,
+                receiver=receiver,
+                components=components,
+                # Don't perform the diff/integration here, but after the
+                # resampling later on.
+                kind=INV_KIND_MAP[STF_MAP[self.info.stf]],
+                dt=None,
+            )
+            key = (
+                type(source),
+                source.latitude,
+                source.longitude,
+                source.depth_in_m,
+            )
+            groups.setdefault(key, []).append(source)
+        groups = list(groups.values())
+        if not groups:
+            return [], None
+
+        locations = [_i[0] for _i in groups]
+        element_ids = self._get_finite_source_element_ids(
+            sources=locations, receiver=receiver
+        )
+
+        if sort_sources:
+            keys = self._get_finite_source_sort_keys(
+                sources=locations, receiver=receiver
+            )
+            order = np.argsort(keys, kind="stable")
+        elif element_ids is not None:
+            # Move the groups in the same element next to the first of them.
+            by_element = collections.OrderedDict()
+            for _i, id_elem in enumerate(element_ids):
+                by_element.setdefault(id_elem, []).append(_i)
+            order = [_i for _j in by_element.values() for _i in _j]
+        else:
+            return groups, None
+
+        groups = [groups[_i] for _i in order]
+        if element_ids is not None:
+            element_ids = [element_ids[_i] for _i in order]
+        return groups, element_ids
+
+    def _get_finite_source_element_ids(self, sources, receiver):
+        """
+        The ids of the elements containing the point sources. This default
+        implementation returns ``None`` as the elements are unknown.
+        """
+        return None
+
+    @contextlib.contextmanager
+    def _sharing_element_reads(self, share=True):
+        """
+        Context in which the extractions of this thread for locations in the
+        same element share the reads of the element if ``share`` is true.
+        This default implementation does nothing.
+        """
+        yield
+
+    def _get_finite_source_sort_keys(self, sources, receiver):
+        """
+        Keys to sort the point sources of a finite source by for a local
+        traversal. This default implementation returns their position along
+        a space-filling curve. Database interfaces can override it with
+        something that better matches their storage.
+        """
+        points = [
+            [
+                _i.x(planet_radius=self.info.planet_radius),
+                _i.y(planet_radius=self.info.planet_radius),
+                _i.z(planet_radius=self.info.planet_radius),
+            ]
+            for _i in sources
+        ]
+        return get_morton_codes(points)
+
+    def _sum_finite_source_parallel(
+        self,
+        groups,
+        element_ids,
+        receiver,
+        components,
+        correct_mu,
+        progress_callback,
+        n_workers,
+    ):
+        """
+        Sum the groups of point sources in parallel worker processes.
+
+        Every worker gets a contiguous range of point sources which are
+        usually close to each other so the buffers of each worker stay warm.
+        The workers are forked so they inherit the database including the
+        warm buffers of this process. Returns the partial sums of all
+        workers or ``None`` if the calculation has been cancelled.
+        """
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:  # pragma: no cover
+            # No fork on this platform - use threads as the buffers are
+            # thread-safe.
+            context = None
+
+        counter = (context or multiprocessing).Value("l", 0)
+        cancel = (context or multiprocessing).Event()
+
+        # Split into ranges with about the same number of point sources.
+        n_sources = np.cumsum([len(_i) for _i in groups])
+        bounds = np.searchsorted(
+            n_sources,
+            np.linspace(0, n_sources[-1], n_workers + 1)[1:-1],
+            side="right",
+        )
+        bounds = [0] + sorted(set(bounds) - {0}) + [len(groups)]
+
+        # Each call has its own job so concurrent calls from several
+        # threads do not interfere.
+        job = (
+            self,
+            groups,
+            element_ids,
+            receiver,
+            components,
+            correct_mu,
+            counter,
+            cancel,
+        )
+        if context is not None:
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=context,
+                initializer=_init_finite_source_worker,
+                initargs=(job,),
+            )
+            # Submitted arguments are pickled - the workers already have the
+            # job.
+            worker_job = None
+        else:  # pragma: no cover
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=n_workers
+            )
+            worker_job = job
+        with executor:
+            futures = [
+                executor.submit(
+                    _sum_finite_source_worker, start, stop, worker_job
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            count = int(n_sources[-1])
+            current = 0
+            pending = futures
+            while pending:
+                _, pending = concurrent.futures.wait(pending, timeout=0.1)
+                # Only used for the GUI.
+                if progress_callback and counter.value != current:
+                    current = counter.value
+                    if progress_callback(current, count):
+                        cancel.set()
+            partial_sums = [_i.result() for _i in futures]
+
+        if cancel.is_set():
+            return None
+        return partial_sums
+
+    def _sum_finite_source_groups(
+        self, groups, element_ids, receiver, components, correct_mu, progress
+    ):
+        """
+        Sum groups of point sources sharing a location.
+
+        :param element_ids: The ids of the elements containing the groups or
+            ``None``. Consecutive groups in the same element share the reads
+            of the element.
+        :param progress: Called once for every finished point source. The
+            calculation is cancelled if it returns ``True``.
+
+        Returns the summed spectrum of the moment tensor sources and the
+        summed force source traces, or ``None`` if the calculation has been
+        cancelled.
+        """
+        spectrum = np.zeros(
+            (len(components), self.info.nfft // 2 + 1), dtype=np.complex128
+        )
+        # Force sources are differentiated after the reconvolution and are
+        # thus summed in the time domain.
+        force_data = np.zeros((len(components), self.info.npts))
+
+        if element_ids is None:
+            # Each group in its own element.
+            element_ids = range(len(groups))
+
+        block = []
+        for _, run in itertools.groupby(
+            zip(groups, element_ids), key=lambda x: x[1]
+        ):
+            run = [_i[0] for _i in run]
+            with self._sharing_element_reads(share=len(run) > 1):
+                for group in run:
+                    if isinstance(group[0], ForceSource):
+                        for source in group:
+                            data = self.get_seismograms(
+                                source,
+                                receiver,
+                                components,
+                                reconvolve_stf=True,
+                                kind=INV_KIND_MAP[STF_MAP[self.info.stf]],
+                                return_obspy_stream=False,
+                                remove_source_shift=False,
+                            )
+                            corr_fac = (
+                                data["mu"] / DEFAULT_MU if correct_mu else 1.0
+                            )
+                            for _i, comp in enumerate(components):
+                                force_data[_i] += data[comp] * corr_fac
+                    elif len(group) == 1:
+                        data = self._get_seismograms(
+                            source=group[0],
+                            receiver=receiver,
+                            components=components,
+                        )
+                        corr_fac = (
+                            data["mu"] / DEFAULT_MU if correct_mu else 1.0
+                        )
+                        # A single basis trace with the moment tensor already
+                        # applied.
+                        block.append(
+                            (
+                                np.array(
+                                    [[data[comp] for comp in components]]
+                                ),
+                                group,
+                                np.array([[corr_fac]]),
+                            )
+                        )
+                    else:
+                        kernels, mu = self._get_moment_tensor_kernels(
+                            source=group[0],
+                            receiver=receiver,
+                            components=components,
+                        )
+                        corr_fac = mu / DEFAULT_MU if correct_mu else 1.0
+                        block.append(
+                            (
+                                kernels.transpose(1, 0, 2),
+                                group,
+                                np.array([_i.tensor for _i in group])
+                                * corr_fac,
+                            )
+                        )
+
+                    if (
+                        sum(len(_i[1]) for _i in block)
+                        >= FINITE_SOURCE_BLOCK_SIZE
+                    ):
+                        self._sum_finite_source_block(block, spectrum)
+                        block = []
+
+                    for _ in group:
+                        if progress():
+                            return None
+
+        if block:
+            self._sum_finite_source_block(block, spectrum)
+
+        return spectrum, force_data
+
+    def _sum_finite_source_block(self, block, spectrum):
+        """
+        Add a block of point sources to the spectrum of the summed
+        seismograms.
+
+        Each entry of ``block`` is a tuple of the basis traces with shape
+        ``(n_basis, n_components, npts)``, the point sources, and the weights
+        of the basis traces for each point source with shape
+        ``(n_sources, n_basis)``.
+        """
+        traces = np.concatenate([_i[0] for _i in block])
+        sources = [source for _i in block for source in _i[1]]
+        weights = scipy.linalg.block_diag(*[_i[2] for _i in block])
+
+        # Shape: (n_basis, n_frequencies)
+        filters = weights.T.dot(self._get_stf_reconvolution_filters(sources))
+        spectrum += np.einsum(
+            "bf,bcf->cf", filters, self._get_tapered_spectra(traces)
+        )
+
     def _get_greens_seiscomp_sanity_checks(
         self, epicentral_distance_degree, source_depth_in_m, kind, dt
     ):
@@ -741,12 +1672,6 @@ class BaseInstaseisDB(metaclass=ABCMeta):
                 raise ValueError("Invalid component: %s" % comp)
 
         if self.info.is_reciprocal:
-            if receiver.depth_in_m is not None:
-                warnings.warn(
-                    "Receiver depth cannot be changed when reading "
-                    "from reciprocal DB. Using depth from the DB."
-                )
-
             if (
                 any(comp in components for comp in ["N", "E", "R", "T"])
                 and "horizontal" not in self.info.components
@@ -782,36 +1707,8 @@ class BaseInstaseisDB(metaclass=ABCMeta):
                     % (src_radius, self.info.min_radius, self.info.max_radius)
                 )
                 raise ValueError(msg)
-        elif not self.info.is_reciprocal and receiver.depth_in_m is not None:
-            rec_radius = self.info.planet_radius - receiver.depth_in_m
-            if rec_radius < self.info.min_radius:
-                msg = (
-                    "Receiver too deep. Receiver would be located at a radius "
-                    "of %.1f meters. The database supports receiver radii "
-                    "from %.1f to %.1f meters."
-                    % (rec_radius, self.info.min_radius, self.info.max_radius)
-                )
-                raise ValueError(msg)
-            elif rec_radius > self.info.max_radius:
-                msg = (
-                    "Receiver is too shallow. Receiver would be located at a "
-                    "radius of %.1f meters. The database supports receiver "
-                    "radii from %.1f to %.1f meters."
-                    % (rec_radius, self.info.min_radius, self.info.max_radius)
-                )
-                raise ValueError(msg)
 
-        d = locations2degrees(
-            source.latitude,
-            source.longitude,
-            receiver.latitude,
-            receiver.longitude,
-        )
-        if not self.info.min_d <= d <= self.info.max_d:
-            raise ValueError(
-                "Epicentral distance is %.1f but should be in [%.1f, "
-                "%.1f]." % (d, self.info.min_d, self.info.max_d)
-            )
+        self._check_receivers(source=source, receivers=[receiver])
 
         return source, receiver
 
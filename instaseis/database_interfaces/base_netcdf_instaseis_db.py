@@ -13,10 +13,12 @@ AxiSEM.
 """
 from abc import ABCMeta, abstractmethod
 import collections
+import contextlib
 
 import numpy as np
 from obspy.signal.util import next_pow_2
 import os
+import threading
 
 from .base_instaseis_db import BaseInstaseisDB
 from .. import finite_elem_mapping
@@ -41,8 +43,42 @@ ElementInfo = collections.namedtuple(
     ],
 )
 
+# Same as ElementInfo but each field is an array with one entry per point.
+ElementInfoTable = collections.namedtuple(
+    "ElementInfoTable",
+    [
+        "id_elem",
+        "gll_point_ids",
+        "xi",
+        "eta",
+        "corner_points",
+        "axis",
+        "eltype",
+    ],
+)
+
 Coordinates = collections.namedtuple("Coordinates", ["s", "phi", "z"])
 
+# Loop over multiple tolerances when searching for the element containing a
+# point - this is mainly needed for legacy regional databases that have small
+# elements far from the core.
+# These databases store coordinates in single precision which results in
+# accuracy issues for large numbers.
+# For good databases this should only always choose the first tolerance thus
+# there is not runtime cost.
+ELEMENT_SEARCH_TOLERANCES = [1e-3, 1e-2, 5e-2, 8e-2]
+
+# Runs of GLL points of an element separated by at most this many other
+# points are read in one go and the unneeded points are discarded afterwards.
+# Fewer but larger reads are much faster on parallel file systems.
+IO_MAX_GAP = 16
+
+
+# The strain at all points of the last element of each mesh while the
+# extractions of a thread share the reads of elements. Keyed by the id of
+# the mesh.
+_SHARED_ELEMENT_STRAIN = threading.local()
+
 
 class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
     """
@@ -50,11 +86,23 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
     database.
     """
 
+    # Once this many elements have been requested, the strain at all points
+    # of an element is only computed and buffered while at least the given
+    # fraction of the recent requests are for elements requested before.
+    _FUSED_STRAIN_MIN_REQUESTS = 100
+    _FUSED_STRAIN_MIN_REUSE_RATE = 0.5
+
     def __init__(
         self,
         db_path,
         buffer_size_in_mb=100,
         read_on_demand=False,
+        shared_buffers=False,
+        buffer_policy="lru",
+        compressed_buffer_size_in_mb=0,
+        compressed_buffer_codec="zlib",
+        interpolation_buffer_size_in_mb=0,
+        memory_map=True,
         *args,
         **kwargs,
     ):
@@ -67,17 +115,59 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
             avoid repeated disc access. Depending on the type of database
             and the number of components of the database, the total buffer
             memory can be up to four times this number. The optimal value is
-            highly application and system dependent.
+            highly application and system dependent. With ``0`` the strain
+            of reciprocal databases is directly evaluated at the source
+            location instead of at all points of the element. The same
+            happens for new elements while most recently requested elements
+            have not been requested before, e.g. for large finite sources.
         :type buffer_size_in_mb: int, optional
         :param read_on_demand: Read several global fields on demand (faster
             initialization) or on initialization (slower
             initialization, faster in individual seismogram extraction,
             useful e.g. for finite sources, default).
         :type read_on_demand: bool, optional
+        :param shared_buffers: Keep the strain and displacement buffers in
+            shared memory so all processes forked after opening the database
+            share one buffer.
+        :type shared_buffers: bool, optional
+        :param buffer_policy: Determines which items are removed from the
+            buffers once they are full. One of ``"lru"`` (default),
+            ``"lfu"``, ``"arc"``, or ``"tinylfu"``. The latter two are scan
+            resistant, e.g. extracting a large finite source does not evict
+            frequently used elements.
+        :type buffer_policy: str, optional
+        :param compressed_buffer_size_in_mb: Size of a second buffer tier
+            per buffer. Items evicted from a buffer are stored there
+            compressed and are promoted back once they are needed again.
+            Disabled by default.
+        :type compressed_buffer_size_in_mb: int, optional
+        :param compressed_buffer_codec: How items are stored in the second
+            buffer tier. One of ``"zlib"`` (default), ``"lz4"``, or
+            ``"zstd"`` for lossless compression, ``"float32"`` to store them
+            in single precision, or a combination like ``"float32+lz4"``.
+            ``"lz4"`` and ``"zstd"`` require the lz4 and zstandard packages.
+        :type compressed_buffer_codec: str, optional
+        :param interpolation_buffer_size_in_mb: Buffer for the strain
+            interpolated to the source or receiver location. Speeds up
+            repeatedly requesting the same locations, e.g. a fixed set of
+            receivers for many sources. Disabled by default.
+        :type interpolation_buffer_size_in_mb: int, optional
+        :param memory_map: Read contiguous, uncompressed datasets through
+            memory maps of the database files instead of through HDF5. Reads
+            are then served from the page cache without copies and threads
+            do not serialize on the global HDF5 lock. All other datasets are
+            always read with HDF5.
+        :type memory_map: bool, optional
         """
         self.db_path = db_path
         self.buffer_size_in_mb = buffer_size_in_mb
         self.read_on_demand = read_on_demand
+        self.shared_buffers = shared_buffers
+        self.buffer_policy = buffer_policy
+        self.compressed_buffer_size_in_mb = compressed_buffer_size_in_mb
+        self.compressed_buffer_codec = compressed_buffer_codec
+        self.interpolation_buffer_size_in_mb = interpolation_buffer_size_in_mb
+        self.memory_map = memory_map
 
     def _get_element_info(self, coordinates):
         """
@@ -93,15 +183,8 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
         # Find the element containing the point of interest.
         mesh = self.parsed_mesh.f["Mesh"]
         if self.info.dump_type == "displ_only":
-            # Loop over multiple tolerances - this is mainly needed for
-            # legacy regional databases that have small elements far from the
-            # core.
-            # These databases store coordinates in single precision which
-            # results in accuracy issues for large numbers.
-            # For good databases this should only always choose the first
-            # tolerance thus there is not runtime cost.
             id_elem = None
-            for tolerance in [1e-3, 1e-2, 5e-2, 8e-2]:
+            for tolerance in ELEMENT_SEARCH_TOLERANCES:
                 for idx in nextpoints[1]:
                     corner_points = np.empty((4, 2), dtype="float64")
 
@@ -183,6 +266,126 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
             eltype=eltype,
         )
 
+    def _get_element_info_batch(self, s, z):
+        """
+        Vectorized version of :meth:`_get_element_info` for many points.
+
+        All points are looked up with a single query of the kd-tree and the
+        candidate elements are tested in one call to the compiled library.
+
+        :param s: The s coordinates of the points.
+        :param z: The z coordinates of the points.
+
+        Returns an :class:`ElementInfoTable` with one entry per point. Use
+        :meth:`_get_element_info_from_table` to get the
+        :class:`ElementInfo` of a single point.
+        """
+        s = np.atleast_1d(np.asarray(s, dtype=np.float64))
+        z = np.atleast_1d(np.asarray(z, dtype=np.float64))
+        points = np.column_stack([s, z])
+
+        if self.info.dump_type != "displ_only":
+            id_elem = self.parsed_mesh.kdtree.query(points, k=1)[1]
+            return ElementInfoTable(
+                id_elem=id_elem,
+                gll_point_ids=None,
+                xi=None,
+                eta=None,
+                corner_points=None,
+                axis=None,
+                eltype=None,
+            )
+
+        k = min(10, self.parsed_mesh.kdtree.n)
+        candidates = self.parsed_mesh.kdtree.query(points, k=k)[1]
+        candidates = candidates.reshape(len(points), k)
+
+        corner_point_ids = self._read_mesh_rows("fem_mesh", candidates)[
+            ..., :4
+        ]
+        eltypes = self._read_mesh_rows("eltype", candidates)
+        corner_points = np.empty(candidates.shape + (4, 2), dtype="float64")
+        corner_points[..., 0] = self._read_mesh_rows(
+            "mesh_S", corner_point_ids
+        )
+        corner_points[..., 1] = self._read_mesh_rows(
+            "mesh_Z", corner_point_ids
+        )
+
+        found, xi, eta = finite_elem_mapping.inside_element_batch(
+            s=s,
+            z=z,
+            nodes=corner_points,
+            element_types=eltypes,
+            tolerances=ELEMENT_SEARCH_TOLERANCES,
+        )
+        if np.any(found < 0):  # pragma: no cover
+            raise ValueError("Element not found")
+
+        rows = np.arange(len(points))
+        id_elem = candidates[rows, found]
+
+        return ElementInfoTable(
+            id_elem=id_elem,
+            gll_point_ids=self._read_mesh_rows("sem_mesh", id_elem),
+            xi=xi,
+            eta=eta,
+            corner_points=corner_points[rows, found],
+            axis=self._read_mesh_rows("axis", id_elem).astype(bool),
+            eltype=eltypes[rows, found],
+        )
+
+    def _get_element_info_from_table(self, table, index):
+        """
+        Get the :class:`ElementInfo` of a single point from an
+        :class:`ElementInfoTable`.
+        """
+        if table.gll_point_ids is None:
+            return ElementInfo(
+                id_elem=table.id_elem[index],
+                gll_point_ids=None,
+                xi=None,
+                eta=None,
+                corner_points=None,
+                col_points_xi=None,
+                col_points_eta=None,
+                axis=None,
+                eltype=None,
+            )
+
+        axis = bool(table.axis[index])
+        if axis:
+            col_points_xi = self.parsed_mesh.glj_points
+        else:
+            col_points_xi = self.parsed_mesh.gll_points
+
+        return ElementInfo(
+            id_elem=table.id_elem[index],
+            gll_point_ids=table.gll_point_ids[index],
+            xi=table.xi[index],
+            eta=table.eta[index],
+            corner_points=table.corner_points[index],
+            col_points_xi=col_points_xi,
+            col_points_eta=self.parsed_mesh.gll_points,
+            axis=axis,
+            eltype=table.eltype[index],
+        )
+
+    def _read_mesh_rows(self, name, ids):
+        """
+        Gather the rows of one of the mesh arrays for an arbitrarily shaped
+        array of indices.
+        """
+        if not self.read_on_demand:
+            attr = {"eltype": "eltypes"}.get(name, name)
+            return getattr(self.parsed_mesh, attr)[ids]
+
+        # When reading from a netcdf file, the indices must be sorted and
+        # unique. The inverse indices restore the original order.
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        data = self.parsed_mesh.f["Mesh"][name][unique_ids]
+        return data[inverse].reshape(np.shape(ids) + data.shape[1:])
+
     @abstractmethod
     def _get_data(
         self, source, receiver, components, coordinates, element_info
@@ -215,6 +418,274 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
         :param components: The requests components. Any combinations of
             ``"Z"``, ``"N"``, ``"E"``, ``"R"``, and ``"T"``
         """
+        coordinates = self._get_coordinates(source=source, receiver=receiver)
+        element_info = self._get_element_info(coordinates=coordinates)
+
+        return self._get_data(
+            source=source,
+            receiver=receiver,
+            components=components,
+            coordinates=coordinates,
+            element_info=element_info,
+        )
+
+    def _get_seismograms_batch(self, source, receivers, components):
+        """
+        Extract the raw seismograms for many receivers from a netCDF based
+        Instaseis database.
+
+        The elements containing the points of interest are located for all
+        receivers at once.
+        """
+        coordinates = self._get_coordinates_batch(
+            sources=[source] * len(receivers), receivers=receivers
+        )
+        table = self._get_element_info_batch(s=coordinates.s, z=coordinates.z)
+
+        data = np.empty(
+            (len(receivers), len(components), self.info.npts),
+            dtype=np.float64,
+        )
+        for _i, receiver in enumerate(receivers):
+            d = self._get_data(
+                source=source,
+                receiver=receiver,
+                components=components,
+                coordinates=Coordinates(
+                    s=coordinates.s[_i],
+                    phi=coordinates.phi[_i],
+                    z=coordinates.z[_i],
+                ),
+                element_info=self._get_element_info_from_table(table, _i),
+            )
+            for _j, comp in enumerate(components):
+                data[_i, _j] = d[comp]
+        return data
+
+    def _get_mu(self, element_info):
+        """
+        Get the shear modulus at the point of interest.
+        """
+        ei = element_info
+        if not self.read_on_demand:
+            mesh_mu = self.parsed_mesh.mesh_mu
+        else:
+            mesh_mu = self.parsed_mesh.f["Mesh"]["mesh_mu"]
+        if self.info.dump_type == "displ_only":
+            npol = self.info.spatial_order
+            return mesh_mu[ei.gll_point_ids[npol // 2, npol // 2]]
+        # XXX: Is this correct?
+        return mesh_mu[ei.id_elem]
+
+    def _contract_moment_tensor(
+        self, fields, tensor, source, receiver, coordinates, components
+    ):
+        """
+        Contract the fields returned by _get_moment_tensor_fields() with a
+        moment tensor in the order ``[m_rr, m_tt, m_pp, m_rt, m_rp, m_tp]``.
+        This is linear in the moment tensor.
+        """
+        data = {}
+        if self._is_reciprocal:
+            strain_x, strain_z = fields
+            tensor_voigt = np.asarray(tensor)[[1, 2, 0, 4, 3, 5]]
+
+            fac_1_map = {"N": np.cos, "E": np.sin}
+            fac_2_map = {"N": lambda x: -np.sin(x), "E": np.cos}
+
+            mij = rotations.rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(
+                tensor_voigt,
+                np.deg2rad(source.longitude),
+                np.deg2rad(source.colatitude),
+            )
+            mij = rotations.rotate_symm_tensor_voigt_xyz_earth_to_xyz_src(
+                mij,
+                np.deg2rad(receiver.longitude),
+                np.deg2rad(receiver.colatitude),
+            )
+            mij = rotations.rotate_symm_tensor_voigt_xyz_to_src(
+                mij, coordinates.phi
+            )
+            mij /= self.parsed_mesh.amplitude
+
+            if "Z" in components:
+                final = np.zeros(strain_z.shape[0], dtype="float64")
+                for i in range(3):
+                    final += mij[i] * strain_z[:, i]
+                final += 2.0 * mij[4] * strain_z[:, 4]
+                data["Z"] = final
+
+            if "R" in components:
+                final = np.zeros(strain_x.shape[0], dtype="float64")
+                final -= strain_x[:, 0] * mij[0] * 1.0
+                final -= strain_x[:, 1] * mij[1] * 1.0
+                final -= strain_x[:, 2] * mij[2] * 1.0
+                final -= strain_x[:, 4] * mij[4] * 2.0
+                data["R"] = final
+
+            if "T" in components:
+                final = np.zeros(strain_x.shape[0], dtype="float64")
+                final += strain_x[:, 3] * mij[3] * 2.0
+                final += strain_x[:, 5] * mij[5] * 2.0
+                data["T"] = final
+
+            for comp in ["E", "N"]:
+                if comp not in components:
+                    continue
+
+                fac_1 = fac_1_map[comp](coordinates.phi)
+                fac_2 = fac_2_map[comp](coordinates.phi)
+
+                final = np.zeros(strain_x.shape[0], dtype="float64")
+                final += strain_x[:, 0] * mij[0] * 1.0 * fac_1
+                final += strain_x[:, 1] * mij[1] * 1.0 * fac_1
+                final += strain_x[:, 2] * mij[2] * 1.0 * fac_1
+                final += strain_x[:, 3] * mij[3] * 2.0 * fac_2
+                final += strain_x[:, 4] * mij[4] * 2.0 * fac_1
+                final += strain_x[:, 5] * mij[5] * 2.0 * fac_2
+                if comp == "N":
+                    final *= -1.0
+                data[comp] = final
+
+            return data
+
+        displ_1, displ_2, displ_3, displ_4 = fields
+
+        mij = tensor / self.parsed_mesh.amplitude
+        # mij is [m_rr, m_tt, m_pp, m_rt, m_rp, m_tp]
+        # final is in s, phi, z coordinates
+        final = np.zeros((displ_1.shape[0], 3), dtype="float64")
+
+        final[:, 0] += displ_1[:, 0] * mij[0]
+        final[:, 2] += displ_1[:, 2] * mij[0]
+
+        final[:, 0] += displ_2[:, 0] * (mij[1] + mij[2])
+        final[:, 2] += displ_2[:, 2] * (mij[1] + mij[2])
+
+        fac_1 = mij[3] * np.cos(coordinates.phi) + mij[4] * np.sin(
+            coordinates.phi
+        )
+        fac_2 = -mij[3] * np.sin(coordinates.phi) + mij[4] * np.cos(
+            coordinates.phi
+        )
+
+        final[:, 0] += displ_3[:, 0] * fac_1
+        final[:, 1] += displ_3[:, 1] * fac_2
+        final[:, 2] += displ_3[:, 2] * fac_1
+
+        fac_1 = (mij[1] - mij[2]) * np.cos(2 * coordinates.phi) + 2 * mij[
+            5
+        ] * np.sin(2 * coordinates.phi)
+        fac_2 = -(mij[1] - mij[2]) * np.sin(2 * coordinates.phi) + 2 * mij[
+            5
+        ] * np.cos(2 * coordinates.phi)
+
+        final[:, 0] += displ_4[:, 0] * fac_1
+        final[:, 1] += displ_4[:, 1] * fac_2
+        final[:, 2] += displ_4[:, 2] * fac_1
+
+        rotmesh_colat = np.arctan2(coordinates.s, coordinates.z)
+
+        if "T" in components:
+            # need the - for consistency with reciprocal mode,
+            # need external verification still
+            data["T"] = -final[:, 1]
+
+        if "R" in components:
+            data["R"] = final[:, 0] * np.cos(rotmesh_colat) - final[
+                :, 2
+            ] * np.sin(rotmesh_colat)
+
+        if "N" in components or "E" in components or "Z" in components:
+            # transpose needed because rotations assume different slicing
+            # (ugly)
+            final = rotations.rotate_vector_src_to_NEZ(
+                final.T,
+                coordinates.phi,
+                source.longitude_rad,
+                source.colatitude_rad,
+                receiver.longitude_rad,
+                receiver.colatitude_rad,
+            ).T
+
+            if "N" in components:
+                data["N"] = final[:, 0]
+            if "E" in components:
+                data["E"] = final[:, 1]
+            if "Z" in components:
+                data["Z"] = final[:, 2]
+
+        return data
+
+    def _get_moment_tensor_kernels(self, source, receiver, components):
+        """
+        Extract the raw moment tensor kernels and the shear modulus from a
+        netCDF based Instaseis database.
+
+        The fields are only read and interpolated once and then contracted
+        with the six unit moment tensors.
+        """
+        coordinates = self._get_coordinates(source=source, receiver=receiver)
+        element_info = self._get_element_info(coordinates=coordinates)
+        fields = self._get_moment_tensor_fields(
+            components=components, element_info=element_info
+        )
+
+        data = np.empty((len(components), 6, self.info.npts), dtype=np.float64)
+        for _i, tensor in enumerate(np.eye(6)):
+            d = self._contract_moment_tensor(
+                fields=fields,
+                tensor=tensor,
+                source=source,
+                receiver=receiver,
+                coordinates=coordinates,
+                components=components,
+            )
+            for _j, comp in enumerate(components):
+                data[_j, _i] = d[comp]
+        return data, self._get_mu(element_info=element_info)
+
+    def _get_finite_source_sort_keys(self, sources, receiver):
+        """
+        Sort the point sources of a finite source by the ids of the elements
+        containing them. The elements of merged databases are ordered along
+        a kd-tree traversal so this is also a spatial ordering.
+        """
+        return self._get_finite_source_element_ids(
+            sources=sources, receiver=receiver
+        )
+
+    def _get_finite_source_element_ids(self, sources, receiver):
+        """
+        The ids of the elements containing the point sources, all found in
+        one batched lookup.
+        """
+        coordinates = self._get_coordinates_batch(
+            sources=sources, receivers=[receiver] * len(sources)
+        )
+        return self._get_element_info_batch(
+            s=coordinates.s, z=coordinates.z
+        ).id_elem
+
+    @contextlib.contextmanager
+    def _sharing_element_reads(self, share=True):
+        """
+        Keep the strain at all points of the last element of each mesh for
+        the extractions of this thread within the context, so locations in
+        the same element only read the element and compute its strain once.
+        """
+        previous = getattr(_SHARED_ELEMENT_STRAIN, "strain", None)
+        _SHARED_ELEMENT_STRAIN.strain = {} if share else None
+        try:
+            yield
+        finally:
+            _SHARED_ELEMENT_STRAIN.strain = previous
+
+    def _get_coordinates(self, source, receiver):
+        """
+        Get the coordinates of the point of interest in the rotated frame of
+        the mesh.
+        """
         if self.info.is_reciprocal:
             a, b = source, receiver
         else:
@@ -228,18 +699,87 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
             b.colatitude,
         )
 
-        coordinates = Coordinates(s=rotmesh_s, phi=rotmesh_phi, z=rotmesh_z)
+        return Coordinates(s=rotmesh_s, phi=rotmesh_phi, z=rotmesh_z)
 
-        element_info = self._get_element_info(coordinates=coordinates)
+    def _get_coordinates_batch(self, sources, receivers):
+        """
+        Get the coordinates of the points of interest for pairs of sources
+        and receivers in the rotated frames of the mesh, all at once.
+        """
+        if self.info.is_reciprocal:
+            a, b = sources, receivers
+        else:
+            a, b = receivers, sources
+
+        latitude = np.array([_i.latitude for _i in a], dtype=np.float64)
+        longitude = np.array([_i.longitude for _i in a], dtype=np.float64)
+        radius = np.array(
+            [
+                _i.radius_in_m(planet_radius=self.info.planet_radius)
+                for _i in a
+            ],
+            dtype=np.float64,
+        )
 
-        return self._get_data(
-            source=source,
-            receiver=receiver,
-            components=components,
-            coordinates=coordinates,
-            element_info=element_info,
+        rotmesh_s, rotmesh_phi, rotmesh_z = rotations.rotate_frame_rd(
+            np.cos(np.deg2rad(latitude))
+            * np.cos(np.deg2rad(longitude))
+            * radius,
+            np.cos(np.deg2rad(latitude))
+            * np.sin(np.deg2rad(longitude))
+            * radius,
+            np.sin(np.deg2rad(latitude)) * radius,
+            np.array([_i.longitude for _i in b], dtype=np.float64),
+            np.array([_i.colatitude for _i in b], dtype=np.float64),
         )
 
+        return Coordinates(s=rotmesh_s, phi=rotmesh_phi, z=rotmesh_z)
+
+    def _get_buffered_strain(self, mesh, id_elem, load):
+        """
+        Return the strain at all points of an element from the strain buffer
+        or compute it with ``load()`` and buffer it.
+
+        Returns None if the strain should rather be directly evaluated at
+        the point: if the buffer is disabled or if most recently requested
+        elements have not been requested before so that computing the
+        strain at all points does not pay off. Elements that are still
+        buffered are used in any case.
+
+        While the reads of elements are shared, the strain of the last
+        element is always computed and kept.
+        """
+        shared = getattr(_SHARED_ELEMENT_STRAIN, "strain", None)
+        if shared is not None:
+            last = shared.get(id(mesh))
+            if last is not None and last[0] == id_elem:
+                return last[1]
+            strain = self._get_unshared_strain(mesh, id_elem, load)
+            if strain is None:
+                strain = load()
+            shared[id(mesh)] = (id_elem, strain)
+            return strain
+        return self._get_unshared_strain(mesh, id_elem, load)
+
+    def _get_unshared_strain(self, mesh, id_elem, load):
+        buffer = mesh.strain_buffer
+        if not buffer.enabled:
+            return None
+        requests = mesh.strain_requests
+        requests.add(id_elem)
+        if (
+            len(requests) < self._FUSED_STRAIN_MIN_REQUESTS
+            or requests.reuse_rate >= self._FUSED_STRAIN_MIN_REUSE_RATE
+        ):
+            return buffer.get_or_load(id_elem, load)
+        if id_elem not in buffer:
+            return None
+        try:
+            return buffer.get(id_elem)
+        except KeyError:  # pragma: no cover
+            # Evicted by another thread in the meanwhile.
+            return None
+
     def _get_strain_interp(  # NOQA
         self,
         mesh,
@@ -255,71 +795,10 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
         xi,
         eta,
     ):
-        if id_elem not in mesh.strain_buffer:
-            # Single precision in the NetCDF files but the later interpolation
-            # routines require double precision. Assignment to this array will
-            # force a cast.
-            utemp = np.zeros(
-                (mesh.ndumps, mesh.npol + 1, mesh.npol + 1, 3),
-                dtype=np.float64,
-                order="F",
-            )
-
-            # The list of ids we have is unique but not sorted.
-            ids = gll_point_ids.flatten()
-            s_ids = np.sort(ids)
-            mesh_dict = mesh.f["Snapshots"]
-
-            # Load displacement from all GLL points.
-            for i, var in enumerate(["disp_s", "disp_p", "disp_z"]):
-                if var not in mesh_dict:
-                    continue
-
-                # Make sure it can work with normal and transposed arrays to
-                # support legacy as well as modern, transposed databases.
-                time_axis = mesh.time_axis[var]
-
-                # Chunk the I/O by requesting successive indices in one go -
-                # this actually makes quite a big difference on some file
-                # systems.
-                chunks = helpers.io_chunker(s_ids)
-                _temp = []
-                m = mesh_dict[var]
-                if time_axis == 0:
-                    for _c in chunks:
-                        if isinstance(_c, list):
-                            _temp.append(m[:, _c[0] : _c[1]])  # NOQA
-                        else:
-                            _temp.append(m[:, _c])
-                else:
-                    for _c in chunks:
-                        if isinstance(_c, list):
-                            _temp.append(m[_c[0] : _c[1], :].T)  # NOQA
-                        else:
-                            _temp.append(m[_c, :].T)
-
-                _t = np.empty((_temp[0].shape[0], 25), dtype=_temp[0].dtype)
-
-                k = 0
-                for _i in _temp:
-                    if len(_i.shape) == 1:
-                        _t[:, k] = _i
-                        k += 1
-                    else:
-                        for _j in range(_i.shape[1]):
-                            _t[:, k + _j] = _i[:, _j]
-
-                        k += _j + 1
-
-                _temp = _t
-
-                for ipol in range(mesh.npol + 1):
-                    for jpol in range(mesh.npol + 1):
-                        idx = ipol * 5 + jpol
-                        utemp[:, jpol, ipol, i] = _temp[
-                            :, np.argwhere(s_ids == ids[idx])[0][0]
-                        ]
+        def _load_displacement():
+            return self._read_gll_displacement(mesh, gll_point_ids)
 
+        def _load():
             strain_fct_map = {
                 "monopole": sem_derivatives.strain_monopole_td,
                 "dipole": sem_derivatives.strain_dipole_td,
@@ -327,7 +806,7 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
             }
 
             strain = strain_fct_map[mesh.excitation_type](
-                utemp,
+                _load_displacement(),
                 G,
                 GT,
                 col_points_xi,
@@ -339,25 +818,54 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
                 axis,
             )
 
-            mesh.strain_buffer.add(id_elem, strain)
-        else:
-            strain = mesh.strain_buffer.get(id_elem)
-
-        final_strain = np.empty((strain.shape[0], 6), order="F")
+            return strain
 
-        for i in range(6):
-            final_strain[:, i] = spectral_basis.lagrange_interpol_2D_td(
-                col_points_xi, col_points_eta, strain[:, :, :, i], xi, eta
-            )
-
-        if not mesh.excitation_type == "monopole":
-            final_strain[:, 3] *= -1.0
-            final_strain[:, 5] *= -1.0
-
-        return final_strain
+        def _interpolate():
+            # The strain at all points of the element is only needed if it
+            # is buffered - otherwise directly evaluate it at the point.
+            strain = self._get_buffered_strain(mesh, id_elem, _load)
+            if strain is not None:
+                final_strain = spectral_basis.lagrange_interpol_2D_td_batch(
+                    col_points_xi, col_points_eta, strain, xi, eta
+                )
+            else:
+                final_strain = sem_derivatives.strain_interp_td(
+                    _load_displacement(),
+                    G,
+                    GT,
+                    col_points_xi,
+                    col_points_eta,
+                    mesh.npol,
+                    mesh.ndumps,
+                    corner_points,
+                    eltype,
+                    axis,
+                    mesh.excitation_type,
+                    xi,
+                    eta,
+                )
+
+            if not mesh.excitation_type == "monopole":
+                final_strain[:, 3] *= -1.0
+                final_strain[:, 5] *= -1.0
+
+            # Might be buffered - must not be modified in place.
+            final_strain.flags.writeable = False
+            return final_strain
+
+        # The interpolation buffer is disabled by default - do not pay for
+        # the lookup then.
+        if not mesh.interp_buffer.enabled:
+            return _interpolate()
+
+        # Repeated requests for the same point (e.g. the same receivers for
+        # many sources) skip the interpolation.
+        return mesh.interp_buffer.get_or_load(
+            (id_elem, float(xi), float(eta)), _interpolate
+        )
 
     def _get_strain(self, mesh, id_elem):
-        if id_elem not in mesh.strain_buffer:
+        def _load():
             strain_temp = np.zeros((self.info.npts, 6), order="F")
 
             mesh_dict = mesh.f["Snapshots"]
@@ -380,7 +888,8 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
                 time_axis = mesh.time_axis[var]
 
                 if time_axis == 0:
-                    strain_temp[:, i] = mesh_dict[var][:, id_elem]
+                    dataset = mesh.get_dataset("Snapshots/" + var)
+                    strain_temp[:, i] = dataset[:, id_elem]
                 else:  # pragma: no cover
                     # We don't have an example for this yet so we just raise
                     # here for now - implementing it should just be a matter
@@ -400,11 +909,55 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
             final_strain[:, 3] = -strain_temp[:, 4]
             final_strain[:, 4] = strain_temp[:, 1]
             final_strain[:, 5] = -strain_temp[:, 3]
-            mesh.strain_buffer.add(id_elem, final_strain)
-        else:
-            final_strain = mesh.strain_buffer.get(id_elem)
+            return final_strain
+
+        return mesh.strain_buffer.get_or_load(id_elem, _load)
+
+    def _read_gll_displacement(self, mesh, gll_point_ids):
+        """
+        Read the displacement at all GLL points of an element. Returns an
+        array with the shape ``(ndumps, npol + 1, npol + 1, 3)`` indexed by
+        ``[:, jpol, ipol, :]``.
+        """
+        # Single precision in the NetCDF files but the later interpolation
+        # routines require double precision. Assignment to this array will
+        # force a cast.
+        utemp = np.zeros(
+            (mesh.ndumps, mesh.npol + 1, mesh.npol + 1, 3),
+            dtype=np.float64,
+            order="F",
+        )
+
+        # The list of ids we have is unique but not sorted.
+        s_ids, positions = helpers.sort_gll_point_ids(gll_point_ids)
 
-        return final_strain
+        # Read runs of successive and nearby indices in one go - this
+        # actually makes quite a big difference on some file systems. The
+        # netCDF Python wrappers starting with version 1.1.6 furthermore
+        # disallow duplicate and unordered indices while slicing.
+        reads, take = helpers.plan_reads(s_ids, max_gap=IO_MAX_GAP)
+        take = take[positions]
+
+        mesh_dict = mesh.f["Snapshots"]
+
+        # Load displacement from all GLL points.
+        for i, var in enumerate(["disp_s", "disp_p", "disp_z"]):
+            if var not in mesh_dict:
+                continue
+
+            # Make sure it can work with normal and transposed arrays to
+            # support legacy as well as modern, transposed databases.
+            time_axis = mesh.time_axis[var]
+
+            m = mesh.get_dataset("Snapshots/" + var)
+            if time_axis == 0:
+                _temp = np.concatenate([m[:, _a:_b] for _a, _b in reads], 1)
+                utemp[:, :, :, i] = _temp[:, take]
+            else:
+                _temp = np.concatenate([m[_a:_b, :] for _a, _b in reads], 0)
+                utemp[:, :, :, i] = np.moveaxis(_temp[take], -1, 0)
+
+        return utemp
 
     def _get_displacement(
         self,
@@ -416,60 +969,14 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
         xi,
         eta,
     ):
-        if id_elem not in mesh.displ_buffer:
-            utemp = np.zeros(
-                (mesh.ndumps, mesh.npol + 1, mesh.npol + 1, 3),
-                dtype=np.float64,
-                order="F",
-            )
-
-            mesh_dict = mesh.f["Snapshots"]
+        def _load():
+            return self._read_gll_displacement(mesh, gll_point_ids)
 
-            # Load displacement from all GLL points.
-            for i, var in enumerate(["disp_s", "disp_p", "disp_z"]):
-                if var not in mesh_dict:
-                    continue
+        utemp = mesh.displ_buffer.get_or_load(id_elem, _load)
 
-                # Make sure it can work with normal and transposed arrays to
-                # support legacy as well as modern, transposed databases.
-                time_axis = mesh.time_axis[var]
-
-                # The netCDF Python wrappers starting with version 1.1.6
-                # disallow duplicate and unordered indices while slicing. So
-                # we need to do it manually.
-                # The list of ids we have is unique but not sorted.
-                ids = gll_point_ids.flatten()
-                s_ids = np.sort(ids)
-
-                if time_axis == 0:
-                    temp = mesh_dict[var][:, s_ids]
-                    for ipol in range(mesh.npol + 1):
-                        for jpol in range(mesh.npol + 1):
-                            idx = ipol * 5 + jpol
-                            utemp[:, jpol, ipol, i] = temp[
-                                :, np.argwhere(s_ids == ids[idx])[0][0]
-                            ]
-                else:
-                    temp = mesh_dict[var][s_ids, :]
-                    for ipol in range(mesh.npol + 1):
-                        for jpol in range(mesh.npol + 1):
-                            idx = ipol * 5 + jpol
-                            utemp[:, jpol, ipol, i] = temp[
-                                np.argwhere(s_ids == ids[idx])[0][0], :
-                            ]
-
-            mesh.displ_buffer.add(id_elem, utemp)
-        else:
-            utemp = mesh.displ_buffer.get(id_elem)
-
-        final_displacement = np.empty((utemp.shape[0], 3), order="F")
-
-        for i in range(3):
-            final_displacement[:, i] = spectral_basis.lagrange_interpol_2D_td(
-                col_points_xi, col_points_eta, utemp[:, :, :, i], xi, eta
-            )
-
-        return final_displacement
+        return spectral_basis.lagrange_interpol_2D_td_batch(
+            col_points_xi, col_points_eta, utemp, xi, eta
+        )
 
     def _get_info(self):
         """
@@ -485,7 +992,7 @@ class BaseNetCDFInstaseisDB(BaseInstaseisDB, metaclass=ABCMeta):
         if self._is_reciprocal:
             if hasattr(self.meshes, "merged"):
                 # The number of dimensions determines the available components.
-                dims = self.meshes.merged.f["MergedSnapshots"].shape[1]
+                dims = self.meshes.merged.merged_shape[1]
                 if dims == 5:
                     components = "vertical and horizontal"
                 elif dims == 3:
@@ -12,11 +12,9 @@ AxiSEM.
     (http://www.gnu.org/copyleft/lgpl.html)
 """
 import collections
-import numpy as np
 
 from .base_netcdf_instaseis_db import BaseNetCDFInstaseisDB
 from . import mesh
-from .. import rotations
 from ..source import Source
 
 
@@ -31,6 +29,12 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
         netcdf_files,
         buffer_size_in_mb=100,
         read_on_demand=False,
+        shared_buffers=False,
+        buffer_policy="lru",
+        compressed_buffer_size_in_mb=0,
+        compressed_buffer_codec="zlib",
+        interpolation_buffer_size_in_mb=0,
+        memory_map=True,
         *args,
         **kwargs,
     ):
@@ -50,12 +54,50 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
             initialization, faster in individual seismogram extraction,
             useful e.g. for finite sources, default).
         :type read_on_demand: bool, optional
+        :param shared_buffers: Keep the strain and displacement buffers in
+            shared memory so all processes forked after opening the database
+            share one buffer.
+        :type shared_buffers: bool, optional
+        :param buffer_policy: Determines which items are removed from the
+            buffers once they are full. One of ``"lru"`` (default),
+            ``"lfu"``, ``"arc"``, or ``"tinylfu"``. The latter two are scan
+            resistant, e.g. extracting a large finite source does not evict
+            frequently used elements.
+        :type buffer_policy: str, optional
+        :param compressed_buffer_size_in_mb: Size of a second buffer tier
+            per buffer. Items evicted from a buffer are stored there
+            compressed and are promoted back once they are needed again.
+            Disabled by default.
+        :type compressed_buffer_size_in_mb: int, optional
+        :param compressed_buffer_codec: How items are stored in the second
+            buffer tier. One of ``"zlib"`` (default), ``"lz4"``, or
+            ``"zstd"`` for lossless compression, ``"float32"`` to store them
+            in single precision, or a combination like ``"float32+lz4"``.
+            ``"lz4"`` and ``"zstd"`` require the lz4 and zstandard packages.
+        :type compressed_buffer_codec: str, optional
+        :param interpolation_buffer_size_in_mb: Buffer for the strain
+            interpolated to the source or receiver location. Speeds up
+            repeatedly requesting the same locations, e.g. a fixed set of
+            receivers for many sources. Disabled by default.
+        :type interpolation_buffer_size_in_mb: int, optional
+        :param memory_map: Read contiguous, uncompressed datasets through
+            memory maps of the database files instead of through HDF5. Reads
+            are then served from the page cache without copies and threads
+            do not serialize on the global HDF5 lock. All other datasets are
+            always read with HDF5.
+        :type memory_map: bool, optional
         """
         BaseNetCDFInstaseisDB.__init__(
             self,
             db_path=db_path,
             buffer_size_in_mb=buffer_size_in_mb,
             read_on_demand=read_on_demand,
+            shared_buffers=shared_buffers,
+            buffer_policy=buffer_policy,
+            compressed_buffer_size_in_mb=compressed_buffer_size_in_mb,
+            compressed_buffer_codec=compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=interpolation_buffer_size_in_mb,
+            memory_map=memory_map,
             *args,
             **kwargs,
         )
@@ -68,6 +110,14 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
             strain_buffer_size_in_mb=0,
             displ_buffer_size_in_mb=self.buffer_size_in_mb,
             read_on_demand=self.read_on_demand,
+            shared_buffers=self.shared_buffers,
+            buffer_policy=self.buffer_policy,
+            compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+            compressed_buffer_codec=self.compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=(
+                self.interpolation_buffer_size_in_mb
+            ),
+            memory_map=self.memory_map,
         )
         m2_m = mesh.Mesh(
             files["MXX_P_MYY"],
@@ -75,6 +125,14 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
             strain_buffer_size_in_mb=0,
             displ_buffer_size_in_mb=self.buffer_size_in_mb,
             read_on_demand=self.read_on_demand,
+            shared_buffers=self.shared_buffers,
+            buffer_policy=self.buffer_policy,
+            compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+            compressed_buffer_codec=self.compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=(
+                self.interpolation_buffer_size_in_mb
+            ),
+            memory_map=self.memory_map,
         )
         m3_m = mesh.Mesh(
             files["MXZ_MYZ"],
@@ -82,6 +140,14 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
             strain_buffer_size_in_mb=0,
             displ_buffer_size_in_mb=self.buffer_size_in_mb,
             read_on_demand=self.read_on_demand,
+            shared_buffers=self.shared_buffers,
+            buffer_policy=self.buffer_policy,
+            compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+            compressed_buffer_codec=self.compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=(
+                self.interpolation_buffer_size_in_mb
+            ),
+            memory_map=self.memory_map,
         )
         m4_m = mesh.Mesh(
             files["MXY_MXX_M_MYY"],
@@ -89,6 +155,14 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
             strain_buffer_size_in_mb=0,
             displ_buffer_size_in_mb=self.buffer_size_in_mb,
             read_on_demand=self.read_on_demand,
+            shared_buffers=self.shared_buffers,
+            buffer_policy=self.buffer_policy,
+            compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+            compressed_buffer_codec=self.compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=(
+                self.interpolation_buffer_size_in_mb
+            ),
+            memory_map=self.memory_map,
         )
         self.parsed_mesh = m1_m
 
@@ -106,22 +180,35 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
         # Collect data arrays and mu in a dictionary.
         data = {}
 
-        mesh = self.parsed_mesh.f["Mesh"]
-
-        # Get mu.
-        if not self.read_on_demand:
-            mesh_mu = self.parsed_mesh.mesh_mu
-        else:
-            mesh_mu = mesh["mesh_mu"]
-
-        npol = self.info.spatial_order
-        data["mu"] = mesh_mu[ei.gll_point_ids[npol // 2, npol // 2]]
+        data["mu"] = self._get_mu(element_info=ei)
 
         if not isinstance(source, Source):
             raise NotImplementedError
         if self.info.dump_type != "displ_only":
             raise NotImplementedError
 
+        fields = self._get_moment_tensor_fields(
+            components=components, element_info=ei
+        )
+        data.update(
+            self._contract_moment_tensor(
+                fields=fields,
+                tensor=source.tensor,
+                source=source,
+                receiver=receiver,
+                coordinates=coordinates,
+                components=components,
+            )
+        )
+
+        return data
+
+    def _get_moment_tensor_fields(self, components, element_info):
+        """
+        Get the displacements of the four moment tensor databases interpolated
+        to the receiver location.
+        """
+        ei = element_info
         displ_1 = self._get_displacement(
             self.meshes.m1,
             ei.id_elem,
@@ -159,68 +246,4 @@ class ForwardInstaseisDB(BaseNetCDFInstaseisDB):
             ei.eta,
         )
 
-        mij = source.tensor / self.parsed_mesh.amplitude
-        # mij is [m_rr, m_tt, m_pp, m_rt, m_rp, m_tp]
-        # final is in s, phi, z coordinates
-        final = np.zeros((displ_1.shape[0], 3), dtype="float64")
-
-        final[:, 0] += displ_1[:, 0] * mij[0]
-        final[:, 2] += displ_1[:, 2] * mij[0]
-
-        final[:, 0] += displ_2[:, 0] * (mij[1] + mij[2])
-        final[:, 2] += displ_2[:, 2] * (mij[1] + mij[2])
-
-        fac_1 = mij[3] * np.cos(coordinates.phi) + mij[4] * np.sin(
-            coordinates.phi
-        )
-        fac_2 = -mij[3] * np.sin(coordinates.phi) + mij[4] * np.cos(
-            coordinates.phi
-        )
-
-        final[:, 0] += displ_3[:, 0] * fac_1
-        final[:, 1] += displ_3[:, 1] * fac_2
-        final[:, 2] += displ_3[:, 2] * fac_1
-
-        fac_1 = (mij[1] - mij[2]) * np.cos(2 * coordinates.phi) + 2 * mij[
-            5
-        ] * np.sin(2 * coordinates.phi)
-        fac_2 = -(mij[1] - mij[2]) * np.sin(2 * coordinates.phi) + 2 * mij[
-            5
-        ] * np.cos(2 * coordinates.phi)
-
-        final[:, 0] += displ_4[:, 0] * fac_1
-        final[:, 1] += displ_4[:, 1] * fac_2
-        final[:, 2] += displ_4[:, 2] * fac_1
-
-        rotmesh_colat = np.arctan2(coordinates.s, coordinates.z)
-
-        if "T" in components:
-            # need the - for consistency with reciprocal mode,
-            # need external verification still
-            data["T"] = -final[:, 1]
-
-        if "R" in components:
-            data["R"] = final[:, 0] * np.cos(rotmesh_colat) - final[
-                :, 2
-            ] * np.sin(rotmesh_colat)
-
-        if "N" in components or "E" in components or "Z" in components:
-            # transpose needed because rotations assume different slicing
-            # (ugly)
-            final = rotations.rotate_vector_src_to_NEZ(
-                final.T,
-                coordinates.phi,
-                source.longitude_rad,
-                source.colatitude_rad,
-                receiver.longitude_rad,
-                receiver.colatitude_rad,
-            ).T
-
-            if "N" in components:
-                data["N"] = final[:, 0]
-            if "E" in components:
-                data["E"] = final[:, 1]
-            if "Z" in components:
-                data["Z"] = final[:, 2]
-
-        return data
+        return displ_1, displ_2, displ_3, displ_4
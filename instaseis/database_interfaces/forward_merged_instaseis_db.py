@@ -16,7 +16,7 @@ import numpy as np
 
 from .base_netcdf_instaseis_db import BaseNetCDFInstaseisDB
 from . import mesh
-from .. import rotations, spectral_basis
+from .. import spectral_basis
 from ..source import Source
 
 
@@ -25,12 +25,21 @@ class ForwardMergedInstaseisDB(BaseNetCDFInstaseisDB):
     Merged forward Instaseis database.
     """
 
+    # Class of the mesh of the merged file.
+    _mesh_class = mesh.Mesh
+
     def __init__(
         self,
         db_path,
         netcdf_file,
         buffer_size_in_mb=100,
         read_on_demand=False,
+        shared_buffers=False,
+        buffer_policy="lru",
+        compressed_buffer_size_in_mb=0,
+        compressed_buffer_codec="zlib",
+        interpolation_buffer_size_in_mb=0,
+        memory_map=True,
         *args,
         **kwargs,
     ):
@@ -50,12 +59,50 @@ class ForwardMergedInstaseisDB(BaseNetCDFInstaseisDB):
             initialization, faster in individual seismogram extraction,
             useful e.g. for finite sources, default).
         :type read_on_demand: bool, optional
+        :param shared_buffers: Keep the strain and displacement buffers in
+            shared memory so all processes forked after opening the database
+            share one buffer.
+        :type shared_buffers: bool, optional
+        :param buffer_policy: Determines which items are removed from the
+            buffers once they are full. One of ``"lru"`` (default),
+            ``"lfu"``, ``"arc"``, or ``"tinylfu"``. The latter two are scan
+            resistant, e.g. extracting a large finite source does not evict
+            frequently used elements.
+        :type buffer_policy: str, optional
+        :param compressed_buffer_size_in_mb: Size of a second buffer tier
+            per buffer. Items evicted from a buffer are stored there
+            compressed and are promoted back once they are needed again.
+            Disabled by default.
+        :type compressed_buffer_size_in_mb: int, optional
+        :param compressed_buffer_codec: How items are stored in the second
+            buffer tier. One of ``"zlib"`` (default), ``"lz4"``, or
+            ``"zstd"`` for lossless compression, ``"float32"`` to store them
+            in single precision, or a combination like ``"float32+lz4"``.
+            ``"lz4"`` and ``"zstd"`` require the lz4 and zstandard packages.
+        :type compressed_buffer_codec: str, optional
+        :param interpolation_buffer_size_in_mb: Buffer for the strain
+            interpolated to the source or receiver location. Speeds up
+            repeatedly requesting the same locations, e.g. a fixed set of
+            receivers for many sources. Disabled by default.
+        :type interpolation_buffer_size_in_mb: int, optional
+        :param memory_map: Read contiguous, uncompressed datasets through
+            memory maps of the database files instead of through HDF5. Reads
+            are then served from the page cache without copies and threads
+            do not serialize on the global HDF5 lock. All other datasets are
+            always read with HDF5.
+        :type memory_map: bool, optional
         """
         BaseNetCDFInstaseisDB.__init__(
             self,
             db_path=db_path,
             buffer_size_in_mb=buffer_size_in_mb,
             read_on_demand=read_on_demand,
+            shared_buffers=shared_buffers,
+            buffer_policy=buffer_policy,
+            compressed_buffer_size_in_mb=compressed_buffer_size_in_mb,
+            compressed_buffer_codec=compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=interpolation_buffer_size_in_mb,
+            memory_map=memory_map,
             *args,
             **kwargs,
         )
@@ -68,12 +115,20 @@ class ForwardMergedInstaseisDB(BaseNetCDFInstaseisDB):
         )
 
         self.meshes = MeshCollection_merged(
-            mesh.Mesh(
+            self._mesh_class(
                 filename,
                 full_parse=True,
                 strain_buffer_size_in_mb=self.buffer_size_in_mb,
                 displ_buffer_size_in_mb=self.buffer_size_in_mb,
                 read_on_demand=self.read_on_demand,
+                shared_buffers=self.shared_buffers,
+                buffer_policy=self.buffer_policy,
+                compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+                compressed_buffer_codec=self.compressed_buffer_codec,
+                interpolation_buffer_size_in_mb=(
+                    self.interpolation_buffer_size_in_mb
+                ),
+                memory_map=self.memory_map,
             )
         )
         self.parsed_mesh = self.meshes.merged
@@ -87,185 +142,71 @@ class ForwardMergedInstaseisDB(BaseNetCDFInstaseisDB):
         # Collect data arrays and mu in a dictionary.
         data = {}
 
-        mesh = self.parsed_mesh.f["Mesh"]
-
-        # Get mu.
-        if not self.read_on_demand:
-            mesh_mu = self.parsed_mesh.mesh_mu
-        else:
-            mesh_mu = mesh["mesh_mu"]
-
-        npol = self.info.spatial_order
-        data["mu"] = mesh_mu[ei.gll_point_ids[npol // 2, npol // 2]]
+        data["mu"] = self._get_mu(element_info=ei)
 
         if not isinstance(source, Source):
             raise NotImplementedError
         if self.info.dump_type != "displ_only":
             raise NotImplementedError
 
-        # Get from netcdf file or buffer.
-        if ei.id_elem not in self.parsed_mesh.displ_buffer:
-            utemp = self.meshes.merged.f["MergedSnapshots"][ei.id_elem]
+        fields = self._get_moment_tensor_fields(
+            components=components, element_info=ei
+        )
+        data.update(
+            self._contract_moment_tensor(
+                fields=fields,
+                tensor=source.tensor,
+                source=source,
+                receiver=receiver,
+                coordinates=coordinates,
+                components=components,
+            )
+        )
+
+        return data
+
+    def _get_moment_tensor_fields(self, components, element_info):
+        """
+        Get the displacements of the four moment tensor databases interpolated
+        to the receiver location.
+        """
+        ei = element_info
 
-            # utemp is currently (nvars, jpol, ipol, npts)
-            # 1. Roll to (npts, nvar, jpol, ipol)
-            utemp = np.rollaxis(utemp, 3, 0)
-            # 2. Roll to (npts, jpol, nvar, ipol)
-            utemp = np.rollaxis(utemp, 2, 1)
-            # 3. Roll to (npts, jpol, ipol, nvar)
-            utemp = np.rollaxis(utemp, 3, 2)
+        def _load():
+            # Already in the (npts, jpol, ipol, nvar) order of the compiled
+            # routines.
+            return self.meshes.merged.read_merged_element(ei.id_elem)
 
-            self.parsed_mesh.displ_buffer.add(ei.id_elem, utemp)
-        else:
-            utemp = self.parsed_mesh.displ_buffer.get(ei.id_elem)
+        # Get from netcdf file or buffer.
+        utemp = self.parsed_mesh.displ_buffer.get_or_load(ei.id_elem, _load)
+
+        # Interpolate all ten components in one go.
+        displ = spectral_basis.lagrange_interpol_2D_td_batch(
+            points1=ei.col_points_xi,
+            points2=ei.col_points_eta,
+            coefficients=utemp,
+            x1=ei.xi,
+            x2=ei.eta,
+        )
 
         displ_1 = np.zeros((utemp.shape[0], 3), order="F")
         displ_2 = np.zeros((utemp.shape[0], 3), order="F")
         displ_3 = np.zeros((utemp.shape[0], 3), order="F")
         displ_4 = np.zeros((utemp.shape[0], 3), order="F")
 
-        # Now just fill them all.
         # displ_1 is generated from MZZ which has only two displacement
         # components.
-        displ_1[:, 0] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 0],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        displ_1[:, 2] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 1],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
+        displ_1[:, 0] = displ[:, 0]
+        displ_1[:, 2] = displ[:, 1]
         # displ_2 is generated from MXX+MYY which has only two displacement
         # components.
-        displ_2[:, 0] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 2],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        displ_2[:, 2] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 3],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
+        displ_2[:, 0] = displ[:, 2]
+        displ_2[:, 2] = displ[:, 3]
         # displ_3 is generated from MXZ/MYZ which has three displacement
         # components.
-        displ_3[:, 0] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 4],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        displ_3[:, 1] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 5],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        displ_3[:, 2] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 6],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        # displ_3 is generated from MXY/MXX-MYY which has three displacement
+        displ_3[:, :] = displ[:, 4:7]
+        # displ_4 is generated from MXY/MXX-MYY which has three displacement
         # components.
-        displ_4[:, 0] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 7],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        displ_4[:, 1] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 8],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
-        displ_4[:, 2] = spectral_basis.lagrange_interpol_2D_td(
-            points1=ei.col_points_xi,
-            points2=ei.col_points_eta,
-            coefficients=utemp[:, :, :, 9],
-            x1=ei.xi,
-            x2=ei.eta,
-        )
+        displ_4[:, :] = displ[:, 7:10]
 
-        mij = source.tensor / self.parsed_mesh.amplitude
-        # mij is [m_rr, m_tt, m_pp, m_rt, m_rp, m_tp]
-        # final is in s, phi, z coordinates
-        final = np.zeros((displ_1.shape[0], 3), dtype="float64")
-
-        final[:, 0] += displ_1[:, 0] * mij[0]
-        final[:, 2] += displ_1[:, 2] * mij[0]
-
-        final[:, 0] += displ_2[:, 0] * (mij[1] + mij[2])
-        final[:, 2] += displ_2[:, 2] * (mij[1] + mij[2])
-
-        fac_1 = mij[3] * np.cos(coordinates.phi) + mij[4] * np.sin(
-            coordinates.phi
-        )
-        fac_2 = -mij[3] * np.sin(coordinates.phi) + mij[4] * np.cos(
-            coordinates.phi
-        )
-
-        final[:, 0] += displ_3[:, 0] * fac_1
-        final[:, 1] += displ_3[:, 1] * fac_2
-        final[:, 2] += displ_3[:, 2] * fac_1
-
-        fac_1 = (mij[1] - mij[2]) * np.cos(2 * coordinates.phi) + 2 * mij[
-            5
-        ] * np.sin(2 * coordinates.phi)
-        fac_2 = -(mij[1] - mij[2]) * np.sin(2 * coordinates.phi) + 2 * mij[
-            5
-        ] * np.cos(2 * coordinates.phi)
-
-        final[:, 0] += displ_4[:, 0] * fac_1
-        final[:, 1] += displ_4[:, 1] * fac_2
-        final[:, 2] += displ_4[:, 2] * fac_1
-
-        rotmesh_colat = np.arctan2(coordinates.s, coordinates.z)
-
-        if "T" in components:
-            # need the - for consistency with reciprocal mode,
-            # need external verification still
-            data["T"] = -final[:, 1]
-
-        if "R" in components:
-            data["R"] = final[:, 0] * np.cos(rotmesh_colat) - final[
-                :, 2
-            ] * np.sin(rotmesh_colat)
-
-        if "N" in components or "E" in components or "Z" in components:
-            # transpose needed because rotations assume different slicing
-            # (ugly)
-            final = rotations.rotate_vector_src_to_NEZ(
-                final.T,
-                coordinates.phi,
-                source.longitude_rad,
-                source.colatitude_rad,
-                receiver.longitude_rad,
-                receiver.colatitude_rad,
-            ).T
-
-            if "N" in components:
-                data["N"] = final[:, 0]
-            if "E" in components:
-                data["E"] = final[:, 1]
-            if "Z" in components:
-                data["Z"] = final[:, 2]
-
-        return data
+        return displ_1, displ_2, displ_3, displ_4
@@ -21,7 +21,16 @@ instead of
     GNU Lesser General Public License, Version 3 [non-commercial/academic use]
     (http://www.gnu.org/copyleft/lgpl.html)
 """
+import collections
 from collections import OrderedDict
+import json
+import mmap
+import multiprocessing
+import os
+import pickle
+import threading
+import warnings
+import zlib
 
 import h5py
 import numpy as np
@@ -29,36 +38,429 @@ from obspy import UTCDateTime
 from scipy.spatial import cKDTree
 
 
-class Buffer(object):
+# Version of the layout of the on-disk mesh index. Increase it whenever the
+# layout changes so old indices are no longer used.
+MESH_INDEX_VERSION = 2
+
+# Arrays stored in the mesh index for each dump type.
+MESH_INDEX_ARRAYS = {
+    "displ_only": [
+        "fem_mesh",
+        "eltype",
+        "mesh_S",
+        "mesh_Z",
+        "sem_mesh",
+        "axis",
+        "mesh_mu",
+    ],
+    "fullfields": ["mesh_mu"],
+    "strain_only": ["mesh_mu"],
+}
+
+
+class LRUPolicy(object):
+    """
+    Least recently used: evicts the item that has not been accessed for the
+    longest time.
+    """
+
+    def __init__(self):
+        self._keys = OrderedDict()
+
+    def insert(self, key):
+        self._keys[key] = None
+
+    def access(self, key):
+        self._keys.move_to_end(key)
+
+    def evict(self):
+        return self._keys.popitem(last=False)[0]
+
+
+class LFUPolicy(object):
+    """
+    Least frequently used: evicts the item with the fewest accesses. Ties are
+    broken by recency.
+    """
+
+    def __init__(self):
+        self._frequencies = {}
+        # All keys per frequency in order of their last access.
+        self._buckets = collections.defaultdict(OrderedDict)
+        self._min_frequency = 0
+
+    def _remove_from_bucket(self, key, frequency):
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+
+    def insert(self, key):
+        self._frequencies[key] = 1
+        self._buckets[1][key] = None
+        self._min_frequency = 1
+
+    def access(self, key):
+        frequency = self._frequencies[key]
+        self._remove_from_bucket(key, frequency)
+        if self._min_frequency == frequency and frequency not in self._buckets:
+            self._min_frequency = frequency + 1
+        self._frequencies[key] = frequency + 1
+        self._buckets[frequency + 1][key] = None
+
+    def evict(self):
+        key = next(iter(self._buckets[self._min_frequency]))
+        self._remove_from_bucket(key, self._min_frequency)
+        del self._frequencies[key]
+        if self._buckets:
+            self._min_frequency = min(self._buckets)
+        return key
+
+
+class ARCPolicy(object):
+    """
+    Adaptive replacement cache: balances between a list of items accessed
+    once (recency) and a list of items accessed more than once (frequency).
+    The balance adapts based on the recently evicted keys of both lists, and
+    a single scan over many items cannot flush the frequently used items.
+
+    As the buffers are limited by size and not by the number of items, the
+    current number of buffered items is used as the capacity.
+    """
+
+    def __init__(self):
+        self._t1 = OrderedDict()
+        self._t2 = OrderedDict()
+        # Ghost lists of keys recently evicted from t1 and t2.
+        self._b1 = OrderedDict()
+        self._b2 = OrderedDict()
+        self._p = 0.0
+        self._last_insert_in_b2 = False
+
+    def insert(self, key):
+        capacity = len(self._t1) + len(self._t2) + 1
+        self._last_insert_in_b2 = key in self._b2
+        if key in self._b1:
+            self._p = min(
+                capacity, self._p + max(len(self._b2) / len(self._b1), 1.0)
+            )
+            del self._b1[key]
+            self._t2[key] = None
+        elif key in self._b2:
+            self._p = max(
+                0.0, self._p - max(len(self._b1) / len(self._b2), 1.0)
+            )
+            del self._b2[key]
+            self._t2[key] = None
+        else:
+            self._t1[key] = None
+
+        for ghosts in (self._b1, self._b2):
+            while len(ghosts) > capacity:
+                ghosts.popitem(last=False)
+
+    def access(self, key):
+        if key in self._t1:
+            del self._t1[key]
+            self._t2[key] = None
+        else:
+            self._t2.move_to_end(key)
+
+    def evict(self):
+        if self._t1 and (
+            not self._t2
+            or len(self._t1) > self._p
+            or (self._last_insert_in_b2 and len(self._t1) == int(self._p))
+        ):
+            key = self._t1.popitem(last=False)[0]
+            self._b1[key] = None
+        else:
+            key = self._t2.popitem(last=False)[0]
+            self._b2[key] = None
+        return key
+
+
+class TinyLFUPolicy(object):
+    """
+    Window TinyLFU: new items enter a small LRU window and then a segmented
+    LRU main area. Once the buffer is full, items leaving the window are
+    only admitted to the main area if they have been accessed more often
+    than the item they would replace. Access frequencies are estimated with
+    a periodically aged count-min sketch. A scan over many items thus cannot
+    flush the frequently used items.
+
+    :param window_fraction: Fraction of the items in the window.
+    :param protected_fraction: Fraction of the main area for items accessed
+        more than once.
+    :param sketch_width: Number of counters per row of the sketch.
+    """
+
+    _SKETCH_DEPTH = 4
+
+    def __init__(
+        self, window_fraction=0.01, protected_fraction=0.8, sketch_width=4096
+    ):
+        self._window_fraction = window_fraction
+        self._protected_fraction = protected_fraction
+        self._sketch_width = sketch_width
+        self._sketch = [[0] * sketch_width for _ in range(self._SKETCH_DEPTH)]
+        self._sample_size = 10 * sketch_width
+        self._n_increments = 0
+
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        # Items that lost the admission and are evicted first.
+        self._rejected = OrderedDict()
+        self._full = False
+
+    def _sketch_indices(self, key):
+        for row in range(self._SKETCH_DEPTH):
+            yield row, hash((row, key)) % self._sketch_width
+
+    def _record(self, key):
+        for row, index in self._sketch_indices(key):
+            self._sketch[row][index] = min(self._sketch[row][index] + 1, 255)
+        self._n_increments += 1
+        # Age the sketch so it follows changing workloads.
+        if self._n_increments >= self._sample_size:
+            self._sketch = [[_i // 2 for _i in row] for row in self._sketch]
+            self._n_increments //= 2
+
+    def _frequency(self, key):
+        return min(
+            self._sketch[row][i] for row, i in self._sketch_indices(key)
+        )
+
+    def _main_victim(self):
+        segment = self._probation if self._probation else self._protected
+        return segment, next(iter(segment)) if segment else None
+
+    def insert(self, key):
+        self._record(key)
+        self._window[key] = None
+
+        n_items = (
+            len(self._window)
+            + len(self._probation)
+            + len(self._protected)
+            + len(self._rejected)
+        )
+        if len(self._window) <= max(1, int(self._window_fraction * n_items)):
+            return
+
+        candidate = self._window.popitem(last=False)[0]
+        segment, victim = self._main_victim()
+        if not self._full or victim is None:
+            self._probation[candidate] = None
+        elif self._frequency(candidate) > self._frequency(victim):
+            del segment[victim]
+            self._rejected[victim] = None
+            self._probation[candidate] = None
+        else:
+            self._rejected[candidate] = None
+
+    def access(self, key):
+        self._record(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._rejected:
+            del self._rejected[key]
+            self._probation[key] = None
+        else:
+            del self._probation[key]
+            self._protected[key] = None
+            n_main = len(self._probation) + len(self._protected)
+            if len(self._protected) > self._protected_fraction * n_main:
+                demoted = self._protected.popitem(last=False)[0]
+                self._probation[demoted] = None
+
+    def evict(self):
+        self._full = True
+        if self._rejected:
+            return self._rejected.popitem(last=False)[0]
+
+        segment, victim = self._main_victim()
+        if self._window and (
+            victim is None
+            or self._frequency(victim)
+            > self._frequency(next(iter(self._window)))
+        ):
+            return self._window.popitem(last=False)[0]
+        del segment[victim]
+        return victim
+
+
+BUFFER_POLICIES = {
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy,
+    "arc": ARCPolicy,
+    "tinylfu": TinyLFUPolicy,
+}
+
+
+class _Flight(object):
+    """
+    An item currently being loaded by one thread.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.loaded = False
+        self.value = None
+
+
+class _SingleFlightMixin(object):
+    """
+    Adds get_or_load() to a buffer. Classes using it must implement
+    _lookup(), _is_buffered(), and add() and initialize
+    _init_single_flight().
+    """
+
+    def _init_single_flight(self):
+        self._loading_lock = threading.Lock()
+        self._loading = {}
+
+    def get_or_load(self, key, load):
+        """
+        Return an item from the buffer. If it is not buffered, it is loaded
+        by calling ``load()`` and added to the buffer.
+
+        Concurrent calls for the same missing key only call ``load()`` once.
+        The other threads wait for and then share its result. Items that
+        are buffered are returned without taking the lock of the loads.
+        """
+        while True:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            with self._loading_lock:
+                flight = self._loading.get(key)
+                if flight is None:
+                    # Loaded by another thread since the lookup. Items are
+                    # added before their load is unregistered.
+                    if self._is_buffered(key):
+                        continue
+                    flight = _Flight()
+                    self._loading[key] = flight
+                    break
+            # Another thread is loading the item - wait for it. If it failed,
+            # try again.
+            flight.event.wait()
+            if flight.loaded:
+                return flight.value
+
+        try:
+            flight.value = load()
+            flight.loaded = True
+            self.add(key, flight.value)
+        finally:
+            with self._loading_lock:
+                del self._loading[key]
+            flight.event.set()
+        return flight.value
+
+
+class Buffer(_SingleFlightMixin):
     """
     A simple memory-limited buffer with a dictionary-like interface.
-    Implemented as a kind of priority queue where priority is highest for
-    recently accessed items. Thus the "stalest" items are removed first once
-    the memory limit it reached.
+
+    Once the memory limit is reached, items are removed as chosen by the
+    buffer policy:
+
+    * ``"lru"``: The "stalest" items are removed first (default).
+    * ``"lfu"``: The least frequently used items are removed first.
+    * ``"arc"``: Adaptive replacement cache - scan-resistant.
+    * ``"tinylfu"``: Window TinyLFU - scan-resistant.
+
+    Evicted items are moved to the ``second_tier`` buffer if one is given,
+    usually a :class:`CompressedBuffer`. Items found there are promoted back
+    to this buffer.
+
+    All methods are thread-safe. Use :meth:`get_or_load` to make sure
+    missing items are only loaded once if requested by several threads at
+    the same time.
     """
 
-    def __init__(self, max_size_in_mb=100):
+    def __init__(self, max_size_in_mb=100, policy="lru", second_tier=None):
+        if policy not in BUFFER_POLICIES:
+            raise ValueError(
+                "Unknown buffer policy '%s'. Available policies: %s."
+                % (policy, ", ".join(sorted(BUFFER_POLICIES)))
+            )
         self._max_size_in_bytes = max_size_in_mb * 1024 ** 2
         self._total_size = 0
-        self._buffer = OrderedDict()
+        self._buffer = {}
+        self._policy = BUFFER_POLICIES[policy]()
         self._hits = 0
         self._fails = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._init_single_flight()
+        self.second_tier = second_tier
+
+    def _find(self, key, count, access):
+        """
+        Look up an item. Returns a tuple of whether it has been found, the
+        item and whether it is still in its stored (wrapped) form. Items only
+        found in the second tier are promoted back to this buffer.
+        """
+        with self._lock:
+            found = key in self._buffer
+            if count:
+                if found:
+                    self._hits += 1
+                else:
+                    self._fails += 1
+            if found:
+                if access:
+                    self._policy.access(key)
+                return True, self._buffer[key], True
+
+        if self.second_tier is None:
+            return False, None, False
+        found, value = self.second_tier._lookup(key)
+        if not found:
+            return False, None, False
+        self.add(key, value)
+        return True, value, False
 
     def __contains__(self, key):
-        contains = key in self._buffer
-        if contains:
-            self._hits += 1
-        else:
-            self._fails += 1
-        return contains
+        return self._find(key, count=True, access=False)[0]
+
+    def _is_buffered(self, key):
+        # Cheap check without statistics, policy updates, or second tier.
+        with self._lock:
+            return key in self._buffer
 
     def get(self, key):
         """
-        Return an item from the buffer and move it to the end, so it is removed
-        last.
+        Return an item from the buffer and let the policy know it has been
+        accessed.
+        """
+        found, value, wrapped = self._find(key, count=False, access=True)
+        if not found:
+            raise KeyError(key)
+        return self._unwrap(value) if wrapped else value
+
+    def _lookup(self, key):
+        """
+        Combined __contains__() and get(). Returns a tuple of whether the
+        item has been found and the item.
         """
-        value = self._buffer.pop(key)
-        self._buffer[key] = value
+        found, value, wrapped = self._find(key, count=True, access=True)
+        if not found:
+            return False, None
+        return True, self._unwrap(value) if wrapped else value
+
+    def _wrap(self, value):
+        # Hook to transform items before they are stored.
+        return value
+
+    def _unwrap(self, value):
+        # Inverse of _wrap().
         return value
 
     def _get_nbytes(self, value):
@@ -73,18 +475,62 @@ class Buffer(object):
         Add an item to the buffer and make sure that the buffer does not exceed
         the maximum size in memory.
         """
-        self._buffer[key] = value
-        # Assuming value is a numpy array
-        self._total_size += self._get_nbytes(value)
+        value = self._wrap(value)
+        nbytes = self._get_nbytes(value)
+        evicted = []
+        with self._lock:
+            if key in self._buffer:
+                self._total_size -= self._get_nbytes(self._buffer[key])
+                self._policy.access(key)
+            else:
+                self._policy.insert(key)
+            self._buffer[key] = value
+            self._total_size += nbytes
+
+            # Remove existing values, until the size limit is fulfilled.
+            while self._total_size > self._max_size_in_bytes:
+                k = self._policy.evict()
+                v = self._buffer.pop(k)
+                self._total_size -= self._get_nbytes(v)
+                self._evictions += 1
+                evicted.append((k, v))
 
-        # Remove existing values, until the size limit is fulfilled.
-        while self._total_size > self._max_size_in_bytes:
-            _, v = self._buffer.popitem(last=False)
-            self._total_size -= self._get_nbytes(v)
+        # Outside of the lock as the second tier might be slow.
+        if self.second_tier is not None:
+            for k, v in evicted:
+                self.second_tier.add(k, self._unwrap(v))
 
     def get_size_mb(self):
         return float(self._total_size) / 1024 ** 2
 
+    @property
+    def enabled(self):
+        """
+        False if the buffer can never hold any items.
+        """
+        return bool(self._max_size_in_bytes) or self.second_tier is not None
+
+    @property
+    def hits(self):
+        """
+        Number of calls to the __contains__() routine that returned True.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Number of calls to the __contains__() routine that returned False.
+        """
+        return self._fails
+
+    @property
+    def evictions(self):
+        """
+        Number of items removed to stay within the memory limit.
+        """
+        return self._evictions
+
     @property
     def efficiency(self):
         """
@@ -97,6 +543,488 @@ class Buffer(object):
             return float(self._hits) / float(self._hits + self._fails)
 
 
+def _get_compressor(name):
+    """
+    Return the compress and decompress functions of a compressor. lz4 and
+    zstd require the optional lz4 and zstandard packages.
+    """
+    if name == "zlib":
+        return (lambda data: zlib.compress(data, 1)), zlib.decompress
+    elif name == "lz4":
+        try:
+            import lz4.frame
+        except ImportError:  # pragma: no cover
+            raise ValueError("The 'lz4' codec requires the lz4 package.")
+        return lz4.frame.compress, lz4.frame.decompress
+    elif name == "zstd":
+        try:
+            import zstandard
+        except ImportError:  # pragma: no cover
+            raise ValueError(
+                "The 'zstd' codec requires the zstandard package."
+            )
+        compressor = zstandard.ZstdCompressor(level=1)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress
+    raise NotImplementedError  # pragma: no cover
+
+
+class _CompressedItem(object):
+    """
+    The encoded arrays of an item in a :class:`CompressedBuffer`.
+    """
+
+    def __init__(self, arrays, is_tuple):
+        self.arrays = arrays
+        self.is_tuple = is_tuple
+        self.nbytes = sum(len(_i[0]) for _i in arrays if _i is not None)
+
+
+class CompressedBuffer(Buffer):
+    """
+    A :class:`Buffer` storing its arrays compressed and/or in single
+    precision. Slower than a plain buffer, but several times more items fit
+    into the same amount of memory so it works well as the second tier of a
+    buffer.
+
+    :param codec: Any of ``"zlib"``, ``"lz4"``, and ``"zstd"`` for lossless
+        compression, ``"float32"`` to store double precision arrays in single
+        precision, or a combination like ``"float32+zlib"``.
+    :type codec: str
+    """
+
+    CODECS = ["float32", "lz4", "zlib", "zstd"]
+
+    def __init__(self, max_size_in_mb=100, codec="zlib", policy="lru"):
+        parts = codec.split("+")
+        compressors = [_i for _i in parts if _i != "float32"]
+        if (
+            any(_i not in self.CODECS for _i in parts)
+            or len(set(parts)) != len(parts)
+            or len(compressors) > 1
+        ):
+            raise ValueError(
+                "Unknown codec '%s'. Available codecs: %s, optionally "
+                "combined with float32 as in 'float32+zlib'."
+                % (codec, ", ".join(self.CODECS))
+            )
+        self.codec = codec
+        self._single_precision = "float32" in parts
+        if compressors:
+            self._compress, self._decompress = _get_compressor(compressors[0])
+        else:
+            self._compress = self._decompress = None
+        Buffer.__init__(self, max_size_in_mb=max_size_in_mb, policy=policy)
+
+    def _encode_array(self, array):
+        # Arrays are stored C-ordered, Fortran ordered ones as their
+        # transpose.
+        transposed = array.ndim > 1 and array.flags.f_contiguous
+        data = array.T if transposed else np.ascontiguousarray(array)
+        if self._single_precision and data.dtype == np.float64:
+            data = data.astype(np.float32)
+        # Grouping the n-th bytes of all values - e.g. the exponents -
+        # makes floating point data much more compressible.
+        encoded = (
+            np.ascontiguousarray(data)
+            .view(np.uint8)
+            .reshape(-1, data.itemsize)
+            .T.tobytes()
+        )
+        if self._compress is not None:
+            encoded = self._compress(encoded)
+        return encoded, data.dtype, data.shape, array.dtype, transposed
+
+    def _decode_array(self, encoded):
+        data, stored_dtype, shape, dtype, transposed = encoded
+        if self._decompress is not None:
+            data = self._decompress(data)
+        array = (
+            np.frombuffer(data, dtype=np.uint8)
+            .reshape(stored_dtype.itemsize, -1)
+            .T.copy()
+            .view(stored_dtype)
+            .reshape(shape)
+            .astype(dtype, copy=False)
+        )
+        return array.T if transposed else array
+
+    def _wrap(self, value):
+        is_tuple = isinstance(value, tuple)
+        arrays = value if is_tuple else (value,)
+        return _CompressedItem(
+            [None if _i is None else self._encode_array(_i) for _i in arrays],
+            is_tuple=is_tuple,
+        )
+
+    def _unwrap(self, value):
+        arrays = tuple(
+            None if _i is None else self._decode_array(_i)
+            for _i in value.arrays
+        )
+        return arrays if value.is_tuple else arrays[0]
+
+
+class SharedBuffer(_SingleFlightMixin):
+    """
+    A memory-limited buffer with the same interface as :class:`Buffer` whose
+    items live in shared memory.
+
+    All processes forked after the buffer has been created see the same
+    items and the least recently used item across all of them is removed
+    first once the memory limit is reached. Keys must be integers and all
+    values of a buffer are expected to have the same size - the memory is
+    split into equally sized slots when the first item is added. Larger
+    items are not buffered, they are counted in :attr:`rejections` and a
+    warning is raised for the first of them.
+
+    The slots of the keys are found with a hash table using open addressing
+    with linear probing that has twice as many buckets as there are slots.
+    """
+
+    # Indices into the shared header.
+    (
+        _SLOT_SIZE,
+        _N_SLOTS,
+        _CLOCK,
+        _HITS,
+        _FAILS,
+        _EVICTIONS,
+        _REJECTIONS,
+        _DELETED,
+    ) = range(8)
+    _HEADER_LENGTH = 8
+
+    # Markers of buckets of the hash table not pointing to a slot.
+    _EMPTY_BUCKET = -1
+    _DELETED_BUCKET = -2
+
+    def __init__(self, max_size_in_mb=100, max_items=65536):
+        self._max_size_in_bytes = int(max_size_in_mb * 1024 ** 2)
+        self._max_items = int(max_items)
+        self._lock = multiprocessing.Lock()
+
+        # Header, a slot table with key, last use and size of each item, the
+        # hash table of the slots, and finally the actual data. An anonymous
+        # mmap is shared with all forked child processes.
+        int_size = np.dtype(np.int64).itemsize
+        n_buckets = 2 * max(self._max_items, 1)
+        n = self._HEADER_LENGTH + 3 * self._max_items + n_buckets
+        self._mmap = mmap.mmap(-1, n * int_size + self._max_size_in_bytes)
+
+        self._header = np.frombuffer(
+            self._mmap, dtype=np.int64, count=self._HEADER_LENGTH
+        )
+        table = np.frombuffer(
+            self._mmap,
+            dtype=np.int64,
+            count=3 * self._max_items,
+            offset=self._HEADER_LENGTH * int_size,
+        ).reshape(3, self._max_items)
+        self._keys, self._last_used, self._nbytes = table
+        self._buckets = np.frombuffer(
+            self._mmap,
+            dtype=np.int64,
+            count=n_buckets,
+            offset=(self._HEADER_LENGTH + 3 * self._max_items) * int_size,
+        )
+        self._data = np.frombuffer(
+            self._mmap, dtype=np.uint8, offset=n * int_size
+        )
+
+        self._keys[:] = -1
+        self._last_used[:] = -1
+        self._buckets[:] = self._EMPTY_BUCKET
+
+        # Items found by __contains__() so get() is guaranteed to return
+        # them even if another process removed them in the meanwhile.
+        self._found = {}
+        self._init_single_flight()
+        self._warned_about_rejection = False
+
+    def _probe(self, key):
+        """
+        Yield the buckets of the hash table in the order they are probed for
+        a key.
+        """
+        n_buckets = len(self._buckets)
+        bucket = hash(key) % n_buckets
+        for _ in range(n_buckets):
+            yield bucket
+            bucket = (bucket + 1) % n_buckets
+
+    def _find_bucket(self, key):
+        """
+        The bucket of the hash table pointing to the slot of a key or -1.
+        """
+        for bucket in self._probe(key):
+            slot = self._buckets[bucket]
+            if slot == self._EMPTY_BUCKET:
+                break
+            if slot >= 0 and self._keys[slot] == key:
+                return bucket
+        return -1
+
+    def _find_slot(self, key):
+        bucket = self._find_bucket(key)
+        return int(self._buckets[bucket]) if bucket >= 0 else -1
+
+    def _insert_slot(self, slot):
+        """
+        Point the first free bucket along the probe sequence of the key of a
+        slot to the slot.
+        """
+        for bucket in self._probe(int(self._keys[slot])):
+            if self._buckets[bucket] < 0:
+                if self._buckets[bucket] == self._DELETED_BUCKET:
+                    self._header[self._DELETED] -= 1
+                self._buckets[bucket] = slot
+                return
+
+    def _remove_key(self, key):
+        """
+        Remove a key from the hash table. Its bucket is only marked as
+        deleted so probe sequences passing it stay intact.
+        """
+        bucket = self._find_bucket(key)
+        if bucket >= 0:
+            self._buckets[bucket] = self._DELETED_BUCKET
+            self._header[self._DELETED] += 1
+
+    def _rebuild_buckets(self):
+        """
+        Rebuild the hash table without the buckets marked as deleted.
+        """
+        self._buckets[:] = self._EMPTY_BUCKET
+        self._header[self._DELETED] = 0
+        for slot in np.flatnonzero(self._keys != -1):
+            self._insert_slot(slot)
+
+    def _read(self, key, count=False):
+        """
+        Copy the serialized item out of the shared memory. Returns None if
+        the item is not in the buffer.
+        """
+        with self._lock:
+            slot = self._find_slot(key)
+            if slot < 0:
+                if count:
+                    self._header[self._FAILS] += 1
+                return None
+            if count:
+                self._header[self._HITS] += 1
+            self._header[self._CLOCK] += 1
+            self._last_used[slot] = self._header[self._CLOCK]
+            start = slot * self._header[self._SLOT_SIZE]
+            end = start + self._nbytes[slot]
+            return self._data[start:end].tobytes()
+
+    def _is_buffered(self, key):
+        with self._lock:
+            return self._find_slot(int(key)) >= 0
+
+    def __contains__(self, key):
+        data = self._read(int(key), count=True)
+        if data is None:
+            return False
+        self._found[int(key)] = data
+        return True
+
+    def _lookup(self, key):
+        """
+        Combined __contains__() and get(). Returns a tuple of whether the
+        item has been found and a copy of the item.
+        """
+        data = self._read(int(key), count=True)
+        if data is None:
+            return False, None
+        return True, pickle.loads(data)
+
+    def get(self, key):
+        """
+        Return a copy of an item from the buffer.
+        """
+        data = self._found.pop(int(key), None)
+        if data is None:
+            data = self._read(int(key))
+            if data is None:
+                raise KeyError(key)
+        return pickle.loads(data)
+
+    def add(self, key, value):
+        """
+        Add an item to the buffer, replacing the least recently used item if
+        necessary.
+
+        Items larger than the slot size are not buffered but counted as
+        rejected.
+        """
+        key = int(key)
+        data = np.frombuffer(
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            dtype=np.uint8,
+        )
+        with self._lock:
+            header = self._header
+            if header[self._SLOT_SIZE] == 0 and len(data):
+                header[self._SLOT_SIZE] = len(data)
+                header[self._N_SLOTS] = min(
+                    self._max_items, self._max_size_in_bytes // len(data)
+                )
+            n_slots = header[self._N_SLOTS]
+            if not n_slots:
+                return
+            slot_size = int(header[self._SLOT_SIZE])
+            rejected = len(data) > slot_size
+            if rejected:
+                header[self._REJECTIONS] += 1
+            else:
+                slot = self._find_slot(key)
+                if slot < 0:
+                    # Empty slots are used first.
+                    slot = int(np.argmin(self._last_used[:n_slots]))
+                    if self._keys[slot] != -1:
+                        header[self._EVICTIONS] += 1
+                        self._remove_key(int(self._keys[slot]))
+                    self._keys[slot] = key
+                    self._insert_slot(slot)
+                    # Long runs of deleted buckets slow down the probing.
+                    if header[self._DELETED] > len(self._buckets) // 4:
+                        self._rebuild_buckets()
+
+                start = slot * slot_size
+                end = start + len(data)
+                self._data[start:end] = data
+                header[self._CLOCK] += 1
+                self._last_used[slot] = header[self._CLOCK]
+                self._nbytes[slot] = len(data)
+
+        if rejected and not self._warned_about_rejection:
+            self._warned_about_rejection = True
+            warnings.warn(
+                "Item of %i bytes is larger than the slots of %i bytes of "
+                "the shared buffer and is not buffered. Further items that "
+                "are too large are only counted." % (len(data), slot_size)
+            )
+
+    def get_size_mb(self):
+        n_slots = self._header[self._N_SLOTS]
+        return float(self._nbytes[:n_slots].sum()) / 1024 ** 2
+
+    @property
+    def enabled(self):
+        """
+        False if the buffer can never hold any items.
+        """
+        return bool(self._max_size_in_bytes)
+
+    @property
+    def hits(self):
+        """
+        Number of calls to the __contains__() routine that returned True
+        across all processes.
+        """
+        return int(self._header[self._HITS])
+
+    @property
+    def misses(self):
+        """
+        Number of calls to the __contains__() routine that returned False
+        across all processes.
+        """
+        return int(self._header[self._FAILS])
+
+    @property
+    def evictions(self):
+        """
+        Number of items removed to stay within the memory limit across all
+        processes.
+        """
+        return int(self._header[self._EVICTIONS])
+
+    @property
+    def rejections(self):
+        """
+        Number of items not buffered because they are larger than the slots
+        across all processes.
+        """
+        return int(self._header[self._REJECTIONS])
+
+    @property
+    def efficiency(self):
+        """
+        Return the fraction of calls to the __contains__() routine that
+        returned True across all processes.
+        """
+        hits = self._header[self._HITS]
+        fails = self._header[self._FAILS]
+        if (hits + fails) == 0:
+            return 0.0
+        else:
+            return float(hits) / float(hits + fails)
+
+
+class ReuseWindow(object):
+    """
+    Tracks the last requested keys and how many of them had already been
+    requested before within this window.
+
+    Unlike the hit rate of a buffer this does not depend on what the buffer
+    holds and only covers recent requests, so it recovers as soon as keys
+    are requested repeatedly again. All methods are thread-safe.
+    """
+
+    def __init__(self, size=1000):
+        self._size = size
+        self._keys = collections.deque()
+        self._counts = collections.Counter()
+        self._n_reused = 0
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        """
+        Record a request for a key.
+        """
+        with self._lock:
+            reused = bool(self._counts[key])
+            self._keys.append((key, reused))
+            self._counts[key] += 1
+            self._n_reused += reused
+            if len(self._keys) > self._size:
+                old_key, old_reused = self._keys.popleft()
+                self._counts[old_key] -= 1
+                if not self._counts[old_key]:
+                    del self._counts[old_key]
+                self._n_reused -= old_reused
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def reuse_rate(self):
+        """
+        Fraction of the requests in the window for keys already requested
+        earlier in the window.
+        """
+        with self._lock:
+            if not self._keys:
+                return 0.0
+            return float(self._n_reused) / len(self._keys)
+
+
+def build_kdtree(points):
+    """
+    Build the kd-tree of the points of a mesh.
+
+    Splitting the nodes at their midpoint instead of the median and not
+    shrinking them to the points they contain builds the tree about twice
+    as fast for large meshes while queries are just as fast.
+    """
+    return cKDTree(
+        data=points, balanced_tree=False, compact_nodes=False, copy_data=False
+    )
+
+
 def get_time_axis(ds, ndumps):
     """
     Helper function to determine the time axis of the mesh.
@@ -133,14 +1061,172 @@ class Mesh(object):
         strain_buffer_size_in_mb=0,
         displ_buffer_size_in_mb=0,
         read_on_demand=True,
+        shared_buffers=False,
+        buffer_policy="lru",
+        compressed_buffer_size_in_mb=0,
+        compressed_buffer_codec="zlib",
+        interpolation_buffer_size_in_mb=0,
+        memory_map=False,
     ):
-        self.f = h5py.File(filename, "r")
         self.filename = filename
         self.read_on_demand = read_on_demand
+        self.memory_map = memory_map
+        self.f = self._open(filename)
+        # Memory maps of datasets by name. None for datasets that cannot be
+        # mapped.
+        self._memory_maps = {}
         self._parse(full_parse=full_parse)
         self._find_time_axis()
-        self.strain_buffer = Buffer(strain_buffer_size_in_mb)
-        self.displ_buffer = Buffer(displ_buffer_size_in_mb)
+        if shared_buffers:
+            if buffer_policy != "lru":
+                raise ValueError(
+                    "Shared buffers only support the 'lru' buffer policy."
+                )
+            if compressed_buffer_size_in_mb:
+                raise ValueError(
+                    "Shared buffers cannot be combined with a compressed "
+                    "buffer."
+                )
+            self.strain_buffer = SharedBuffer(strain_buffer_size_in_mb)
+            self.displ_buffer = SharedBuffer(displ_buffer_size_in_mb)
+        else:
+            self.strain_buffer = Buffer(
+                strain_buffer_size_in_mb,
+                policy=buffer_policy,
+                second_tier=self._get_compressed_buffer(
+                    compressed_buffer_size_in_mb,
+                    compressed_buffer_codec,
+                    buffer_policy,
+                ),
+            )
+            self.displ_buffer = Buffer(
+                displ_buffer_size_in_mb,
+                policy=buffer_policy,
+                second_tier=self._get_compressed_buffer(
+                    compressed_buffer_size_in_mb,
+                    compressed_buffer_codec,
+                    buffer_policy,
+                ),
+            )
+
+        # Interpolated traces keyed by (id_elem, xi, eta). Always local to
+        # the process as the keys are not integers.
+        self.interp_buffer = Buffer(
+            interpolation_buffer_size_in_mb, policy=buffer_policy
+        )
+
+        # Recently requested elements to decide whether buffering the strain
+        # of whole elements pays off.
+        self.strain_requests = ReuseWindow()
+
+    @staticmethod
+    def _get_compressed_buffer(size_in_mb, codec, policy):
+        if not size_in_mb:
+            return None
+        return CompressedBuffer(size_in_mb, codec=codec, policy=policy)
+
+    def _open(self, filename):
+        return h5py.File(filename, "r")
+
+    def reopen(self):
+        """
+        Open the file again, e.g. in a forked child process which should
+        not share the HDF5 file handle with its parent. The kdtree, the mesh
+        arrays and the buffers are kept.
+        """
+        self.f = self._open(self.filename)
+        for name, value in list(vars(self).items()):
+            if isinstance(value, h5py.Dataset):
+                setattr(self, name, self.f[value.name])
+
+    def get_dataset(self, name):
+        """
+        Get a dataset of the file, e.g. ``"Snapshots/disp_s"``.
+
+        Contiguous datasets are returned as read-only memory maps if memory
+        mapping is enabled, all others as HDF5 datasets. Both can be sliced
+        in the same way.
+        """
+        try:
+            memory_map = self._memory_maps[name]
+        except KeyError:
+            memory_map = None
+            if self.memory_map:
+                memory_map = self._get_memory_map(self.f[name])
+            self._memory_maps[name] = memory_map
+        if memory_map is None:
+            return self.f[name]
+        return memory_map
+
+    def _get_memory_map(self, dataset):
+        """
+        Map a dataset into memory. Returns None if not possible.
+        """
+        # Only contiguous (and thus also uncompressed) datasets are stored in
+        # a single block at a fixed offset in the file.
+        if (
+            self.f.driver != "sec2"
+            or dataset.chunks is not None
+            or dataset.external
+            or dataset.dtype.kind not in "fiu"
+            or not dataset.size
+        ):
+            return None
+        offset = dataset.id.get_offset()
+        if offset is None:
+            return None
+
+        memory_map = np.memmap(
+            self.filename,
+            dtype=dataset.dtype,
+            mode="r",
+            offset=offset,
+            shape=dataset.shape,
+        )
+        # Sanity check - fall back to HDF5 if anything is not accounted for.
+        for idx in [(0,) * dataset.ndim, (-1,) * dataset.ndim]:
+            if memory_map[idx] != dataset[idx]:
+                return None
+        return memory_map
+
+    @property
+    def merged_shape(self):
+        """
+        Shape of the data of a merged database:
+        ``(nelem, nvar, jpol, ipol, npts)``.
+        """
+        return self.f["MergedSnapshots"].shape
+
+    def read_merged_element(self, id_elem, dtype=None):
+        """
+        Read the displacement at all GLL points of an element of a merged
+        database.
+
+        The data is read straight into a buffer of the requested type, or
+        directly taken from the memory map of the file, and then reordered
+        once, so all components are Fortran-ordered and can be passed to the
+        compiled routines without any further copies.
+
+        :param id_elem: The element id.
+        :param dtype: The data type of the returned array. Defaults to the
+            type in the file.
+        :returns: An array with the shape ``(npts, jpol, ipol, nvar)``.
+        """
+        dataset = self.get_dataset("MergedSnapshots")
+        # (nvar, jpol, ipol, npts) in the file.
+        shape = dataset.shape[1:]
+        dtype = np.dtype(dtype or dataset.dtype).newbyteorder("=")
+        if isinstance(dataset, np.memmap):
+            buf = dataset[id_elem]
+        else:
+            buf = np.empty(shape, dtype=dtype)
+            dataset.read_direct(buf, source_sel=np.s_[id_elem])
+
+        utemp = np.empty(
+            (shape[3], shape[1], shape[2], shape[0]), dtype=dtype, order="F"
+        )
+        utemp[...] = buf.transpose(3, 1, 2, 0)
+        return utemp
 
     def _get_str_attr(self, name):
         attr = self.f.attrs[name]
@@ -302,38 +1388,145 @@ class Mesh(object):
             self.s_mp = self.f["Mesh"]["mp_mesh_S"]
             self.z_mp = self.f["Mesh"]["mp_mesh_Z"]
 
-            self.mesh = np.empty(
-                (self.s_mp.shape[0], 2), dtype=self.s_mp.dtype
-            )
-            self.mesh[:, 0] = self.s_mp[:]
-            self.mesh[:, 1] = self.z_mp[:]
+            self.mesh = self._read_index()
+            if self.mesh is None:
+                self.mesh = np.empty(
+                    (self.s_mp.shape[0], 2), dtype=self.s_mp.dtype
+                )
+                self.mesh[:, 0] = self.s_mp[:]
+                self.mesh[:, 1] = self.z_mp[:]
 
-            self.kdtree = cKDTree(data=self.mesh)
+            self.kdtree = build_kdtree(self.mesh)
 
             # Store some more index types in memory. While this increases
             # memory use it should be acceptable and result in much less netCDF
             # reads.
             if not self.read_on_demand:
-                self.fem_mesh = self.f["Mesh"]["fem_mesh"][:]
-                self.eltypes = self.f["Mesh"]["eltype"][:]
-                self.mesh_S = self.f["Mesh"]["mesh_S"][:]
-                self.mesh_Z = self.f["Mesh"]["mesh_Z"][:]
-                self.sem_mesh = self.f["Mesh"]["sem_mesh"][:]
-                self.axis = self.f["Mesh"]["axis"][:]
-                self.mesh_mu = self.f["Mesh"]["mesh_mu"][:]
+                self.fem_mesh = self._read_mesh_array("fem_mesh")
+                self.eltypes = self._read_mesh_array("eltype")
+                self.mesh_S = self._read_mesh_array("mesh_S")
+                self.mesh_Z = self._read_mesh_array("mesh_Z")
+                self.sem_mesh = self._read_mesh_array("sem_mesh")
+                self.axis = self._read_mesh_array("axis")
+                self.mesh_mu = self._read_mesh_array("mesh_mu")
 
         elif self.dump_type == "fullfields" or self.dump_type == "strain_only":
             # Build a kdtree of the stored gll points.
             self.mesh_S = self.f["Mesh"]["mesh_S"]
             self.mesh_Z = self.f["Mesh"]["mesh_Z"]
 
-            self.mesh = np.empty(
-                (self.mesh_S.shape[0], 2), dtype=self.mesh_S.dtype
-            )
-            self.mesh[:, 0] = self.mesh_S[:]
-            self.mesh[:, 1] = self.mesh_Z[:]
+            self.mesh = self._read_index()
+            if self.mesh is None:
+                self.mesh = np.empty(
+                    (self.mesh_S.shape[0], 2), dtype=self.mesh_S.dtype
+                )
+                self.mesh[:, 0] = self.mesh_S[:]
+                self.mesh[:, 1] = self.mesh_Z[:]
 
-            self.kdtree = cKDTree(data=self.mesh)
+            self.kdtree = build_kdtree(self.mesh)
 
             if not self.read_on_demand:
-                self.mesh_mu = self.f["Mesh"]["mesh_mu"][:]
+                self.mesh_mu = self._read_mesh_array("mesh_mu")
+
+    @property
+    def index_folder(self):
+        """
+        The folder of the optional on-disk index of this mesh.
+        """
+        return self.filename + ".index"
+
+    def _get_index_meta(self):
+        """
+        Everything an index is validated against.
+        """
+        return {
+            "index version": MESH_INDEX_VERSION,
+            "file version": int(self.file_version),
+            "file size": os.path.getsize(self.filename),
+            "dump type": self.dump_type,
+        }
+
+    def _read_index(self):
+        """
+        Return the points of the kdtree stored in the on-disk index or None
+        if there is no valid index for this file. The index only contains
+        arrays, the kdtree itself is always built when opening the file.
+        """
+        self._has_index = False
+
+        meta_filename = os.path.join(self.index_folder, "index.json")
+        if not os.path.exists(meta_filename):
+            return None
+
+        with open(meta_filename, "r") as fh:
+            meta = json.load(fh)
+        if meta != self._get_index_meta():
+            warnings.warn(
+                "The mesh index '%s' does not match '%s' and will not be "
+                "used. Please recreate it."
+                % (self.index_folder, self.filename)
+            )
+            return None
+
+        # Map all arrays right away so any problem with the index results in
+        # the mesh being parsed as usual. Pickled objects are never loaded.
+        try:
+            self._index_arrays = {
+                name: np.load(
+                    os.path.join(self.index_folder, name + ".npy"),
+                    mmap_mode="r",
+                    allow_pickle=False,
+                )
+                for name in ["kdtree_points"]
+                + MESH_INDEX_ARRAYS[self.dump_type]
+            }
+        except Exception as e:
+            warnings.warn(
+                "The mesh index '%s' could not be read and will not be "
+                "used. Please recreate it. Reason: %s"
+                % (self.index_folder, str(e))
+            )
+            return None
+
+        self._has_index = True
+        return self._index_arrays["kdtree_points"]
+
+    def _read_mesh_array(self, name):
+        """
+        Read a full array from the "/Mesh" group. Arrays in the index are
+        memory-mapped instead.
+        """
+        if self._has_index:
+            return self._index_arrays[name]
+        return self.f["Mesh"][name][:]
+
+    def write_index(self):
+        """
+        Write the points of the kdtree and the connectivity arrays of the
+        mesh to a folder next to the file.
+
+        Subsequent opens of the same file will memory-map the arrays from
+        there instead of reading them. The index is only used as long as the
+        file version and size still match.
+        """
+        if not hasattr(self, "kdtree"):
+            raise ValueError("Only fully parsed meshes can be indexed.")
+
+        folder = self.index_folder
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        # The index is only valid once the meta file has been written.
+        meta_filename = os.path.join(folder, "index.json")
+        if os.path.exists(meta_filename):
+            os.remove(meta_filename)
+
+        np.save(os.path.join(folder, "kdtree_points.npy"), self.mesh)
+
+        for name in MESH_INDEX_ARRAYS[self.dump_type]:
+            np.save(
+                os.path.join(folder, name + ".npy"), self.f["Mesh"][name][:]
+            )
+
+        with open(meta_filename, "w") as fh:
+            json.dump(self._get_index_meta(), fh)
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Instaseis-native database files.
+
+Merged databases are HDF5 files and every read of an element has to go
+through the HDF5 library. The native format instead stores the displacement
+of each element in a block of a fixed size at an aligned offset, directly in
+the order the compiled routines expect. Reading an element is thus a single
+lookup in the offset table plus a single ``pread()`` or a view of a memory
+map of the file.
+
+File layout (all numbers are little endian):
+
+* ``MAGIC`` (16 bytes).
+* The size of the header in bytes (unsigned 64 bit integer).
+* The header, a JSON document with the global attributes of the database and
+  the data type, shape, and offset of all arrays in the file.
+* The arrays of the mesh including the element midpoints, the source time
+  functions, and the table of element offsets.
+* One block per element with the shape ``(npts, jpol, ipol, nvar)`` in
+  Fortran order.
+
+The header, all arrays, and all element blocks start at a multiple of the
+alignment of the file. Blocks stored in half precision are scaled per
+element and component to avoid overflows and store the scaling factors in an
+additional array.
+
+:copyright:
+    Lion Krischer (lion.krischer@gmail.com), 2020
+:license:
+    GNU Lesser General Public License, Version 3 [non-commercial/academic use]
+    (http://www.gnu.org/copyleft/lgpl.html)
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .. import InstaseisError
+from .mesh import MESH_INDEX_ARRAYS, Mesh
+
+
+# Expected name of native database files.
+NATIVE_FILENAME = "native_output.isdb"
+
+MAGIC = b"INSTASEIS-NATIVE"
+
+# Version of the native file format. Increase it whenever the layout changes.
+NATIVE_FORMAT_VERSION = 2
+
+# Data types the element blocks can be stored in.
+NATIVE_DTYPES = ("float32", "float16")
+
+# Arrays of the "/Mesh" group that are stored in native files.
+NATIVE_MESH_ARRAYS = [
+    "gll",
+    "glj",
+    "G0",
+    "G1",
+    "G2",
+    "mp_mesh_S",
+    "mp_mesh_Z",
+] + MESH_INDEX_ARRAYS["displ_only"]
+
+_HEADER_SIZE = struct.Struct("<Q")
+
+
+def _align(offset, alignment):
+    return -(-offset // alignment) * alignment
+
+
+def _encode_attribute(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    elif isinstance(value, str):
+        return value
+    value = np.asarray(value)
+    if value.dtype.kind == "S":
+        value = value.astype(str)
+    return {"dtype": value.dtype.str, "value": value.tolist()}
+
+
+def _decode_attribute(value):
+    if isinstance(value, str):
+        return value
+    return np.array(value["value"], dtype=value["dtype"])
+
+
+def read_header(filename):
+    """
+    Read the header of a native database file.
+
+    Raises an :class:`~instaseis.InstaseisError` if the file is not a native
+    database file or has an unsupported version.
+    """
+    with open(filename, "rb") as fh:
+        magic = fh.read(len(MAGIC))
+        size = fh.read(_HEADER_SIZE.size)
+        if magic != MAGIC or len(size) != _HEADER_SIZE.size:
+            raise InstaseisError(
+                "'%s' is not a native Instaseis database file." % filename
+            )
+        header = json.loads(fh.read(_HEADER_SIZE.unpack(size)[0]).decode())
+
+    if header["format version"] != NATIVE_FORMAT_VERSION:
+        raise InstaseisError(
+            "Native database file '%s' has format version %i. Only version "
+            "%i is supported."
+            % (filename, header["format version"], NATIVE_FORMAT_VERSION)
+        )
+    return header
+
+
+class NativeFile(object):
+    """
+    Read-only access to a native database file.
+
+    Offers the few parts of the interface of :class:`h5py.File` that
+    :class:`~instaseis.database_interfaces.mesh.Mesh` needs to parse it: the
+    global attributes, the arrays of the ``"/Mesh"`` group, and the source
+    time functions in the root group. All arrays are read-only views of a
+    memory map of the file.
+    """
+
+    def __init__(self, filename, memory_map=True):
+        self.filename = filename
+        self.header = read_header(filename)
+        self.attrs = {
+            key: _decode_attribute(value)
+            for key, value in self.header["attributes"].items()
+        }
+
+        self._fh = open(filename, "rb")
+        self._mmap = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = {
+            name: self._get_array(**info)
+            for name, info in self.header["arrays"].items()
+        }
+
+        self._groups = {
+            "/": {
+                "stf_dump": arrays.pop("stf_dump"),
+                "stf_d_dump": arrays.pop("stf_d_dump"),
+            },
+            "Mesh": {name: arrays.pop(name) for name in NATIVE_MESH_ARRAYS},
+        }
+        self.element_offsets = arrays.pop("element offsets")
+        self.element_scales = arrays.pop("element scales", None)
+
+        elements = self.header["elements"]
+        self.element_dtype = np.dtype(elements["dtype"])
+        self.element_shape = tuple(elements["shape"])
+        self.element_size = (
+            int(np.prod(self.element_shape)) * self.element_dtype.itemsize
+        )
+        # Positional reads are thread and fork safe. Without them elements
+        # are always read from the memory map.
+        self.memory_map = memory_map or not hasattr(os, "pread")
+
+    def _get_array(self, dtype, shape, offset):
+        dtype = np.dtype(dtype)
+        return np.frombuffer(
+            self._mmap,
+            dtype=dtype,
+            count=int(np.prod(shape)),
+            offset=offset,
+        ).reshape(shape)
+
+    def __contains__(self, name):
+        return name in self._groups
+
+    def __getitem__(self, name):
+        return self._groups[name]
+
+    @property
+    def nelem(self):
+        return len(self.element_offsets)
+
+    def read_element(self, id_elem):
+        """
+        Read the block of a single element.
+
+        Returns a read-only, Fortran-ordered array with the shape
+        ``(npts, jpol, ipol, nvar)`` in the data type of the file.
+        """
+        offset = int(self.element_offsets[id_elem])
+        if self.memory_map:
+            buf = self._mmap
+        else:
+            buf = os.pread(self._fh.fileno(), self.element_size, offset)
+            offset = 0
+        return np.frombuffer(
+            buf,
+            dtype=self.element_dtype,
+            count=self.element_size // self.element_dtype.itemsize,
+            offset=offset,
+        ).reshape(self.element_shape, order="F")
+
+
+class NativeMesh(Mesh):
+    """
+    Mesh of a native database file.
+
+    The global attributes and the mesh are parsed like those of merged
+    databases. All mesh arrays are views of a memory map so no index is
+    needed - the kd-tree is built from the element midpoints of the file.
+    """
+
+    def _open(self, filename):
+        return NativeFile(filename, memory_map=self.memory_map)
+
+    def _read_index(self):
+        return None
+
+    def _read_mesh_array(self, name):
+        return self.f["Mesh"][name]
+
+    def write_index(self):
+        raise ValueError("Native database files already contain the index.")
+
+    @property
+    def merged_shape(self):
+        npts, jpol, ipol, nvar = self.f.element_shape
+        return (self.f.nelem, nvar, jpol, ipol, npts)
+
+    def read_merged_element(self, id_elem, dtype=None):
+        """
+        Read the displacement at all GLL points of an element.
+
+        Single precision blocks are returned as read-only views without any
+        copy if no other data type is requested. Half precision blocks are
+        converted to single precision by default.
+
+        :param id_elem: The element id.
+        :param dtype: The data type of the returned array.
+        :returns: A Fortran-ordered array with the shape
+            ``(npts, jpol, ipol, nvar)``.
+        """
+        utemp = self.f.read_element(id_elem)
+        if self.f.element_scales is None:
+            dtype = np.dtype(dtype or utemp.dtype)
+            if dtype == utemp.dtype:
+                return utemp
+            return utemp.astype(dtype, order="F")
+
+        utemp = utemp.astype(dtype or np.float32, order="F")
+        utemp *= self.f.element_scales[id_elem]
+        return utemp
+
+
+def _get_element_scales(utemp):
+    """
+    Powers of two per component so all values are at most one and scaling
+    them back is exact.
+    """
+    max_abs = np.abs(utemp).max(axis=(0, 1, 2))
+    scales = np.ones(max_abs.shape, dtype=np.float32)
+    nonzero = max_abs > 0
+    scales[nonzero] = 2.0 ** np.ceil(np.log2(max_abs[nonzero]))
+    return scales
+
+
+def write_native_file(
+    input_filename,
+    output_filename,
+    dtype="float32",
+    alignment=4096,
+    progress_callback=None,
+):
+    """
+    Convert a merged database file to a native database file.
+
+    :param input_filename: The merged database file.
+    :type input_filename: str
+    :param output_filename: The native database file. Must not yet exist.
+    :type output_filename: str
+    :param dtype: The data type of the element blocks. ``"float32"`` stores
+        the data of merged databases without loss, ``"float16"`` halves the
+        size of the file at the cost of some precision.
+    :type dtype: str, optional
+    :param alignment: All arrays and element blocks start at a multiple of
+        this many bytes. Must be a power of two. The default matches the
+        page size of most systems.
+    :type alignment: int, optional
+    :param progress_callback: Optional function called with the number of
+        written and the total number of elements after each element.
+    :type progress_callback: function, optional
+    """
+    if dtype not in NATIVE_DTYPES:
+        raise ValueError("dtype must be one of %s." % ", ".join(NATIVE_DTYPES))
+    if alignment < 8 or alignment & (alignment - 1):
+        raise ValueError("alignment must be a power of two of at least 8.")
+    if os.path.exists(output_filename):
+        raise ValueError("File '%s' already exists." % output_filename)
+
+    mesh = Mesh(input_filename, full_parse=True, memory_map=True)
+    if "MergedSnapshots" not in mesh.f:
+        raise ValueError(
+            "Only merged databases can be converted to native databases."
+        )
+
+    nelem, nvar, jpol, ipol, npts = mesh.merged_shape
+    element_shape = (npts, jpol, ipol, nvar)
+    element_dtype = np.dtype(dtype).newbyteorder("<")
+
+    arrays = {
+        "stf_dump": mesh.stf,
+        "stf_d_dump": mesh.stf_d,
+        # Offsets of the element blocks - filled in once the size of the
+        # header is known.
+        "element offsets": np.zeros(nelem, dtype="<u8"),
+    }
+    for name in NATIVE_MESH_ARRAYS:
+        arrays[name] = mesh.f["Mesh"][name][:]
+    if dtype == "float16":
+        arrays["element scales"] = np.ones((nelem, nvar), dtype="<f4")
+        for id_elem in range(nelem):
+            arrays["element scales"][id_elem] = _get_element_scales(
+                mesh.read_merged_element(id_elem)
+            )
+    arrays = {
+        name: np.ascontiguousarray(value, dtype=value.dtype.newbyteorder("<"))
+        for name, value in arrays.items()
+    }
+
+    header = {
+        "format version": NATIVE_FORMAT_VERSION,
+        "alignment": alignment,
+        "attributes": {
+            key: _encode_attribute(value)
+            for key, value in mesh.f.attrs.items()
+        },
+        "arrays": {},
+        "elements": {"dtype": element_dtype.str, "shape": element_shape},
+    }
+
+    # The header contains the offsets of all arrays which in turn depend on
+    # the size of the header. Offsets only grow so this converges.
+    data_offset = 0
+    while True:
+        offset = data_offset
+        for name, value in arrays.items():
+            header["arrays"][name] = {
+                "dtype": value.dtype.str,
+                "shape": value.shape,
+                "offset": offset,
+            }
+            offset = _align(offset + value.nbytes, alignment)
+        start = _align(
+            len(MAGIC) + _HEADER_SIZE.size + len(json.dumps(header)),
+            alignment,
+        )
+        if start == data_offset:
+            break
+        data_offset = start
+
+    element_size = int(np.prod(element_shape)) * element_dtype.itemsize
+    block_size = _align(element_size, alignment)
+    arrays["element offsets"][:] = offset + block_size * np.arange(nelem)
+
+    encoded_header = json.dumps(header).encode()
+    with open(output_filename, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(_HEADER_SIZE.pack(len(encoded_header)))
+        fh.write(encoded_header)
+        for name, value in arrays.items():
+            fh.seek(header["arrays"][name]["offset"])
+            fh.write(value.tobytes())
+
+        for id_elem in range(nelem):
+            utemp = mesh.read_merged_element(id_elem)
+            if dtype == "float16":
+                utemp = utemp / arrays["element scales"][id_elem]
+            fh.seek(int(arrays["element offsets"][id_elem]))
+            fh.write(utemp.astype(element_dtype).tobytes(order="F"))
+            if progress_callback:
+                progress_callback(id_elem + 1, nelem)
+
+        # Pad the last block so all blocks have the same size.
+        fh.truncate(int(arrays["element offsets"][-1]) + block_size)
@@ -31,6 +31,12 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
         netcdf_files,
         buffer_size_in_mb=100,
         read_on_demand=False,
+        shared_buffers=False,
+        buffer_policy="lru",
+        compressed_buffer_size_in_mb=0,
+        compressed_buffer_codec="zlib",
+        interpolation_buffer_size_in_mb=0,
+        memory_map=True,
         *args,
         **kwargs,
     ):
@@ -43,19 +49,59 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
             avoid repeated disc access. Depending on the type of database
             and the number of components of the database, the total buffer
             memory can be up to four times this number. The optimal value is
-            highly application and system dependent.
+            highly application and system dependent. With ``0`` the strain
+            of reciprocal databases is directly evaluated at the source
+            location instead of at all points of the element.
         :type buffer_size_in_mb: int, optional
         :param read_on_demand: Read several global fields on demand (faster
             initialization) or on initialization (slower
             initialization, faster in individual seismogram extraction,
             useful e.g. for finite sources, default).
         :type read_on_demand: bool, optional
+        :param shared_buffers: Keep the strain and displacement buffers in
+            shared memory so all processes forked after opening the database
+            share one buffer.
+        :type shared_buffers: bool, optional
+        :param buffer_policy: Determines which items are removed from the
+            buffers once they are full. One of ``"lru"`` (default),
+            ``"lfu"``, ``"arc"``, or ``"tinylfu"``. The latter two are scan
+            resistant, e.g. extracting a large finite source does not evict
+            frequently used elements.
+        :type buffer_policy: str, optional
+        :param compressed_buffer_size_in_mb: Size of a second buffer tier
+            per buffer. Items evicted from a buffer are stored there
+            compressed and are promoted back once they are needed again.
+            Disabled by default.
+        :type compressed_buffer_size_in_mb: int, optional
+        :param compressed_buffer_codec: How items are stored in the second
+            buffer tier. One of ``"zlib"`` (default), ``"lz4"``, or
+            ``"zstd"`` for lossless compression, ``"float32"`` to store them
+            in single precision, or a combination like ``"float32+lz4"``.
+            ``"lz4"`` and ``"zstd"`` require the lz4 and zstandard packages.
+        :type compressed_buffer_codec: str, optional
+        :param interpolation_buffer_size_in_mb: Buffer for the strain
+            interpolated to the source or receiver location. Speeds up
+            repeatedly requesting the same locations, e.g. a fixed set of
+            receivers for many sources. Disabled by default.
+        :type interpolation_buffer_size_in_mb: int, optional
+        :param memory_map: Read contiguous, uncompressed datasets through
+            memory maps of the database files instead of through HDF5. Reads
+            are then served from the page cache without copies and threads
+            do not serialize on the global HDF5 lock. All other datasets are
+            always read with HDF5.
+        :type memory_map: bool, optional
         """
         BaseNetCDFInstaseisDB.__init__(
             self,
             db_path=db_path,
             buffer_size_in_mb=buffer_size_in_mb,
             read_on_demand=read_on_demand,
+            shared_buffers=shared_buffers,
+            buffer_policy=buffer_policy,
+            compressed_buffer_size_in_mb=compressed_buffer_size_in_mb,
+            compressed_buffer_codec=compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=interpolation_buffer_size_in_mb,
+            memory_map=memory_map,
             *args,
             **kwargs,
         )
@@ -81,6 +127,14 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
                 strain_buffer_size_in_mb=self.buffer_size_in_mb,
                 displ_buffer_size_in_mb=self.buffer_size_in_mb,
                 read_on_demand=self.read_on_demand,
+                shared_buffers=self.shared_buffers,
+                buffer_policy=self.buffer_policy,
+                compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+                compressed_buffer_codec=self.compressed_buffer_codec,
+                interpolation_buffer_size_in_mb=(
+                    self.interpolation_buffer_size_in_mb
+                ),
+                memory_map=self.memory_map,
             )
             pz_m = mesh.Mesh(
                 pz_file,
@@ -88,6 +142,14 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
                 strain_buffer_size_in_mb=self.buffer_size_in_mb,
                 displ_buffer_size_in_mb=self.buffer_size_in_mb,
                 read_on_demand=self.read_on_demand,
+                shared_buffers=self.shared_buffers,
+                buffer_policy=self.buffer_policy,
+                compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+                compressed_buffer_codec=self.compressed_buffer_codec,
+                interpolation_buffer_size_in_mb=(
+                    self.interpolation_buffer_size_in_mb
+                ),
+                memory_map=self.memory_map,
             )
             self.parsed_mesh = px_m
         elif x_exists:
@@ -97,6 +159,14 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
                 strain_buffer_size_in_mb=self.buffer_size_in_mb,
                 displ_buffer_size_in_mb=self.buffer_size_in_mb,
                 read_on_demand=self.read_on_demand,
+                shared_buffers=self.shared_buffers,
+                buffer_policy=self.buffer_policy,
+                compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+                compressed_buffer_codec=self.compressed_buffer_codec,
+                interpolation_buffer_size_in_mb=(
+                    self.interpolation_buffer_size_in_mb
+                ),
+                memory_map=self.memory_map,
             )
             pz_m = None
             self.parsed_mesh = px_m
@@ -108,6 +178,14 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
                 strain_buffer_size_in_mb=self.buffer_size_in_mb,
                 displ_buffer_size_in_mb=self.buffer_size_in_mb,
                 read_on_demand=self.read_on_demand,
+                shared_buffers=self.shared_buffers,
+                buffer_policy=self.buffer_policy,
+                compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+                compressed_buffer_codec=self.compressed_buffer_codec,
+                interpolation_buffer_size_in_mb=(
+                    self.interpolation_buffer_size_in_mb
+                ),
+                memory_map=self.memory_map,
             )
             self.parsed_mesh = pz_m
         else:
@@ -128,134 +206,25 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
         # Collect data arrays and mu in a dictionary.
         data = {}
 
-        mesh = self.parsed_mesh.f["Mesh"]
-
-        # Get mu.
-        if not self.read_on_demand:
-            mesh_mu = self.parsed_mesh.mesh_mu
-        else:
-            mesh_mu = mesh["mesh_mu"]
-        if self.info.dump_type == "displ_only":
-            npol = self.info.spatial_order
-            mu = mesh_mu[ei.gll_point_ids[npol // 2, npol // 2]]
-        else:
-            # XXX: Is this correct?
-            mu = mesh_mu[ei.id_elem]
-        data["mu"] = mu
+        data["mu"] = self._get_mu(element_info=ei)
 
         fac_1_map = {"N": np.cos, "E": np.sin}
         fac_2_map = {"N": lambda x: -np.sin(x), "E": np.cos}
 
         if isinstance(source, Source):
-            if self.info.dump_type == "displ_only":
-                if ei.axis:
-                    G = self.parsed_mesh.G2  # NOQA
-                    GT = self.parsed_mesh.G1T  # NOQA
-                else:
-                    G = self.parsed_mesh.G2  # NOQA
-                    GT = self.parsed_mesh.G2T  # NOQA
-
-            strain_x = None
-            strain_z = None
-
-            # Minor optimization: Only read if actually requested.
-            if "Z" in components:
-                if self.info.dump_type == "displ_only":
-                    strain_z = self._get_strain_interp(
-                        self.meshes.pz,
-                        ei.id_elem,
-                        ei.gll_point_ids,
-                        G,
-                        GT,
-                        ei.col_points_xi,
-                        ei.col_points_eta,
-                        ei.corner_points,
-                        ei.eltype,
-                        ei.axis,
-                        ei.xi,
-                        ei.eta,
-                    )
-                elif (
-                    self.info.dump_type == "fullfields"
-                    or self.info.dump_type == "strain_only"
-                ):
-                    strain_z = self._get_strain(self.meshes.pz, ei.id_elem)
-
-            if any(comp in components for comp in ["N", "E", "R", "T"]):
-                if self.info.dump_type == "displ_only":
-                    strain_x = self._get_strain_interp(
-                        self.meshes.px,
-                        ei.id_elem,
-                        ei.gll_point_ids,
-                        G,
-                        GT,
-                        ei.col_points_xi,
-                        ei.col_points_eta,
-                        ei.corner_points,
-                        ei.eltype,
-                        ei.axis,
-                        ei.xi,
-                        ei.eta,
-                    )
-                elif (
-                    self.info.dump_type == "fullfields"
-                    or self.info.dump_type == "strain_only"
-                ):
-                    strain_x = self._get_strain(self.meshes.px, ei.id_elem)
-
-            mij = rotations.rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(
-                source.tensor_voigt,
-                np.deg2rad(source.longitude),
-                np.deg2rad(source.colatitude),
-            )
-            mij = rotations.rotate_symm_tensor_voigt_xyz_earth_to_xyz_src(
-                mij,
-                np.deg2rad(receiver.longitude),
-                np.deg2rad(receiver.colatitude),
+            fields = self._get_moment_tensor_fields(
+                components=components, element_info=ei
             )
-            mij = rotations.rotate_symm_tensor_voigt_xyz_to_src(
-                mij, coordinates.phi
+            data.update(
+                self._contract_moment_tensor(
+                    fields=fields,
+                    tensor=source.tensor,
+                    source=source,
+                    receiver=receiver,
+                    coordinates=coordinates,
+                    components=components,
+                )
             )
-            mij /= self.parsed_mesh.amplitude
-
-            if "Z" in components:
-                final = np.zeros(strain_z.shape[0], dtype="float64")
-                for i in range(3):
-                    final += mij[i] * strain_z[:, i]
-                final += 2.0 * mij[4] * strain_z[:, 4]
-                data["Z"] = final
-
-            if "R" in components:
-                final = np.zeros(strain_x.shape[0], dtype="float64")
-                final -= strain_x[:, 0] * mij[0] * 1.0
-                final -= strain_x[:, 1] * mij[1] * 1.0
-                final -= strain_x[:, 2] * mij[2] * 1.0
-                final -= strain_x[:, 4] * mij[4] * 2.0
-                data["R"] = final
-
-            if "T" in components:
-                final = np.zeros(strain_x.shape[0], dtype="float64")
-                final += strain_x[:, 3] * mij[3] * 2.0
-                final += strain_x[:, 5] * mij[5] * 2.0
-                data["T"] = final
-
-            for comp in ["E", "N"]:
-                if comp not in components:
-                    continue
-
-                fac_1 = fac_1_map[comp](coordinates.phi)
-                fac_2 = fac_2_map[comp](coordinates.phi)
-
-                final = np.zeros(strain_x.shape[0], dtype="float64")
-                final += strain_x[:, 0] * mij[0] * 1.0 * fac_1
-                final += strain_x[:, 1] * mij[1] * 1.0 * fac_1
-                final += strain_x[:, 2] * mij[2] * 1.0 * fac_1
-                final += strain_x[:, 3] * mij[3] * 2.0 * fac_2
-                final += strain_x[:, 4] * mij[4] * 2.0 * fac_1
-                final += strain_x[:, 5] * mij[5] * 2.0 * fac_2
-                if comp == "N":
-                    final *= -1.0
-                data[comp] = final
 
         elif isinstance(source, ForceSource):
             if self.info.dump_type != "displ_only":
@@ -332,3 +301,66 @@ class ReciprocalInstaseisDB(BaseNetCDFInstaseisDB):
             raise NotImplementedError
 
         return data
+
+    def _get_moment_tensor_fields(self, components, element_info):
+        """
+        Get the strain interpolated to the source location.
+        """
+        ei = element_info
+        if self.info.dump_type == "displ_only":
+            if ei.axis:
+                G = self.parsed_mesh.G2  # NOQA
+                GT = self.parsed_mesh.G1T  # NOQA
+            else:
+                G = self.parsed_mesh.G2  # NOQA
+                GT = self.parsed_mesh.G2T  # NOQA
+
+        strain_x = None
+        strain_z = None
+
+        # Minor optimization: Only read if actually requested.
+        if "Z" in components:
+            if self.info.dump_type == "displ_only":
+                strain_z = self._get_strain_interp(
+                    self.meshes.pz,
+                    ei.id_elem,
+                    ei.gll_point_ids,
+                    G,
+                    GT,
+                    ei.col_points_xi,
+                    ei.col_points_eta,
+                    ei.corner_points,
+                    ei.eltype,
+                    ei.axis,
+                    ei.xi,
+                    ei.eta,
+                )
+            elif (
+                self.info.dump_type == "fullfields"
+                or self.info.dump_type == "strain_only"
+            ):
+                strain_z = self._get_strain(self.meshes.pz, ei.id_elem)
+
+        if any(comp in components for comp in ["N", "E", "R", "T"]):
+            if self.info.dump_type == "displ_only":
+                strain_x = self._get_strain_interp(
+                    self.meshes.px,
+                    ei.id_elem,
+                    ei.gll_point_ids,
+                    G,
+                    GT,
+                    ei.col_points_xi,
+                    ei.col_points_eta,
+                    ei.corner_points,
+                    ei.eltype,
+                    ei.axis,
+                    ei.xi,
+                    ei.eta,
+                )
+            elif (
+                self.info.dump_type == "fullfields"
+                or self.info.dump_type == "strain_only"
+            ):
+                strain_x = self._get_strain(self.meshes.px, ei.id_elem)
+
+        return strain_x, strain_z
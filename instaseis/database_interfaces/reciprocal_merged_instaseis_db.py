@@ -25,12 +25,21 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
     Reciprocal Merged Instaseis Database.
     """
 
+    # Class of the mesh of the merged file.
+    _mesh_class = mesh.Mesh
+
     def __init__(
         self,
         db_path,
         netcdf_file,
         buffer_size_in_mb=100,
         read_on_demand=False,
+        shared_buffers=False,
+        buffer_policy="lru",
+        compressed_buffer_size_in_mb=0,
+        compressed_buffer_codec="zlib",
+        interpolation_buffer_size_in_mb=0,
+        memory_map=True,
         *args,
         **kwargs,
     ):
@@ -50,12 +59,50 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
             initialization, faster in individual seismogram extraction,
             useful e.g. for finite sources, default).
         :type read_on_demand: bool, optional
+        :param shared_buffers: Keep the strain and displacement buffers in
+            shared memory so all processes forked after opening the database
+            share one buffer.
+        :type shared_buffers: bool, optional
+        :param buffer_policy: Determines which items are removed from the
+            buffers once they are full. One of ``"lru"`` (default),
+            ``"lfu"``, ``"arc"``, or ``"tinylfu"``. The latter two are scan
+            resistant, e.g. extracting a large finite source does not evict
+            frequently used elements.
+        :type buffer_policy: str, optional
+        :param compressed_buffer_size_in_mb: Size of a second buffer tier
+            per buffer. Items evicted from a buffer are stored there
+            compressed and are promoted back once they are needed again.
+            Disabled by default.
+        :type compressed_buffer_size_in_mb: int, optional
+        :param compressed_buffer_codec: How items are stored in the second
+            buffer tier. One of ``"zlib"`` (default), ``"lz4"``, or
+            ``"zstd"`` for lossless compression, ``"float32"`` to store them
+            in single precision, or a combination like ``"float32+lz4"``.
+            ``"lz4"`` and ``"zstd"`` require the lz4 and zstandard packages.
+        :type compressed_buffer_codec: str, optional
+        :param interpolation_buffer_size_in_mb: Buffer for the strain
+            interpolated to the source or receiver location. Speeds up
+            repeatedly requesting the same locations, e.g. a fixed set of
+            receivers for many sources. Disabled by default.
+        :type interpolation_buffer_size_in_mb: int, optional
+        :param memory_map: Read contiguous, uncompressed datasets through
+            memory maps of the database files instead of through HDF5. Reads
+            are then served from the page cache without copies and threads
+            do not serialize on the global HDF5 lock. All other datasets are
+            always read with HDF5.
+        :type memory_map: bool, optional
         """
         BaseNetCDFInstaseisDB.__init__(
             self,
             db_path=db_path,
             buffer_size_in_mb=buffer_size_in_mb,
             read_on_demand=read_on_demand,
+            shared_buffers=shared_buffers,
+            buffer_policy=buffer_policy,
+            compressed_buffer_size_in_mb=compressed_buffer_size_in_mb,
+            compressed_buffer_codec=compressed_buffer_codec,
+            interpolation_buffer_size_in_mb=interpolation_buffer_size_in_mb,
+            memory_map=memory_map,
             *args,
             **kwargs,
         )
@@ -68,12 +115,20 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
         )
 
         self.meshes = MeshCollection_merged(
-            mesh.Mesh(
+            self._mesh_class(
                 filename,
                 full_parse=True,
                 strain_buffer_size_in_mb=self.buffer_size_in_mb,
                 displ_buffer_size_in_mb=self.buffer_size_in_mb,
                 read_on_demand=self.read_on_demand,
+                shared_buffers=self.shared_buffers,
+                buffer_policy=self.buffer_policy,
+                compressed_buffer_size_in_mb=self.compressed_buffer_size_in_mb,
+                compressed_buffer_codec=self.compressed_buffer_codec,
+                interpolation_buffer_size_in_mb=(
+                    self.interpolation_buffer_size_in_mb
+                ),
+                memory_map=self.memory_map,
             )
         )
         self.parsed_mesh = self.meshes.merged
@@ -87,111 +142,25 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
         # Collect data arrays and mu in a dictionary.
         data = {}
 
-        mesh = self.parsed_mesh.f["Mesh"]
-
-        # Get mu.
-        if not self.read_on_demand:
-            mesh_mu = self.parsed_mesh.mesh_mu
-        else:
-            mesh_mu = mesh["mesh_mu"]
-        if self.info.dump_type == "displ_only":
-            npol = self.info.spatial_order
-            mu = mesh_mu[ei.gll_point_ids[npol // 2, npol // 2]]
-        else:  # pragma: no cover
-            # Merged databases currently not implemented for
-            # non-displacement databases.
-            raise NotImplementedError
-            # XXX: Is this correct?
-            mu = mesh_mu[ei.id_elem]
-        data["mu"] = mu
+        data["mu"] = self._get_mu(element_info=ei)
 
         fac_1_map = {"N": np.cos, "E": np.sin}
         fac_2_map = {"N": lambda x: -np.sin(x), "E": np.cos}
 
         if isinstance(source, Source):
-            if self.info.dump_type == "displ_only":
-                if ei.axis:
-                    G = self.parsed_mesh.G2  # NOQA
-                    GT = self.parsed_mesh.G1T  # NOQA
-                else:
-                    G = self.parsed_mesh.G2  # NOQA
-                    GT = self.parsed_mesh.G2T  # NOQA
-
-            if self.info.dump_type == "displ_only":
-                strain_x, strain_z = self._get_strain_interp(
-                    ei.id_elem,
-                    ei.gll_point_ids,
-                    G,
-                    GT,
-                    ei.col_points_xi,
-                    ei.col_points_eta,
-                    ei.corner_points,
-                    ei.eltype,
-                    ei.axis,
-                    ei.xi,
-                    ei.eta,
-                )
-            elif (
-                self.info.dump_type == "fullfields"
-                or self.info.dump_type == "strain_only"
-            ):  # pragma: no cover
-                # Merged databases currently not implemented for
-                # non-displacement databases.
-                raise NotImplementedError
-
-            mij = rotations.rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(
-                source.tensor_voigt,
-                np.deg2rad(source.longitude),
-                np.deg2rad(source.colatitude),
+            fields = self._get_moment_tensor_fields(
+                components=components, element_info=ei
             )
-            mij = rotations.rotate_symm_tensor_voigt_xyz_earth_to_xyz_src(
-                mij,
-                np.deg2rad(receiver.longitude),
-                np.deg2rad(receiver.colatitude),
-            )
-            mij = rotations.rotate_symm_tensor_voigt_xyz_to_src(
-                mij, coordinates.phi
+            data.update(
+                self._contract_moment_tensor(
+                    fields=fields,
+                    tensor=source.tensor,
+                    source=source,
+                    receiver=receiver,
+                    coordinates=coordinates,
+                    components=components,
+                )
             )
-            mij /= self.parsed_mesh.amplitude
-
-            if "Z" in components:
-                final = np.zeros(strain_z.shape[0], dtype="float64")
-                for i in range(3):
-                    final += mij[i] * strain_z[:, i]
-                final += 2.0 * mij[4] * strain_z[:, 4]
-                data["Z"] = final
-
-            if "R" in components:
-                final = np.zeros(strain_x.shape[0], dtype="float64")
-                final -= strain_x[:, 0] * mij[0] * 1.0
-                final -= strain_x[:, 1] * mij[1] * 1.0
-                final -= strain_x[:, 2] * mij[2] * 1.0
-                final -= strain_x[:, 4] * mij[4] * 2.0
-                data["R"] = final
-
-            if "T" in components:
-                final = np.zeros(strain_x.shape[0], dtype="float64")
-                final += strain_x[:, 3] * mij[3] * 2.0
-                final += strain_x[:, 5] * mij[5] * 2.0
-                data["T"] = final
-
-            for comp in ["E", "N"]:
-                if comp not in components:
-                    continue
-
-                fac_1 = fac_1_map[comp](coordinates.phi)
-                fac_2 = fac_2_map[comp](coordinates.phi)
-
-                final = np.zeros(strain_x.shape[0], dtype="float64")
-                final += strain_x[:, 0] * mij[0] * 1.0 * fac_1
-                final += strain_x[:, 1] * mij[1] * 1.0 * fac_1
-                final += strain_x[:, 2] * mij[2] * 1.0 * fac_1
-                final += strain_x[:, 3] * mij[3] * 2.0 * fac_2
-                final += strain_x[:, 4] * mij[4] * 2.0 * fac_1
-                final += strain_x[:, 5] * mij[5] * 2.0 * fac_2
-                if comp == "N":
-                    final *= -1.0
-                data[comp] = final
 
         elif isinstance(source, ForceSource):
             if self.info.dump_type != "displ_only":  # pragma: no cover
@@ -259,19 +228,47 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
 
         return data
 
-    def _get_and_reorder_utemp(self, id_elem):
-        # We can now read it in a single go!
-        utemp = self.meshes.merged.f["MergedSnapshots"][id_elem]
+    def _get_moment_tensor_fields(self, components, element_info):
+        """
+        Get the strain interpolated to the source location.
+        """
+        ei = element_info
+        if self.info.dump_type == "displ_only":
+            if ei.axis:
+                G = self.parsed_mesh.G2  # NOQA
+                GT = self.parsed_mesh.G1T  # NOQA
+            else:
+                G = self.parsed_mesh.G2  # NOQA
+                GT = self.parsed_mesh.G2T  # NOQA
+
+        if self.info.dump_type == "displ_only":
+            strain_x, strain_z = self._get_strain_interp(
+                ei.id_elem,
+                ei.gll_point_ids,
+                G,
+                GT,
+                ei.col_points_xi,
+                ei.col_points_eta,
+                ei.corner_points,
+                ei.eltype,
+                ei.axis,
+                ei.xi,
+                ei.eta,
+            )
+        elif (
+            self.info.dump_type == "fullfields"
+            or self.info.dump_type == "strain_only"
+        ):  # pragma: no cover
+            # Merged databases currently not implemented for
+            # non-displacement databases.
+            raise NotImplementedError
 
-        # utemp is currently (nvars, jpol, ipol, npts)
-        # 1. Roll to (npts, nvar, jpol, ipol)
-        utemp = np.rollaxis(utemp, 3, 0)
-        # 2. Roll to (npts, jpol, nvar, ipol)
-        utemp = np.rollaxis(utemp, 2, 1)
-        # 3. Roll to (npts, jpol, ipol, nvar)
-        utemp = np.rollaxis(utemp, 3, 2)
+        return strain_x, strain_z
 
-        return utemp
+    def _get_and_reorder_utemp(self, id_elem, dtype=None):
+        # We can now read it in a single go! Already in the
+        # (npts, jpol, ipol, nvar) order of the compiled routines.
+        return self.meshes.merged.read_merged_element(id_elem, dtype=dtype)
 
     def _get_strain_interp(  # NOQA
         self,
@@ -288,36 +285,22 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
         eta,
     ):
         mesh = self.meshes.merged
-        if id_elem not in mesh.strain_buffer:
-            utemp = self._get_and_reorder_utemp(id_elem)
 
-            strain_fct_map = {
-                "monopole": sem_derivatives.strain_monopole_td,
-                "dipole": sem_derivatives.strain_dipole_td,
-                "quadpole": sem_derivatives.strain_quadpole_td,
-            }
+        def _compute_strains(strain_fct):
+            """
+            The strain of the horizontal and the vertical component computed
+            with ``strain_fct(displacement, excitation_type)``.
+            """
+            # Double precision as required by the strain routines.
+            utemp = self._get_and_reorder_utemp(id_elem, dtype=np.float64)
 
             # We want the cache to work - thus we always have to
             # calculate both! Also I/O is the slow part here.
 
             # Horizontal component is available if we have 3 or 5 components.
             if utemp.shape[-1] >= 3:
-                utemp_x = utemp[:, :, :, :3]
-                utemp_x = np.require(
-                    utemp_x, requirements=["F"], dtype=np.float64
-                )
-                strain_x = strain_fct_map["dipole"](
-                    utemp_x,
-                    G,
-                    GT,
-                    col_points_xi,
-                    col_points_eta,
-                    mesh.npol,
-                    mesh.ndumps,
-                    corner_points,
-                    eltype,
-                    axis,
-                )
+                # Slices along the last axis are still Fortran-ordered.
+                strain_x = strain_fct(utemp[:, :, :, :3], "dipole")
             else:
                 strain_x = None
 
@@ -328,21 +311,33 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
                 _s = list(utemp.shape)
                 if _s[-1] == 2:
                     _s[-1] = 3
-                    utemp_new = np.zeros(_s, dtype=utemp.dtype)
+                    utemp_new = np.zeros(_s, dtype=utemp.dtype, order="F")
                     utemp_new[:, :, :, 0] = utemp[:, :, :, 0]
                     utemp_new[:, :, :, 2] = utemp[:, :, :, 1]
                     utemp_z = utemp_new
-                # Reform all others.
+                # Reform all others in place - the horizontal strain has
+                # already been computed.
                 else:
                     utemp_z = utemp[:, :, :, -3:]
                     utemp_z[:, :, :, 0] = utemp_z[:, :, :, 1]
                     utemp_z[:, :, :, 1][:] = 0
-                    utemp_z = np.require(
-                        utemp_z, requirements=["F"], dtype=np.float64
-                    )
 
-                strain_z = strain_fct_map["monopole"](
-                    utemp_z,
+                strain_z = strain_fct(utemp_z, "monopole")
+            else:
+                strain_z = None
+
+            return strain_x, strain_z
+
+        def _load():
+            strain_fct_map = {
+                "monopole": sem_derivatives.strain_monopole_td,
+                "dipole": sem_derivatives.strain_dipole_td,
+                "quadpole": sem_derivatives.strain_quadpole_td,
+            }
+
+            def _strain(displacement, excitation_type):
+                return strain_fct_map[excitation_type](
+                    displacement,
                     G,
                     GT,
                     col_points_xi,
@@ -353,65 +348,90 @@ class ReciprocalMergedInstaseisDB(BaseNetCDFInstaseisDB):
                     eltype,
                     axis,
                 )
+
+            return _compute_strains(_strain)
+
+        def _strain_at_point(displacement, excitation_type):
+            return sem_derivatives.strain_interp_td(
+                displacement,
+                G,
+                GT,
+                col_points_xi,
+                col_points_eta,
+                mesh.npol,
+                mesh.ndumps,
+                corner_points,
+                eltype,
+                axis,
+                excitation_type,
+                xi,
+                eta,
+            )
+
+        def _interpolate():
+            # The strain at all points of the element is only needed if it
+            # is buffered - otherwise directly evaluate it at the point.
+            strains = self._get_buffered_strain(mesh, id_elem, _load)
+            if strains is not None:
+                strains = [
+                    None
+                    if strain is None
+                    else spectral_basis.lagrange_interpol_2D_td_batch(
+                        col_points_xi, col_points_eta, strain, xi, eta
+                    )
+                    for strain in strains
+                ]
             else:
-                strain_z = None
+                strains = _compute_strains(_strain_at_point)
 
-            mesh.strain_buffer.add(id_elem, (strain_x, strain_z))
-        else:
-            strain_x, strain_z = mesh.strain_buffer.get(id_elem)
-
-        all_strains = {}
-        for name, strain in (("strain_x", strain_x), ("strain_z", strain_z)):
-            if strain is None:
-                all_strains[name] = None
-                continue
-            final_strain = np.empty((strain.shape[0], 6), order="F")
-
-            for i in range(6):
-                final_strain[:, i] = spectral_basis.lagrange_interpol_2D_td(
-                    col_points_xi, col_points_eta, strain[:, :, :, i], xi, eta
-                )
+            all_strains = {}
+            for name, final_strain in zip(("strain_x", "strain_z"), strains):
+                if final_strain is None:
+                    all_strains[name] = None
+                    continue
+
+                if not name == "strain_z":
+                    final_strain[:, 3] *= -1.0
+                    final_strain[:, 5] *= -1.0
 
-            if not name == "strain_z":
-                final_strain[:, 3] *= -1.0
-                final_strain[:, 5] *= -1.0
+                # Might be buffered - must not be modified in place.
+                final_strain.flags.writeable = False
+                all_strains[name] = final_strain
 
-            all_strains[name] = final_strain
+            return all_strains["strain_x"], all_strains["strain_z"]
 
-        return all_strains["strain_x"], all_strains["strain_z"]
+        # The interpolation buffer is disabled by default - do not pay for
+        # the lookup then.
+        if not mesh.interp_buffer.enabled:
+            return _interpolate()
+
+        # Repeated requests for the same point (e.g. the same receivers for
+        # many sources) skip the interpolation.
+        return mesh.interp_buffer.get_or_load(
+            (id_elem, float(xi), float(eta)), _interpolate
+        )
 
     def _get_displacement(
         self, id_elem, gll_point_ids, col_points_xi, col_points_eta, xi, eta
     ):
         mesh = self.meshes.merged
-        if id_elem not in mesh.displ_buffer:
-            utemp = self._get_and_reorder_utemp(id_elem)
-            mesh.displ_buffer.add(id_elem, utemp)
-        else:
-            utemp = mesh.displ_buffer.get(id_elem)
-
-        final_displacement_x = np.empty((utemp.shape[0], 3), order="F")
-        utemp_x = utemp[:, :, :, :3]
-        utemp_x = np.require(utemp_x, requirements=["F"], dtype=np.float64)
-        for i in range(3):
-            final_displacement_x[
-                :, i
-            ] = spectral_basis.lagrange_interpol_2D_td(
-                col_points_xi, col_points_eta, utemp_x[:, :, :, i], xi, eta
-            )
+        utemp = mesh.displ_buffer.get_or_load(
+            id_elem, lambda: self._get_and_reorder_utemp(id_elem)
+        )
 
-        # Requires a copy to not modify the cached values in place because this
-        # array is later modified.
-        utemp_z = utemp[:, :, :, -3:].copy()
-        utemp_z[:, :, :, 0] = utemp_z[:, :, :, 1]
-        utemp_z[:, :, :, 1][:] = 0
-        utemp_z = np.require(utemp_z, requirements=["F"], dtype=np.float64)
-        final_displacement_z = np.empty((utemp.shape[0], 3), order="F")
-        for i in range(3):
-            final_displacement_z[
-                :, i
-            ] = spectral_basis.lagrange_interpol_2D_td(
-                col_points_xi, col_points_eta, utemp_z[:, :, :, i], xi, eta
-            )
+        final_displacement_x = spectral_basis.lagrange_interpol_2D_td_batch(
+            col_points_xi, col_points_eta, utemp[:, :, :, :3], xi, eta
+        )
+
+        # The vertical component only has disp_s and disp_z which are the
+        # last two. The interpolation is linear so they are interpolated
+        # first and then moved into place which does not require a copy of
+        # the buffered values.
+        displacement_z = spectral_basis.lagrange_interpol_2D_td_batch(
+            col_points_xi, col_points_eta, utemp[:, :, :, -2:], xi, eta
+        )
+        final_displacement_z = np.zeros((utemp.shape[0], 3), order="F")
+        final_displacement_z[:, 0] = displacement_z[:, 0]
+        final_displacement_z[:, 2] = displacement_z[:, 1]
 
         return final_displacement_x, final_displacement_z
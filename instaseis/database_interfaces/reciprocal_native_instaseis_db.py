@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Python library to extract seismograms from a set of wavefields generated by
+AxiSEM.
+
+:copyright:
+    Lion Krischer (lion.krischer@gmail.com), 2020
+:license:
+    GNU Lesser General Public License, Version 3 [non-commercial/academic use]
+    (http://www.gnu.org/copyleft/lgpl.html)
+"""
+from .native_mesh import NativeMesh
+from .reciprocal_merged_instaseis_db import ReciprocalMergedInstaseisDB
+
+
+class ReciprocalNativeInstaseisDB(ReciprocalMergedInstaseisDB):
+    """
+    Reciprocal Instaseis database in the native file format.
+
+    Takes the same arguments as the merged database with ``netcdf_file``
+    being the path to the native file. Without ``memory_map`` elements are
+    read with a single ``pread()`` each.
+    """
+
+    _mesh_class = NativeMesh
@@ -36,3 +36,57 @@ def inside_element(s, z, nodes, element_type, tolerance):
     )
 
     return in_element.value, xi.value, eta.value
+
+
+def inside_element_batch(s, z, nodes, element_types, tolerances):
+    """
+    Vectorized version of :func:`inside_element` for many points, each with
+    a number of candidate elements.
+
+    :param s: The s coordinates of the points, shape ``(n_points,)``.
+    :param z: The z coordinates of the points, shape ``(n_points,)``.
+    :param nodes: The corner points of the candidate elements, shape
+        ``(n_points, n_candidates, 4, 2)``.
+    :param element_types: The types of the candidate elements, shape
+        ``(n_points, n_candidates)``.
+    :param tolerances: The tolerances to test in the given order.
+
+    Returns the index of the first candidate element containing each point
+    (``-1`` if none of them does) as well as the reference coordinates xi
+    and eta in that element.
+    """
+    s = np.require(s, dtype=np.float64, requirements=["C_CONTIGUOUS"])
+    z = np.require(z, dtype=np.float64, requirements=["C_CONTIGUOUS"])
+    n_points, n_candidates = np.shape(element_types)
+    # Fortran expects nodes(4, 2, n_candidates, n_points).
+    nodes = np.require(
+        np.swapaxes(nodes, -1, -2),
+        dtype=np.float64,
+        requirements=["C_CONTIGUOUS"],
+    )
+    element_types = np.require(
+        element_types, dtype=np.int32, requirements=["C_CONTIGUOUS"]
+    )
+    tolerances = np.require(
+        tolerances, dtype=np.float64, requirements=["C_CONTIGUOUS"]
+    )
+
+    candidate = np.empty(n_points, dtype=np.int32)
+    xi = np.empty(n_points, dtype=np.float64)
+    eta = np.empty(n_points, dtype=np.float64)
+
+    lib.inside_element_batch(
+        C.c_int(n_points),
+        C.c_int(n_candidates),
+        C.c_int(len(tolerances)),
+        s.ctypes.data_as(C.POINTER(C.c_double)),
+        z.ctypes.data_as(C.POINTER(C.c_double)),
+        nodes.ctypes.data_as(C.POINTER(C.c_double)),
+        element_types.ctypes.data_as(C.POINTER(C.c_int)),
+        tolerances.ctypes.data_as(C.POINTER(C.c_double)),
+        candidate.ctypes.data_as(C.POINTER(C.c_int)),
+        xi.ctypes.data_as(C.POINTER(C.c_double)),
+        eta.ctypes.data_as(C.POINTER(C.c_double)),
+    )
+
+    return candidate, xi, eta
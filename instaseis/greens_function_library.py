@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Precomputed libraries of Green's functions.
+
+A library stores the ten component Seiscomp Green's functions of a reciprocal
+database on a grid of epicentral distances and source depths, for any number
+of sampling intervals and units. Requests for Green's functions on the grid
+are then a simple lookup in a chunked HDF5 file instead of a full extraction.
+
+:copyright:
+    Lion Krischer (lion.krischer@gmail.com), 2020
+:license:
+    GNU Lesser General Public License, Version 3 [non-commercial/academic use]
+    (http://www.gnu.org/copyleft/lgpl.html)
+"""
+import json
+
+import h5py
+import numpy as np
+from obspy import UTCDateTime
+
+from . import InstaseisNotFoundError
+from .database_interfaces.base_instaseis_db import (
+    BaseInstaseisDB,
+    _get_seismogram_times,
+)
+from .source import Receiver
+
+
+# Increase if the layout of the files changes.
+GREENS_FUNCTION_LIBRARY_VERSION = 2
+
+GREENS_FUNCTION_COMPONENTS = [
+    "TSS",
+    "ZSS",
+    "RSS",
+    "TDS",
+    "ZDS",
+    "RDS",
+    "ZDD",
+    "RDD",
+    "ZEP",
+    "REP",
+]
+
+# Distances and depths closer than this to a grid node are on the grid.
+_DISTANCE_TOLERANCE_IN_DEGREE = 1e-6
+_DEPTH_TOLERANCE_IN_M = 1e-3
+
+# The database information identifying the database a library has been
+# created from.
+_DATABASE_INFO_KEYS = {
+    "velocity_model": str,
+    "period": float,
+    "stf": str,
+    "dt": float,
+    "npts": int,
+    "src_shift": float,
+}
+
+
+def _get_database_identity(db):
+    return {
+        key: convert(db.info[key])
+        for key, convert in _DATABASE_INFO_KEYS.items()
+    }
+
+
+def _get_dataset_name(kind, dt):
+    return "greens_functions/%s_%s" % (
+        kind,
+        "native" if dt is None else repr(float(dt)),
+    )
+
+
+def create_greens_function_library(
+    db,
+    filename,
+    epicentral_distances_in_degree,
+    source_depths_in_m,
+    kinds=("displacement",),
+    dts=(None,),
+    kernelwidth=12,
+    compression=None,
+    progress_callback=None,
+):
+    """
+    Precompute the Seiscomp Green's functions of a database on a grid and
+    write them to an HDF5 file.
+
+    :param db: The reciprocal database with vertical and horizontal
+        components, e.g. opened with :func:`instaseis.open_db`.
+    :type db: Instaseis database
+    :param filename: The HDF5 file to write.
+    :type filename: str
+    :param epicentral_distances_in_degree: The epicentral distances of the
+        grid in increasing order.
+    :type epicentral_distances_in_degree: array of floats
+    :param source_depths_in_m: The source depths of the grid in increasing
+        order.
+    :type source_depths_in_m: array of floats
+    :param kinds: The desired units of the Green's functions. Any of
+        ``"displacement"``, ``"velocity"``, and ``"acceleration"``.
+    :type kinds: tuple of str
+    :param dts: The desired sampling intervals. ``None`` is the sampling
+        interval of the database.
+    :type dts: tuple of float
+    :param kernelwidth: The width of the sinc kernel used for resampling.
+    :type kernelwidth: int
+    :param compression: The HDF5 compression filter, e.g. ``"gzip"``.
+    :type compression: str
+    :param progress_callback: Optional callback function called with the
+        number of finished and the total number of grid nodes.
+    :type progress_callback: function
+    """
+    distances = np.array(epicentral_distances_in_degree, dtype=np.float64)
+    depths = np.array(source_depths_in_m, dtype=np.float64)
+    for name, values in (("Distances", distances), ("Depths", depths)):
+        if values.ndim != 1 or not len(values):
+            raise ValueError("%s must be a non-empty 1D array." % name)
+        if np.any(np.diff(values) <= 0):
+            raise ValueError("%s must be strictly increasing." % name)
+
+    # Test every combination once to fail early - this also runs all the
+    # sanity checks.
+    variants = [(kind, dt) for kind in kinds for dt in dts]
+    for kind, dt in variants:
+        db.get_greens_function(
+            distances[0],
+            depths[0],
+            kind=kind,
+            dt=dt,
+            kernelwidth=kernelwidth,
+            return_obspy_stream=False,
+        )
+
+    with h5py.File(filename, "w") as f:
+        f.attrs["version"] = GREENS_FUNCTION_LIBRARY_VERSION
+        f.attrs["components"] = json.dumps(GREENS_FUNCTION_COMPONENTS)
+        f.attrs["database"] = json.dumps(_get_database_identity(db))
+        f["epicentral_distances_in_degree"] = distances
+        f["source_depths_in_m"] = depths
+        mu = f.create_dataset(
+            "mu", shape=(len(distances), len(depths)), dtype=np.float64
+        )
+
+        index = []
+        datasets = []
+        for kind, dt in variants:
+            times = _get_seismogram_times(
+                info=db.info,
+                origin_time=UTCDateTime(0),
+                dt=dt,
+                kernelwidth=kernelwidth,
+                remove_source_shift=True,
+                reconvolve_stf=False,
+            )
+            shape = (
+                len(distances),
+                len(depths),
+                len(GREENS_FUNCTION_COMPONENTS),
+                times["npts"],
+            )
+            name = _get_dataset_name(kind, dt)
+            # One chunk per grid node - that is what is read per request.
+            datasets.append(
+                f.create_dataset(
+                    name,
+                    shape=shape,
+                    dtype=np.float64,
+                    chunks=(1, 1) + shape[2:],
+                    compression=compression,
+                )
+            )
+            index.append(
+                {
+                    "dataset": name,
+                    "kind": kind,
+                    "dt": dt,
+                    "kernelwidth": kernelwidth,
+                    "dt_out": db.info.dt if dt is None else dt,
+                    "npts": times["npts"],
+                }
+            )
+        f.attrs["index"] = json.dumps(index)
+
+        total = len(distances) * len(depths)
+        for _i, distance in enumerate(distances):
+            for _j, depth in enumerate(depths):
+                for (kind, dt), ds in zip(variants, datasets):
+                    data = db.get_greens_function(
+                        distance,
+                        depth,
+                        kind=kind,
+                        dt=dt,
+                        kernelwidth=kernelwidth,
+                        return_obspy_stream=False,
+                    )
+                    ds[_i, _j] = [
+                        data[_k] for _k in GREENS_FUNCTION_COMPONENTS
+                    ]
+                mu[_i, _j] = data["mu"]
+                if progress_callback:
+                    progress_callback(_i * len(depths) + _j + 1, total)
+
+
+class GreensFunctionLibrary(object):
+    """
+    A library of precomputed Green's functions written with
+    :func:`create_greens_function_library`.
+
+    :param filename: The HDF5 file.
+    :type filename: str
+    :param interpolate: Interpolate bilinearly between the closest grid
+        nodes for distances and depths that are not on the grid. Otherwise
+        only Green's functions on the grid nodes are available. The waveforms
+        are interpolated directly so this is only accurate for dense grids.
+    :type interpolate: bool
+    :param db: The database the library is used with. A ``ValueError`` is
+        raised if the library has been created from a database with a
+        different velocity model, dominant period, source time function,
+        sampling, or source shift.
+    :type db: Instaseis database
+    """
+
+    def __init__(self, filename, interpolate=False, db=None):
+        self.filename = filename
+        self.interpolate = interpolate
+        self.f = h5py.File(filename, "r")
+        version = self.f.attrs["version"]
+        if version != GREENS_FUNCTION_LIBRARY_VERSION:
+            raise ValueError(
+                "Green's function library version %d is not supported. "
+                "Please recreate it." % version
+            )
+        self.components = json.loads(self.f.attrs["components"])
+        self.database = json.loads(self.f.attrs["database"])
+        if db is not None:
+            try:
+                self._check_database(db)
+            except ValueError:
+                self.f.close()
+                raise
+        self.index = json.loads(self.f.attrs["index"])
+        self.epicentral_distances_in_degree = self.f[
+            "epicentral_distances_in_degree"
+        ][()]
+        self.source_depths_in_m = self.f["source_depths_in_m"][()]
+        self.mu = self.f["mu"][()]
+
+    def _check_database(self, db):
+        identity = _get_database_identity(db)
+        for key, value in sorted(self.database.items()):
+            if isinstance(value, float):
+                matches = np.isclose(value, identity[key], rtol=1e-6, atol=0)
+            else:
+                matches = value == identity[key]
+            if not matches:
+                raise ValueError(
+                    "The Green's function library has been created from a "
+                    "different database: %s is %r in the library but %r in "
+                    "the database." % (key, value, identity[key])
+                )
+
+    def reopen(self):
+        """
+        Open the file again, e.g. in a forked child process which should
+        not share the HDF5 file handle with its parent.
+        """
+        self.f = h5py.File(self.filename, "r")
+
+    def _get_index_entry(self, kind, dt, kernelwidth):
+        for entry in self.index:
+            if entry["kind"] != kind:
+                continue
+            if dt is None or entry["dt"] is None:
+                if dt == entry["dt"]:
+                    return entry
+            elif (
+                np.isclose(dt, entry["dt"])
+                and kernelwidth == entry["kernelwidth"]
+            ):
+                return entry
+        raise InstaseisNotFoundError(
+            "No Green's functions with units '%s' and dt %s in the library."
+            % (kind, dt)
+        )
+
+    def _get_weights(self, nodes, value, tolerance):
+        """
+        Returns the indices of the grid nodes and their weights.
+        """
+        idx = np.searchsorted(nodes, value)
+        for _i in (idx - 1, idx):
+            if 0 <= _i < len(nodes) and abs(nodes[_i] - value) <= tolerance:
+                return [(_i, 1.0)]
+        if not self.interpolate or idx == 0 or idx == len(nodes):
+            return None
+        w = (value - nodes[idx - 1]) / (nodes[idx] - nodes[idx - 1])
+        return [(idx - 1, 1.0 - w), (idx, w)]
+
+    def get_greens_function(
+        self,
+        epicentral_distance_in_degree,
+        source_depth_in_m,
+        origin_time=UTCDateTime(0),
+        kind="displacement",
+        return_obspy_stream=True,
+        dt=None,
+        kernelwidth=12,
+        definition="seiscomp",
+    ):
+        """
+        Get a Green's function from the library. Same interface as the
+        ``get_greens_function()`` method of the databases.
+
+        Raises an :class:`~instaseis.InstaseisNotFoundError` if the Green's
+        function is not part of the library.
+        """
+        if definition.lower() != "seiscomp":
+            raise NotImplementedError
+
+        entry = self._get_index_entry(kind, dt, kernelwidth)
+
+        distance_weights = self._get_weights(
+            self.epicentral_distances_in_degree,
+            epicentral_distance_in_degree,
+            _DISTANCE_TOLERANCE_IN_DEGREE,
+        )
+        depth_weights = self._get_weights(
+            self.source_depths_in_m, source_depth_in_m, _DEPTH_TOLERANCE_IN_M
+        )
+        if distance_weights is None or depth_weights is None:
+            raise InstaseisNotFoundError(
+                "Epicentral distance %g and source depth %g are not part of "
+                "the library."
+                % (epicentral_distance_in_degree, source_depth_in_m)
+            )
+
+        ds = self.f[entry["dataset"]]
+        greens = np.zeros(ds.shape[2:], dtype=np.float64)
+        mu = 0.0
+        for _i, w_i in distance_weights:
+            for _j, w_j in depth_weights:
+                greens += w_i * w_j * ds[_i, _j]
+                mu += w_i * w_j * self.mu[_i, _j]
+
+        data = {"mu": mu}
+        for _i, name in enumerate(self.components):
+            data[name] = greens[_i]
+
+        if not return_obspy_stream:
+            return data
+
+        return BaseInstaseisDB._convert_to_stream(
+            receiver=Receiver(90.0 - epicentral_distance_in_degree, 0.0),
+            components=self.components,
+            data=data,
+            dt_out=entry["dt_out"],
+            starttime=origin_time,
+            add_band_code=False,
+        )
@@ -67,7 +67,8 @@ def elliptic_to_geocentric_latitude(
     """
     Convert a latitude defined on an ellipsoid to a geocentric one.
 
-    :param lat: The latitude to convert.
+    :param lat: The latitude to convert. Arrays of latitudes are converted
+        element-wise.
     :param axis_a: The length of the major axis of the planet. Defaults to
         the value of the WGS84 ellipsoid.
     :param axis_b: The length of the minor axis of the planet. Defaults to
@@ -87,6 +88,16 @@ def elliptic_to_geocentric_latitude(
     _f = (axis_a - axis_b) / axis_a
     e_2 = 2 * _f - _f ** 2
 
+    if np.ndim(lat):
+        lat = np.asarray(lat, dtype=np.float64)
+        singular = (
+            (np.abs(lat) < 1e-6)
+            | (np.abs(lat - 90.0) < 1e-6)
+            | (np.abs(lat + 90.0) < 1e-6)
+        )
+        converted = np.degrees(np.arctan((1 - e_2) * np.tan(np.radians(lat))))
+        return np.where(singular, lat, converted)
+
     # Singularities close to the pole and the equator. Just return the value
     # in that case.
     if abs(lat) < 1e-6 or abs(lat - 90) < 1e-6 or abs(lat + 90.0) < 1e-6:
@@ -142,25 +153,114 @@ def sizeof_fmt(num):
     return "%3.1f %s" % (num, "TB")
 
 
+def find_runs(arr):
+    """
+    Find the runs of successive indices in an array of indices.
+
+    :param arr: The indices.
+    :returns: The first index and the index after the last one of each run
+        as two arrays.
+    """
+    arr = np.asarray(arr, dtype=np.int64).ravel()
+    if not len(arr):
+        return arr.copy(), arr.copy()
+    breaks = np.flatnonzero(np.diff(arr) != 1) + 1
+    starts = arr[np.concatenate([[0], breaks])]
+    stops = arr[np.concatenate([breaks - 1, [len(arr) - 1]])] + 1
+    return starts, stops
+
+
 def io_chunker(arr):
     """
     Assumes arr is an array of indices. Will return indices thus that
     adjacent items can be read in one go. Much faster for some cases!
     """
-    idx = []
-    for _i in range(len(arr)):
-        if _i == 0:
-            idx.append(arr[_i])
-            continue
-        diff = arr[_i] - arr[_i - 1]
-        if diff == 1:
-            if isinstance(idx[-1], list):
-                idx[-1][-1] += 1
-            else:
-                idx[-1] = [idx[-1], idx[-1] + 2]
-        else:
-            idx.append(arr[_i])
-    return idx
+    return [
+        _start if _stop - _start == 1 else [_start, _stop]
+        for _start, _stop in zip(*(_i.tolist() for _i in find_runs(arr)))
+    ]
+
+
+def plan_reads(ids, max_gap=0):
+    """
+    Plan the reads of the data for a sorted array of unique indices.
+
+    Runs of successive indices separated by at most ``max_gap`` unneeded
+    indices are merged into one larger read. Fewer but larger reads are much
+    faster on some (parallel) file systems.
+
+    :param ids: The sorted and unique indices.
+    :param max_gap: The maximum number of unneeded indices to read in
+        between two runs.
+    :returns: A list of ``(start, stop)`` tuples of the reads and the
+        position of each index in the concatenated data of all reads.
+    """
+    ids = np.asarray(ids, dtype=np.int64).ravel()
+    starts, stops = find_runs(ids)
+    if not len(starts):
+        return [], np.empty(0, dtype=np.intp)
+
+    # Start a new read wherever the gap to the previous run is too large.
+    is_new = np.concatenate([[True], starts[1:] - stops[:-1] > max_gap])
+    read_starts = starts[is_new]
+    read_stops = stops[np.concatenate([is_new[1:], [True]])]
+
+    offsets = np.concatenate([[0], np.cumsum(read_stops - read_starts)[:-1]])
+    idx = np.searchsorted(read_starts, ids, side="right") - 1
+    positions = (ids - read_starts[idx] + offsets[idx]).astype(np.intp)
+
+    return list(zip(read_starts.tolist(), read_stops.tolist())), positions
+
+
+def sort_gll_point_ids(gll_point_ids):
+    """
+    Sort the GLL point ids of an element which can then be read in one go.
+
+    :param gll_point_ids: The ids with shape ``(npol + 1, npol + 1)``,
+        indexed by ``[ipol, jpol]``.
+    :returns: The sorted ids and the position of each point in them as an
+        array indexed by ``[jpol, ipol]``. Indexing data read for the sorted
+        ids with it brings them into the (jpol, ipol) order of the element.
+    """
+    gll_point_ids = np.asarray(gll_point_ids)
+    ids = gll_point_ids.ravel()
+    order = np.argsort(ids, kind="stable")
+    positions = np.empty(len(ids), dtype=np.intp)
+    positions[order] = np.arange(len(ids))
+    return ids[order], positions.reshape(gll_point_ids.shape).T
+
+
+def get_morton_codes(points):
+    """
+    Position of 3D points along a Morton (Z-order) space-filling curve.
+
+    Points close to each other in space mostly have similar codes so
+    sorting by them groups nearby points.
+
+    :param points: The points with shape ``(n, 3)``.
+    :returns: The codes as unsigned 64 bit integers.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    # Quantize every axis to 21 bits which fit three times into 64 bits.
+    lower = points.min(axis=0)
+    extent = points.max(axis=0) - lower
+    extent[extent == 0] = 1.0
+    quantized = ((points - lower) / extent * (2 ** 21 - 1)).astype(np.uint64)
+
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for axis in range(3):
+        # Spread the bits so there are two zeros between each of them.
+        v = quantized[:, axis]
+        for shift, mask in (
+            (32, 0x1F00000000FFFF),
+            (16, 0x1F0000FF0000FF),
+            (8, 0x100F00F00F00F00F),
+            (4, 0x10C30C30C30C30C3),
+            (2, 0x1249249249249249),
+        ):
+            v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+        codes |= v << np.uint64(axis)
+    return codes
 
 
 def rfftfreq(n, d=1.0):  # pragma: no cover
@@ -3,6 +3,10 @@
 """
 Functions dealing with rotations.
 
+All functions also work on arrays: vectors and tensors (in voigt notation)
+are stacked along the first axis, i.e. they have the shape (3, ...) or
+(6, ...), and the angles broadcast against the remaining axes.
+
 :copyright:
     Martin van Driel (Martin@vanDriel.de), 2020
     Lion Krischer (lion.krischer@gmail.com), 2020
@@ -13,6 +17,52 @@ Functions dealing with rotations.
 import numpy as np
 
 
+def _voigt_to_matrix(mt):
+    mt = np.asarray(mt)
+    return np.array(
+        [
+            [mt[0], mt[5], mt[4]],  # NOQA
+            [mt[5], mt[1], mt[3]],
+            [mt[4], mt[3], mt[2]],
+        ]
+    )
+
+
+def _matrix_to_voigt(B):  # NOQA
+    return np.array([B[0, 0], B[1, 1], B[2, 2], B[1, 2], B[0, 2], B[0, 1]])
+
+
+def _tnm_rotation_matrix(phi, theta):
+    """
+    Rotation matrix from TNM 2007 eq 14 of shape (3, 3, ...).
+    """
+    phi, theta = np.broadcast_arrays(phi, theta)
+    ct = np.cos(theta)
+    cp = np.cos(phi)
+    st = np.sin(theta)
+    sp = np.sin(phi)
+
+    return np.array(
+        [
+            [ct * cp, -sp, st * cp],
+            [ct * sp, cp, st * sp],
+            [-st, np.zeros_like(ct), ct],
+        ]
+    )
+
+
+def _identity_matrices(*angles):
+    """
+    Identity matrices of shape (3, 3, ...) for the broadcast angles.
+    """
+    shape = np.broadcast(*angles).shape
+    return np.array(
+        np.broadcast_to(
+            np.eye(3).reshape((3, 3) + (1,) * len(shape)), (3, 3) + shape
+        )
+    )
+
+
 def rotate_frame_rd(x, y, z, phi, theta):
     phi = np.deg2rad(phi)
     theta = np.deg2rad(theta)
@@ -29,10 +79,7 @@ def rotate_frame_rd(x, y, z, phi, theta):
     srd = np.sqrt(xp ** 2 + yp ** 2)
     zrd = zp
     phi_cp = np.arctan2(yp, xp)
-    if phi_cp < 0.0:
-        phird = 2.0 * np.pi + phi_cp
-    else:
-        phird = phi_cp
+    phird = phi_cp + 2.0 * np.pi * (phi_cp < 0.0)
     return srd, phird, zrd
 
 
@@ -50,22 +97,8 @@ def rotate_symm_tensor_voigt_xyz_earth_to_xyz_src(mt, phi, theta):
     compute and ouput in voigt notation:
     Rt.A.R
     """
-    A = np.array(
-        [
-            [mt[0], mt[5], mt[4]],  # NOQA
-            [mt[5], mt[1], mt[3]],
-            [mt[4], mt[3], mt[2]],
-        ]
-    )
-
-    ct = np.cos(theta)
-    cp = np.cos(phi)
-    st = np.sin(theta)
-    sp = np.sin(phi)
-
-    R = np.array(
-        [[ct * cp, -sp, st * cp], [ct * sp, cp, st * sp], [-st, 0, ct]]  # NOQA
-    )
+    A = _voigt_to_matrix(mt)  # NOQA
+    R = _tnm_rotation_matrix(phi, theta)  # NOQA
 
     # This double matrix product involves number that might differ by 20
     # orders of magnitudes which makes it numerically tricky. Thus we employ
@@ -73,13 +106,11 @@ def rotate_symm_tensor_voigt_xyz_earth_to_xyz_src(mt, phi, theta):
     R = np.require(R, dtype=np.float128)  # NOQA
     A = np.require(A, dtype=np.float128)  # NOQA
 
-    B = np.dot(np.dot(R.T, A), R)  # NOQA
+    B = np.einsum("ji...,jk...->ik...", R, A)  # NOQA
+    B = np.einsum("ij...,jk...->ik...", B, R)  # NOQA
 
     # Convert back to single precision.
-    return np.require(
-        np.array([B[0, 0], B[1, 1], B[2, 2], B[1, 2], B[0, 2], B[0, 1]]),
-        dtype=np.float64,
-    )
+    return np.require(_matrix_to_voigt(B), dtype=np.float64)
 
 
 def rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(mt, phi, theta):
@@ -96,25 +127,12 @@ def rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(mt, phi, theta):
     compute and ouput in voigt notation:
     R.A.Rt
     """
-    A = np.array(
-        [
-            [mt[0], mt[5], mt[4]],  # NOQA
-            [mt[5], mt[1], mt[3]],
-            [mt[4], mt[3], mt[2]],
-        ]
-    )
-
-    ct = np.cos(theta)
-    cp = np.cos(phi)
-    st = np.sin(theta)
-    sp = np.sin(phi)
-
-    R = np.array(
-        [[ct * cp, -sp, st * cp], [ct * sp, cp, st * sp], [-st, 0, ct]]  # NOQA
-    )
+    A = _voigt_to_matrix(mt)  # NOQA
+    R = _tnm_rotation_matrix(phi, theta)  # NOQA
 
-    B = np.dot(np.dot(R, A), R.T)  # NOQA
-    return np.array([B[0, 0], B[1, 1], B[2, 2], B[1, 2], B[0, 2], B[0, 1]])
+    B = np.einsum("ij...,jk...->ik...", R, A)  # NOQA
+    B = np.einsum("ij...,kj...->ik...", B, R)  # NOQA
+    return _matrix_to_voigt(B)
 
 
 def rotate_symm_tensor_voigt_xyz_to_src(mt, phi):
@@ -131,21 +149,18 @@ def rotate_symm_tensor_voigt_xyz_to_src(mt, phi):
     compute and ouput in voigt notation:
     R.A.Rt
     """
-    A = np.array(
-        [
-            [mt[0], mt[5], mt[4]],  # NOQA
-            [mt[5], mt[1], mt[3]],
-            [mt[4], mt[3], mt[2]],
-        ]
-    )
+    A = _voigt_to_matrix(mt)  # NOQA
 
     cp = np.cos(phi)
     sp = np.sin(phi)
+    zero = np.zeros_like(cp)
+    one = np.ones_like(cp)
 
-    R = np.array([[cp, sp, 0.0], [-sp, cp, 0], [0, 0, 1.0]])  # NOQA
+    R = np.array([[cp, sp, zero], [-sp, cp, zero], [zero, zero, one]])  # NOQA
 
-    B = np.dot(np.dot(R, A), R.T)  # NOQA
-    return np.array([B[0, 0], B[1, 1], B[2, 2], B[1, 2], B[0, 2], B[0, 1]])
+    B = np.einsum("ij...,jk...->ik...", R, A)  # NOQA
+    B = np.einsum("ij...,kj...->ik...", B, R)  # NOQA
+    return _matrix_to_voigt(B)
 
 
 def rotate_vector_xyz_earth_to_xyz_src(vec, phi, theta):
@@ -201,21 +216,21 @@ def rotate_vector_src_to_xyz(vec, phi):
 def rotate_vector_src_to_NEZ(  # NOQA
     vec, phi, srclon, srccolat, reclon, reccolat
 ):
-    rotmat = np.eye(3)
+    rotmat = _identity_matrices(phi, srclon, srccolat, reclon, reccolat)
     rotmat = rotate_vector_src_to_xyz(rotmat, phi)
     rotmat = rotate_vector_xyz_src_to_xyz_earth(rotmat, srclon, srccolat)
     rotmat = rotate_vector_xyz_earth_to_xyz_src(rotmat, reclon, reccolat)
-    rotmat[0, :] *= -1  # N = - theta
+    rotmat[0] *= -1  # N = - theta
 
-    return np.dot(rotmat, vec)
+    return np.einsum("ij...,j...->i...", rotmat, vec)
 
 
 def rotate_vector_xyz_src_to_xyz_rec(vec, srclon, srccolat, reclon, reccolat):
-    rotmat = np.eye(3)
+    rotmat = _identity_matrices(srclon, srccolat, reclon, reccolat)
     rotmat = rotate_vector_xyz_src_to_xyz_earth(rotmat, srclon, srccolat)
     rotmat = rotate_vector_xyz_earth_to_xyz_src(rotmat, reclon, reccolat)
 
-    return np.dot(rotmat, vec)
+    return np.einsum("ij...,j...->i...", rotmat, vec)
 
 
 def coord_transform_lat_lon_depth_to_xyz(
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Precompute the Green's functions of a local Instaseis database on a regular
+grid of epicentral distances and source depths and store them in a library.
+
+The library can be passed to the Instaseis server with the
+``--greens_function_library`` argument which will then serve Green's
+functions on the grid without extracting them from the database.
+
+
+Usage:
+
+.. code-block:: bash
+
+    $ python -m instaseis.scripts.create_greens_function_library \\
+        --min_distance=0 --max_distance=180 --distance_step=1 \\
+        --min_depth=0 --max_depth=700000 --depth_step=10000 \\
+        --kind=displacement --kind=velocity --dt=1.0 DB greens.h5
+
+
+Requires click and Instaseis.
+
+:copyright:
+    Lion Krischer (lion.krischer@gmail.com), 2020
+:license:
+    GNU Lesser General Public License, Version 3 [non-commercial/academic use]
+    (http://www.gnu.org/copyleft/lgpl.html)
+"""
+import click
+import numpy as np
+
+import instaseis
+from instaseis.greens_function_library import create_greens_function_library
+
+
+def _get_axis(minimum, maximum, step):
+    # Include the maximum if it is on the grid.
+    return np.arange(minimum, maximum + step / 2.0, step)
+
+
+@click.command()
+@click.argument(
+    "database", type=click.Path(exists=True, file_okay=False, dir_okay=True)
+)
+@click.argument("output_file", type=click.Path(exists=False))
+@click.option("--min_distance", type=float, default=0.0, show_default=True)
+@click.option("--max_distance", type=float, default=180.0, show_default=True)
+@click.option("--distance_step", type=float, default=1.0, show_default=True)
+@click.option("--min_depth", type=float, required=True, help="In meters.")
+@click.option("--max_depth", type=float, required=True, help="In meters.")
+@click.option("--depth_step", type=float, required=True, help="In meters.")
+@click.option(
+    "--kind",
+    type=click.Choice(["displacement", "velocity", "acceleration"]),
+    multiple=True,
+    help="Units of the Green's functions. Can be given multiple times. "
+    "Defaults to displacement.",
+)
+@click.option(
+    "--dt",
+    type=float,
+    multiple=True,
+    help="Sampling intervals of the Green's functions. Can be given "
+    "multiple times. Defaults to the sampling interval of the database.",
+)
+@click.option("--kernelwidth", type=int, default=12, show_default=True)
+@click.option(
+    "--compression",
+    type=click.Choice(["gzip", "lzf"]),
+    default=None,
+    help="HDF5 compression filter.",
+)
+def create_library(
+    database,
+    output_file,
+    min_distance,
+    max_distance,
+    distance_step,
+    min_depth,
+    max_depth,
+    depth_step,
+    kind,
+    dt,
+    kernelwidth,
+    compression,
+):
+    db = instaseis.open_db(database)
+    distances = _get_axis(min_distance, max_distance, distance_step)
+    depths = _get_axis(min_depth, max_depth, depth_step)
+
+    with click.progressbar(
+        length=len(distances) * len(depths), label="Grid nodes"
+    ) as bar:
+
+        def progress_callback(current, total):
+            bar.update(1)
+
+        create_greens_function_library(
+            db=db,
+            filename=output_file,
+            epicentral_distances_in_degree=distances,
+            source_depths_in_m=depths,
+            kinds=kind or ("displacement",),
+            dts=dt or (None,),
+            kernelwidth=kernelwidth,
+            compression=compression,
+            progress_callback=progress_callback,
+        )
+
+    click.echo(
+        click.style(
+            "--> Wrote library with %i x %i grid nodes to '%s'"
+            % (len(distances), len(depths), output_file),
+            fg="green",
+        )
+    )
+
+
+if __name__ == "__main__":
+    create_library()
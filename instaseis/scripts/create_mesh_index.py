@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Write the on-disk mesh index of local Instaseis databases.
+
+The index is a folder next to the netCDF file containing the mesh. It stores
+the points of the kd-tree and the connectivity arrays so they do not have
+to be read every time the database is opened. It is automatically used as
+long as it matches the database file.
+
+
+Usage:
+
+.. code-block:: bash
+
+    $ python -m instaseis.scripts.create_mesh_index DB1 DB2
+
+
+Requires click and Instaseis.
+
+:copyright:
+    Lion Krischer (lion.krischer@gmail.com), 2020
+:license:
+    GNU Lesser General Public License, Version 3 [non-commercial/academic use]
+    (http://www.gnu.org/copyleft/lgpl.html)
+"""
+import click
+import instaseis
+
+
+@click.command(
+    help="Write the on-disk mesh index for each of the passed local "
+    "databases."
+)
+@click.argument(
+    "databases",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    nargs=-1,
+)
+def create_mesh_index(databases):
+    for database in databases:
+        db = instaseis.open_db(database)
+        db.parsed_mesh.write_index()
+        click.echo(
+            click.style(
+                "--> Wrote index '%s'" % db.parsed_mesh.index_folder,
+                fg="green",
+            )
+        )
+
+
+if __name__ == "__main__":
+    create_mesh_index()
@@ -3,7 +3,8 @@
 """
 Repacking Instaseis databases.
 
-Requires click, netCDF4, and numpy.
+Requires click, netCDF4, and numpy. Writing native databases also requires
+Instaseis.
 
 :copyright:
     Lion Krischer (lion.krischer@gmail.com), 2020
@@ -14,7 +15,9 @@ Requires click, netCDF4, and numpy.
 import contextlib
 import math
 import os
+import shutil
 import sys
+import tempfile
 
 import click
 import netCDF4
@@ -566,16 +569,40 @@ def _merge_files(input, out, contiguous, compression_level, quiet):
 )
 @click.option(
     "--method",
-    type=click.Choice(["transpose", "repack", "merge"]),
+    type=click.Choice(["transpose", "repack", "merge", "native"]),
     required=True,
     help="`transpose` will transpose the data arrays which "
     "oftentimes results in faster extraction times. `repack` "
     "will just repack the data and solve some compatibility "
     "issues. `merge` will create a single much larger file "
-    "which is much quicker to read but will take more space.",
+    "which is much quicker to read but will take more space. "
+    "`native` will create a merged file in the Instaseis-native "
+    "format which can be read without HDF5.",
+)
+@click.option(
+    "--dtype",
+    type=click.Choice(["float32", "float16"]),
+    default="float32",
+    show_default=True,
+    help="Data type of the `native` format. `float16` halves the size "
+    "of the file at the cost of some precision.",
+)
+@click.option(
+    "--alignment",
+    type=int,
+    default=4096,
+    show_default=True,
+    help="Alignment in bytes of the data of each element in the "
+    "`native` format. Must be a power of two.",
 )
 def repack_database(
-    input_folder, output_folder, contiguous, compression_level, method
+    input_folder,
+    output_folder,
+    contiguous,
+    compression_level,
+    method,
+    dtype,
+    alignment,
 ):
     found_filenames = []
     for root, _, filenames in os.walk(input_folder, followlinks=True):
@@ -639,6 +666,45 @@ def repack_database(
             compression_level=compression_level,
             quiet=False,
         )
+    elif method == "native":
+        from instaseis.database_interfaces.native_mesh import (
+            NATIVE_FILENAME,
+            write_native_file,
+        )
+
+        # Native files are converted from a temporary merged file.
+        merged_folder = tempfile.mkdtemp(dir=output_folder)
+        try:
+            merge_files(
+                filenames=found_filenames,
+                output_folder=merged_folder,
+                contiguous=True,
+                compression_level=None,
+                quiet=False,
+            )
+            merged_filename = os.path.join(merged_folder, "merged_output.nc4")
+            with netCDF4.Dataset(merged_filename, "r", format="NETCDF4") as f:
+                nelem = f.getncattr("nelem_kwf_global")
+
+            click.echo(
+                click.style("\tCreating '%s'..." % NATIVE_FILENAME, fg="blue")
+            )
+            with click.progressbar(length=nelem, label="\t  ") as bar:
+
+                def progress_callback(current, total):
+                    bar.update(1)
+
+                write_native_file(
+                    input_filename=merged_filename,
+                    output_filename=os.path.join(
+                        output_folder, NATIVE_FILENAME
+                    ),
+                    dtype=dtype,
+                    alignment=alignment,
+                    progress_callback=progress_callback,
+                )
+        finally:
+            shutil.rmtree(merged_folder)
     else:
         raise NotImplementedError
 
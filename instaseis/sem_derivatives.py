@@ -104,3 +104,58 @@ def strain_quadpole_td(
         axial,
         lib.strain_quadpole_td,
     )
+
+
+EXCITATION_TYPES = {"monopole": 1, "dipole": 2, "quadpole": 3}
+
+
+def strain_interp_td(
+    u,
+    G,  # NOQA
+    GT,  # NOQA
+    xi,
+    eta,
+    npol,
+    nsamp,
+    nodes,
+    element_type,
+    axial,
+    excitation_type,
+    x1,
+    x2,
+):
+    """
+    Strain at the point (x1, x2) in reference coordinates of the element,
+    same as interpolating the result of the strain_*_td() functions but
+    without computing the strain at all GLL points of the element.
+
+    Returns an array of shape (nsamp, 6).
+    """
+    strain = np.zeros((nsamp, 6), np.float64, order="F")
+    u = np.require(u, dtype=np.float64, requirements=["F_CONTIGUOUS"])
+    G = np.require(G, dtype=np.float64, requirements=["F_CONTIGUOUS"])  # NOQA
+    GT = np.require(
+        GT, dtype=np.float64, requirements=["F_CONTIGUOUS"]  # NOQA
+    )
+    xi = np.require(xi, dtype=np.float64, requirements=["F_CONTIGUOUS"])
+    eta = np.require(eta, dtype=np.float64, requirements=["F_CONTIGUOUS"])
+    nodes = np.require(nodes, dtype=np.float64, requirements=["F_CONTIGUOUS"])
+
+    lib.strain_interp_td(
+        u.ctypes.data_as(C.POINTER(C.c_double)),
+        G.ctypes.data_as(C.POINTER(C.c_double)),
+        GT.ctypes.data_as(C.POINTER(C.c_double)),
+        xi.ctypes.data_as(C.POINTER(C.c_double)),
+        eta.ctypes.data_as(C.POINTER(C.c_double)),
+        C.c_int(npol),
+        C.c_int(nsamp),
+        nodes.ctypes.data_as(C.POINTER(C.c_double)),
+        C.c_int(element_type),
+        C.c_bool(axial),
+        C.c_int(EXCITATION_TYPES[excitation_type]),
+        C.c_double(x1),
+        C.c_double(x2),
+        strain.ctypes.data_as(C.POINTER(C.c_double)),
+    )
+
+    return strain
@@ -27,6 +27,20 @@ if __name__ == "__main__":
         default=100,
         help="Size of the buffer in MB",
     )
+    parser.add_argument(
+        "--buffer_policy",
+        type=str,
+        default="lru",
+        choices=["lru", "lfu", "arc", "tinylfu"],
+        help="Policy determining which items are removed from full buffers.",
+    )
+    parser.add_argument(
+        "--num_processes",
+        type=int,
+        default=1,
+        help="Number of server processes sharing the mesh and one buffer. "
+        "0 launches one process per CPU.",
+    )
     parser.add_argument(
         "--max_size_of_finite_sources",
         type=int,
@@ -35,6 +49,19 @@ if __name__ == "__main__":
         "a single finite source for the /finite_source "
         "route.",
     )
+    parser.add_argument(
+        "--greens_function_library",
+        type=str,
+        default=None,
+        help="Precomputed Green's function library to serve Green's "
+        "functions from.",
+    )
+    parser.add_argument(
+        "--interpolate_greens_functions",
+        action="store_true",
+        help="Interpolate between the grid nodes of the Green's function "
+        "library.",
+    )
 
     parser.add_argument("db_path", type=str, help="Database path")
     parser.add_argument(
@@ -57,7 +84,11 @@ if __name__ == "__main__":
         db_path=db_path,
         port=args.port,
         buffer_size_in_mb=args.buffer_size_in_mb,
+        num_processes=args.num_processes,
+        buffer_policy=args.buffer_policy,
         max_size_of_finite_sources=args.max_size_of_finite_sources,
         quiet=args.quiet,
         log_level=args.log_level,
+        greens_function_library=args.greens_function_library,
+        interpolate_greens_functions=args.interpolate_greens_functions,
     )
@@ -12,10 +12,14 @@ Server offering a REST API for Instaseis.
 import logging
 
 import tornado.gen
+import tornado.httpserver
 import tornado.ioloop
+import tornado.netutil
+import tornado.process
 import tornado.web
 
 from ..database_interfaces import find_and_open_files
+from ..greens_function_library import GreensFunctionLibrary
 
 from .routes.coordinates import CoordinatesHandler
 from .routes.events import EventHandler
@@ -66,6 +70,10 @@ def launch_io_loop(
     station_coordinates_callback=None,
     event_info_callback=None,
     travel_time_callback=None,
+    num_processes=1,
+    buffer_policy="lru",
+    greens_function_library=None,
+    interpolate_greens_functions=False,
 ):  # pragma: no cover
     """
     Launch the instaseis server.
@@ -87,13 +95,38 @@ def launch_io_loop(
         information. If not given, certain requests will not be available.
     :param travel_time_callback: A callback function returning the travel
         time for certain seismic phase and a given source/receiver geometry.
+    :param num_processes: The number of server processes. If not 1, the
+        database is opened once with its buffers in shared memory and then
+        the given number of worker processes is forked. All of them share
+        the mesh and a single warm buffer. 0 forks one process per CPU.
+    :param buffer_policy: The policy determining which items are removed
+        from the full buffers. One of ``"lru"``, ``"lfu"``, ``"arc"``, or
+        ``"tinylfu"``. Only ``"lru"`` is available with ``num_processes``
+        other than 1.
+    :param greens_function_library: Path to a precomputed Green's function
+        library. Green's function requests are served from it if possible
+        and otherwise extracted from the database. It must have been created
+        from the same database.
+    :param interpolate_greens_functions: Interpolate between the grid nodes
+        of the Green's function library.
     """
     application = get_application()
     application.db = find_and_open_files(
-        path=db_path, buffer_size_in_mb=buffer_size_in_mb
+        path=db_path,
+        buffer_size_in_mb=buffer_size_in_mb,
+        shared_buffers=num_processes != 1,
+        buffer_policy=buffer_policy,
     )
     application.station_coordinates_callback = station_coordinates_callback
     application.event_info_callback = event_info_callback
+    if greens_function_library:
+        application.greens_function_library = GreensFunctionLibrary(
+            greens_function_library,
+            interpolate=interpolate_greens_functions,
+            db=application.db,
+        )
+    else:
+        application.greens_function_library = None
 
     # This is a callback as currently the instaseis databases don't store
     # the 1D model so we need a way to specify the actually used model. Also
@@ -129,5 +162,18 @@ def launch_io_loop(
         app_log.info("Successfully opened DB")
         app_log.info(str(application.db))
 
-    application.listen(port)
+    if num_processes == 1:
+        application.listen(port)
+    else:
+        sockets = tornado.netutil.bind_sockets(port)
+        tornado.process.fork_processes(num_processes)
+        # Each worker needs its own HDF5 file handles - everything else has
+        # been inherited from the parent process.
+        for mesh in application.db.meshes:
+            if mesh is not None:
+                mesh.reopen()
+        if application.greens_function_library is not None:
+            application.greens_function_library.reopen()
+        server = tornado.httpserver.HTTPServer(application)
+        server.add_sockets(sockets)
     tornado.ioloop.IOLoop.instance().start()
@@ -16,7 +16,7 @@ import obspy
 import tornado.gen
 import tornado.web
 
-from ... import Source, Receiver, ForceSource
+from ... import Source, Receiver, ForceSource, InstaseisNotFoundError
 from ..util import _validtimesetting, _validate_and_write_waveforms
 from ..instaseis_request import InstaseisTimeSeriesHandler
 
@@ -36,6 +36,7 @@ def _get_greens(
     endtime,
     format,
     label,
+    library=None,
 ):
     """
     Extract a Green's function from the passed db and write it either to a
@@ -52,18 +53,29 @@ def _get_greens(
     :param endtime: The desired end time of the seismogram.
     :param format: The output format. Either "miniseed" or "saczip".
     :param label: Prefix for the filename within the SAC zip file.
+    :param library: An optional precomputed Green's function library. It is
+        used if it contains the requested Green's function, otherwise the
+        Green's function is extracted from the database.
     """
+    kwargs = dict(
+        epicentral_distance_in_degree=epicentral_distance_degree,
+        source_depth_in_m=source_depth_in_m,
+        origin_time=origintime,
+        kind=units,
+        return_obspy_stream=True,
+        dt=dt,
+        kernelwidth=kernelwidth,
+        definition="seiscomp",
+    )
+    st = None
+    if library is not None:
+        try:
+            st = library.get_greens_function(**kwargs)
+        except InstaseisNotFoundError:
+            pass
     try:
-        st = db.get_greens_function(
-            epicentral_distance_in_degree=epicentral_distance_degree,
-            source_depth_in_m=source_depth_in_m,
-            origin_time=origintime,
-            kind=units,
-            return_obspy_stream=True,
-            dt=dt,
-            kernelwidth=kernelwidth,
-            definition="seiscomp",
-        )
+        if st is None:
+            st = db.get_greens_function(**kwargs)
     except Exception:
         msg = (
             "Could not extract Green's function. Make sure, the parameters "
@@ -222,6 +234,7 @@ class GreensFunctionHandler(InstaseisTimeSeriesHandler):
         response, mu = yield executor.submit(
             _get_greens,
             db=self.application.db,
+            library=self.application.greens_function_library,
             epicentral_distance_degree=args.sourcedistanceindegrees,
             source_depth_in_m=args.sourcedepthinmeters,
             units=args.units,
@@ -11,6 +11,7 @@ Source and Receiver classes of Instaseis.
     (http://www.gnu.org/copyleft/lgpl.html)
 """
 import collections
+import copy
 import functools
 import io
 import numpy as np
@@ -21,6 +22,7 @@ from obspy.signal.util import next_pow_2
 import obspy.io.xseed.parser
 import os
 from numpy import interp
+import scipy.signal
 
 from . import ReceiverParseError, SourceParseError
 from . import rotations
@@ -142,27 +144,31 @@ def strike_dip_rake_from_ln(l, n):
 
     :return (strike, dip, rake): strike, dip and rake
     :type (strike, dip, rake): tuple of floats
+
+    ``l`` and ``n`` can also be arrays of shape ``(3, ...)`` in which case
+    arrays of strikes, dips, and rakes are returned.
     """
-    l_norm = l / (l ** 2).sum()
-    n_norm = n / (n ** 2).sum()
+    l_norm = l / (l ** 2).sum(axis=0)
+    n_norm = n / (n ** 2).sum(axis=0)
 
     delta = np.arccos(n_norm[2])
     phi = np.arctan2(n_norm[0], n_norm[1])
 
     # needs two different formulas, beqause the first is unstable for dip = 0
     # and the second for dip = 90
-    if delta > 0.1:
-        lambd = np.arctan2(
+    lambd = np.where(
+        delta > 0.1,
+        np.arctan2(
             l_norm[2],
             np.sin(delta)
             * (-l_norm[0] * np.cos(phi) + l_norm[1] * np.sin(phi)),
-        )
-    else:
-        lambd = np.arctan2(
+        ),
+        np.arctan2(
             (-l_norm[0] * np.sin(phi) - l_norm[1] * np.cos(phi)),
             np.cos(delta)
             * (-l_norm[0] * np.cos(phi) + l_norm[1] * np.sin(phi)),
-        )
+        ),
+    )
 
     strike = np.rad2deg(phi)
     dip = np.rad2deg(delta)
@@ -171,6 +177,50 @@ def strike_dip_rake_from_ln(l, n):
     return strike, dip, rake
 
 
+def _strike_dip_rake_to_tensor(strike, dip, rake, M0):  # NOQA
+    """
+    Moment tensor components ``(m_rr, m_tt, m_pp, m_rt, m_rp, m_tp)`` of a
+    shear source. Works with floats and arrays.
+    """
+    # formulas in Udias (17.24) are in geographic system North, East,
+    # Down, which # transforms to the geocentric as:
+    # Mtt =  Mxx, Mpp = Myy, Mrr =  Mzz
+    # Mrp = -Myz, Mrt = Mxz, Mtp = -Mxy
+    # voigt in tpr: Mtt Mpp Mrr Mrp Mrt Mtp
+    phi = np.deg2rad(strike)
+    delta = np.deg2rad(dip)
+    lambd = np.deg2rad(rake)
+
+    m_tt = (
+        -np.sin(delta) * np.cos(lambd) * np.sin(2.0 * phi)
+        - np.sin(2.0 * delta) * np.sin(phi) ** 2.0 * np.sin(lambd)
+    ) * M0
+
+    m_pp = (
+        np.sin(delta) * np.cos(lambd) * np.sin(2.0 * phi)
+        - np.sin(2.0 * delta) * np.cos(phi) ** 2.0 * np.sin(lambd)
+    ) * M0
+
+    m_rr = (np.sin(2.0 * delta) * np.sin(lambd)) * M0
+
+    m_rp = (
+        -np.cos(phi) * np.sin(lambd) * np.cos(2.0 * delta)
+        + np.cos(delta) * np.cos(lambd) * np.sin(phi)
+    ) * M0
+
+    m_rt = (
+        -np.sin(lambd) * np.sin(phi) * np.cos(2.0 * delta)
+        - np.cos(delta) * np.cos(lambd) * np.cos(phi)
+    ) * M0
+
+    m_tp = (
+        -np.sin(delta) * np.cos(lambd) * np.cos(2.0 * phi)
+        - np.sin(2.0 * delta) * np.sin(2.0 * phi) * np.sin(lambd) / 2.0
+    ) * M0
+
+    return m_rr, m_tt, m_pp, m_rt, m_rp, m_tp
+
+
 def asymmetric_cosine(trise, tfall=None, npts=10000, dt=0.1):
     """
     Initialize a source time function with asymmetric cosine, normalized to 1
@@ -556,41 +606,9 @@ class Source(SourceOrReceiver, SourceTimeFunction):
         if dt is not None:
             assert dt > 0
 
-        # formulas in Udias (17.24) are in geographic system North, East,
-        # Down, which # transforms to the geocentric as:
-        # Mtt =  Mxx, Mpp = Myy, Mrr =  Mzz
-        # Mrp = -Myz, Mrt = Mxz, Mtp = -Mxy
-        # voigt in tpr: Mtt Mpp Mrr Mrp Mrt Mtp
-        phi = np.deg2rad(strike)
-        delta = np.deg2rad(dip)
-        lambd = np.deg2rad(rake)
-
-        m_tt = (
-            -np.sin(delta) * np.cos(lambd) * np.sin(2.0 * phi)
-            - np.sin(2.0 * delta) * np.sin(phi) ** 2.0 * np.sin(lambd)
-        ) * M0
-
-        m_pp = (
-            np.sin(delta) * np.cos(lambd) * np.sin(2.0 * phi)
-            - np.sin(2.0 * delta) * np.cos(phi) ** 2.0 * np.sin(lambd)
-        ) * M0
-
-        m_rr = (np.sin(2.0 * delta) * np.sin(lambd)) * M0
-
-        m_rp = (
-            -np.cos(phi) * np.sin(lambd) * np.cos(2.0 * delta)
-            + np.cos(delta) * np.cos(lambd) * np.sin(phi)
-        ) * M0
-
-        m_rt = (
-            -np.sin(lambd) * np.sin(phi) * np.cos(2.0 * delta)
-            - np.cos(delta) * np.cos(lambd) * np.cos(phi)
-        ) * M0
-
-        m_tp = (
-            -np.sin(delta) * np.cos(lambd) * np.cos(2.0 * phi)
-            - np.sin(2.0 * delta) * np.sin(2.0 * phi) * np.sin(lambd) / 2.0
-        ) * M0
+        m_rr, m_tt, m_pp, m_rt, m_rp, m_tp = _strike_dip_rake_to_tensor(
+            strike, dip, rake, M0
+        )
 
         source = cls(
             latitude,
@@ -609,9 +627,9 @@ class Source(SourceOrReceiver, SourceTimeFunction):
         )
 
         # storing strike, dip and rake for plotting purposes
-        source.phi = phi
-        source.delta = delta
-        source.lambd = lambd
+        source.phi = np.deg2rad(strike)
+        source.delta = np.deg2rad(dip)
+        source.lambd = np.deg2rad(rake)
 
         return source
 
@@ -1036,11 +1054,322 @@ class Receiver(SourceOrReceiver):
         return receivers
 
 
+# Columns of the point sources of a finite source. ``depth_in_m``,
+# ``time_shift``, and ``dt`` are NaN if not set.
+FINITE_SOURCE_DTYPE = np.dtype(
+    [
+        ("latitude", np.float64),
+        ("longitude", np.float64),
+        ("depth_in_m", np.float64),
+        ("m_rr", np.float64),
+        ("m_tt", np.float64),
+        ("m_pp", np.float64),
+        ("m_rt", np.float64),
+        ("m_rp", np.float64),
+        ("m_tp", np.float64),
+        ("time_shift", np.float64),
+        ("dt", np.float64),
+    ]
+)
+
+
+def _lowpass_rows(data, freq, df, corners=4, zerophase=False):
+    """
+    Same as :func:`obspy.signal.filter.lowpass` but filters all rows of a
+    2D array at once.
+    """
+    z, p, k = scipy.signal.iirfilter(
+        corners,
+        freq / (0.5 * df),
+        btype="lowpass",
+        ftype="butter",
+        output="zpk",
+    )
+    sos = scipy.signal.zpk2sos(z, p, k)
+    if zerophase:
+        firstpass = scipy.signal.sosfilt(sos, data, axis=-1)[:, ::-1]
+        return scipy.signal.sosfilt(sos, firstpass, axis=-1)[:, ::-1]
+    return scipy.signal.sosfilt(sos, data, axis=-1)
+
+
+def _interp_rows(x, xp, fp):
+    """
+    Same as :func:`numpy.interp` for every row of the 2D array ``fp``.
+    """
+    idx = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, len(xp) - 1)
+    result = fp[:, idx]
+    inside = idx < len(xp) - 1
+    j = idx[inside]
+    slope = (fp[:, j + 1] - fp[:, j]) / (xp[j + 1] - xp[j])
+    result[:, inside] = slope * (x[inside] - xp[j]) + fp[:, j]
+    return result
+
+
+def _point_source_column(name, valid_range=None):
+    """
+    Property reading and writing one column of the point sources of a
+    finite source. NaN is returned as None. Values outside of the optional
+    ``valid_range`` are rejected like in :class:`SourceOrReceiver`.
+    """
+
+    def getter(self):
+        value = self._finite_source.points[name][self._index]
+        return None if np.isnan(value) else float(value)
+
+    def setter(self, value):
+        if valid_range is not None:
+            value = float(value)
+            if not (valid_range[0] <= value <= valid_range[1]):
+                raise ValueError(
+                    "Invalid %s value. %s must be %g <= x <= %g."
+                    % (name, name.capitalize(), valid_range[0], valid_range[1])
+                )
+        self._finite_source.points[name][self._index] = (
+            np.nan if value is None else value
+        )
+
+    return property(getter, setter)
+
+
+class _FiniteSourcePoint(Source):
+    """
+    A single point source of a :class:`FiniteSource`. Behaves like a
+    :class:`Source` but is a view on the arrays of the finite source.
+
+    It compares equal to sources with the same values. Deep copies are
+    independent :class:`Source` objects.
+    """
+
+    latitude = _point_source_column("latitude", valid_range=(-90, 90))
+    longitude = _point_source_column("longitude", valid_range=(-180, 180))
+    depth_in_m = _point_source_column("depth_in_m")
+    m_rr = _point_source_column("m_rr")
+    m_tt = _point_source_column("m_tt")
+    m_pp = _point_source_column("m_pp")
+    m_rt = _point_source_column("m_rt")
+    m_rp = _point_source_column("m_rp")
+    m_tp = _point_source_column("m_tp")
+    time_shift = _point_source_column("time_shift")
+    dt = _point_source_column("dt")
+
+    def __init__(self, finite_source, index):
+        # Everything is stored in the finite source.
+        self._finite_source = finite_source
+        self._index = index
+
+    @property
+    def origin_time(self):
+        return self._finite_source.origin_times[self._index]
+
+    @origin_time.setter
+    def origin_time(self, value):
+        self._finite_source.origin_times[self._index] = value
+
+    @property
+    def sliprate(self):
+        return self._finite_source._get_sliprate(self._index)
+
+    @sliprate.setter
+    def sliprate(self, value):
+        self._finite_source._set_sliprate(self._index, value)
+
+    def __eq__(self, other):
+        # The inherited comparison of the __dict__ would only compare the
+        # finite source and the index.
+        if type(other) not in (Source, _FiniteSourcePoint):
+            return False
+        for name in FINITE_SOURCE_DTYPE.names + ("origin_time", "sliprate"):
+            value, other_value = getattr(self, name), getattr(other, name)
+            if value is None or other_value is None:
+                if value is not other_value:
+                    return False
+            elif name == "sliprate":
+                if not np.array_equal(value, other_value):
+                    return False
+            elif value != other_value:
+                return False
+        return True
+
+    # Views are mutable.
+    __hash__ = None
+
+    def __copy__(self):
+        return _FiniteSourcePoint(self._finite_source, self._index)
+
+    def __deepcopy__(self, memo):
+        # Copying the view would copy the whole finite source.
+        return Source(
+            latitude=self.latitude,
+            longitude=self.longitude,
+            depth_in_m=self.depth_in_m,
+            m_rr=self.m_rr,
+            m_tt=self.m_tt,
+            m_pp=self.m_pp,
+            m_rt=self.m_rt,
+            m_rp=self.m_rp,
+            m_tp=self.m_tp,
+            time_shift=self.time_shift,
+            sliprate=self.sliprate,
+            dt=self.dt,
+            origin_time=copy.deepcopy(self.origin_time, memo),
+        )
+
+
+def _points_from_strike_dip_rake(
+    latitude, longitude, depth_in_m, strike, dip, rake, M0, time_shift, dt
+):
+    """
+    Point source columns of shear sources, the array version of
+    :meth:`Source.from_strike_dip_rake`.
+    """
+    points = np.empty(len(latitude), dtype=FINITE_SOURCE_DTYPE)
+    points["latitude"] = latitude
+    points["longitude"] = longitude
+    points["depth_in_m"] = depth_in_m
+    (
+        points["m_rr"],
+        points["m_tt"],
+        points["m_pp"],
+        points["m_rt"],
+        points["m_rp"],
+        points["m_tp"],
+    ) = _strike_dip_rake_to_tensor(strike, dip, rake, M0)
+    points["time_shift"] = time_shift
+    points["dt"] = dt
+    return points
+
+
+def _pack_sliprates(sliprates):
+    """
+    Stack a list of 1D sliprates of possibly different lengths into a
+    zero padded 2D array plus the number of samples of each of them.
+    """
+    npts = np.array([len(_i) for _i in sliprates], dtype=np.int64)
+    packed = np.zeros(
+        (len(sliprates), npts.max() if len(npts) else 0), dtype=np.float64
+    )
+    for i, sliprate in enumerate(sliprates):
+        packed[i, : len(sliprate)] = sliprate
+    return packed, npts
+
+
+class _NumberReader(object):
+    """
+    Reads whitespace separated numbers from an open text file in large
+    chunks, tokenized by numpy.
+    """
+
+    def __init__(self, fh, chunk_size=2 ** 22):
+        self._fh = fh
+        self._chunk_size = chunk_size
+        self._values = np.empty(0, dtype=np.float64)
+        self._pos = 0
+        # Incomplete number at the end of the last chunk.
+        self._rest = ""
+
+    def read(self, n):
+        """
+        The next ``n`` numbers of the file.
+        """
+        while len(self._values) - self._pos < n:
+            chunk = self._fh.read(self._chunk_size)
+            if not chunk and not self._rest:
+                raise SourceParseError("Unexpected end of file.")
+            text = self._rest + chunk
+            tokens = text.split()
+            # The last number might continue in the next chunk.
+            if chunk and not text[-1].isspace():
+                self._rest = tokens.pop()
+            else:
+                self._rest = ""
+            self._values = np.concatenate(
+                [
+                    self._values[self._pos :],  # NOQA
+                    np.array(tokens, dtype=np.float64),
+                ]
+            )
+            self._pos = 0
+        values = self._values[self._pos : self._pos + n]  # NOQA
+        self._pos += n
+        return values
+
+
+def _read_srf_points(fh, normalize=False):
+    """
+    Generator yielding the point sources of the POINTS block of an open
+    SRF file as ``(latitude, longitude, depth_in_m, strike, dip, rake, M0,
+    time_shift, dt, sliprate)`` tuples.
+
+    The numbers are read and tokenized in large chunks. Points with slip
+    along the u1 and u2 axes yield one point source per axis.
+    """
+    # go to POINTS block
+    line = fh.readline()
+    while "POINTS" not in line:
+        line = fh.readline()
+    npoints = int(line.split()[1])
+
+    reader = _NumberReader(fh)
+    for _ in range(npoints):
+        (
+            lon,
+            lat,
+            dep,
+            stk,
+            dip,
+            area,
+            tinit,
+            dt,
+            rake,
+            slip1,
+            nt1,
+            slip2,
+            nt2,
+            slip3,
+            nt3,
+        ) = reader.read(15).tolist()
+
+        # Convert latitude to a geocentric latitude.
+        lat = elliptic_to_geocentric_latitude(lat)
+
+        dep *= 1e3  # km   > m
+        area *= 1e-4  # cm^2 > m^2
+        slip1 *= 1e-2  # cm   > m
+        slip2 *= 1e-2  # cm   > m
+        # slip3 *= 1e-2  # cm   > m
+
+        nt1, nt2, nt3 = map(int, (nt1, nt2, nt3))
+
+        for slip, nt in ((slip1, nt1), (slip2, nt2)):
+            if nt <= 0:
+                continue
+            # Copy to not keep the chunks of the file alive.
+            stf = np.array(reader.read(nt))
+            if normalize:
+                stf /= np.trapz(stf, dx=dt)
+
+            m0 = area * DEFAULT_MU * slip
+
+            yield lat, lon, dep, stk, dip, rake, m0, tinit, dt, stf
+
+        if nt3 > 0:
+            raise NotImplementedError("Slip along u3 axis")
+
+
 class FiniteSource(object):
     """
     A class to handle finite sources represented by a number of point sources.
 
+    The point sources are stored in columns: their coordinates, moment
+    tensors, time shifts, and sampling intervals in the structured array
+    ``points`` (see :data:`FINITE_SOURCE_DTYPE`) and their sliprates as the
+    zero padded rows of the 2D array ``sliprates`` with ``sliprate_npts``
+    valid samples each (-1 if not set). Iterating over the finite source
+    yields :class:`~instaseis.source.Source` objects which read and write
+    these arrays.
+
     :param pointsources: The points sources making up the finite source.
+        They are copied to the arrays of the finite source.
     :type pointsources: list of :class:`~instaseis.source.Source` objects
     :param CMT: The centroid of the finite source.
     :type CMT: :class:`~instaseis.source.Source`, optional
@@ -1066,7 +1395,12 @@ class FiniteSource(object):
         hypocenter_latitude=None,
         hypocenter_depth_in_m=None,
     ):
-        self.pointsources = pointsources
+        self.points = None
+        self.sliprates = None
+        self.sliprate_npts = None
+        self.origin_times = None
+        if pointsources is not None:
+            self.pointsources = pointsources
         self.CMT = CMT
         self.magnitude = magnitude
         self.event_duration = event_duration
@@ -1075,8 +1409,170 @@ class FiniteSource(object):
         self.hypocenter_depth_in_m = hypocenter_depth_in_m
         self.current = 0
 
+    @classmethod
+    def from_arrays(
+        cls,
+        points,
+        sliprates=None,
+        sliprate_npts=None,
+        origin_time=obspy.UTCDateTime(0),
+        **kwargs,
+    ):
+        """
+        Initialize a finite source directly from arrays without creating a
+        :class:`~instaseis.source.Source` object per point source.
+
+        :param points: The point sources.
+        :type points: :class:`numpy.ndarray` with
+            :data:`FINITE_SOURCE_DTYPE`
+        :param sliprates: The sliprates of the point sources, one per row
+            and zero padded at the end.
+        :type sliprates: 2D :class:`numpy.ndarray`, optional
+        :param sliprate_npts: The number of samples of each sliprate.
+            Defaults to the number of columns of ``sliprates``.
+        :type sliprate_npts: :class:`numpy.ndarray`, optional
+        :param origin_time: The origin time of all point sources.
+        :type origin_time: :class:`obspy.core.utcdatetime.UTCDateTime`
+
+        All further keyword arguments are passed to the constructor.
+        """
+        points = np.require(points, dtype=FINITE_SOURCE_DTYPE).ravel()
+        if np.any(np.abs(points["latitude"]) > 90):
+            raise ValueError(
+                "Invalid latitude value. Latitude must be -90 <= x <= 90."
+            )
+        if np.any(np.abs(points["longitude"]) > 180):
+            raise ValueError(
+                "Invalid longitude value. Longitude must be "
+                "-180 <= x <= 180."
+            )
+
+        if sliprates is None:
+            sliprates = np.zeros((len(points), 0), dtype=np.float64)
+            sliprate_npts = -np.ones(len(points), dtype=np.int64)
+        else:
+            sliprates = np.require(
+                sliprates, dtype=np.float64, requirements=["C"]
+            )
+            if sliprates.shape[0] != len(points):
+                raise ValueError(
+                    "There must be one sliprate per point source."
+                )
+        if sliprate_npts is None:
+            sliprate_npts = np.full(
+                len(points), sliprates.shape[1], dtype=np.int64
+            )
+
+        fs = cls(**kwargs)
+        fs.points = points
+        fs.sliprates = sliprates
+        fs.sliprate_npts = np.array(sliprate_npts, dtype=np.int64)
+        fs.origin_times = np.full(len(points), origin_time, dtype=object)
+        return fs
+
+    @property
+    def pointsources(self):
+        """
+        The point sources as a tuple of :class:`~instaseis.source.Source`
+        objects reading and writing the arrays of the finite source. Assign
+        a new sequence to replace all of them.
+        """
+        if self.points is None:
+            return None
+        return tuple(self[_i] for _i in range(len(self.points)))
+
+    @pointsources.setter
+    def pointsources(self, pointsources):
+        for source in pointsources:
+            if not isinstance(source, Source):
+                raise TypeError(
+                    "Finite sources can only consist of moment tensor "
+                    "sources."
+                )
+
+        self.points = np.empty(len(pointsources), dtype=FINITE_SOURCE_DTYPE)
+        for name in FINITE_SOURCE_DTYPE.names:
+            values = [getattr(_i, name) for _i in pointsources]
+            self.points[name] = [np.nan if _i is None else _i for _i in values]
+
+        self.sliprate_npts = np.array(
+            [
+                -1 if _i.sliprate is None else len(_i.sliprate)
+                for _i in pointsources
+            ],
+            dtype=np.int64,
+        )
+        self.sliprates = np.zeros(
+            (len(pointsources), max([0] + list(self.sliprate_npts))),
+            dtype=np.float64,
+        )
+        for _i, source in enumerate(pointsources):
+            if source.sliprate is not None:
+                self.sliprates[_i, : len(source.sliprate)] = source.sliprate
+
+        self.origin_times = np.empty(len(pointsources), dtype=object)
+        self.origin_times[:] = [_i.origin_time for _i in pointsources]
+
+    def _get_sliprate(self, index):
+        npts = self.sliprate_npts[index]
+        if npts < 0:
+            return None
+        return self.sliprates[index, :npts]
+
+    def _set_sliprate(self, index, sliprate):
+        if not self.sliprates.flags.writeable:
+            # Shared by all point sources.
+            self.sliprates = self.sliprates.copy()
+        if sliprate is None:
+            self.sliprates[index] = 0.0
+            self.sliprate_npts[index] = -1
+            return
+
+        sliprate = np.array(sliprate, dtype=np.float64).ravel()
+        width = self.sliprates.shape[1]
+        if len(sliprate) > width:
+            # Grow generously as usually all sliprates are set in a loop.
+            sliprates = np.zeros(
+                (len(self.sliprates), max(len(sliprate), 2 * width)),
+                dtype=np.float64,
+            )
+            sliprates[:, :width] = self.sliprates
+            self.sliprates = sliprates
+        self.sliprates[index] = 0.0
+        self.sliprates[index, : len(sliprate)] = sliprate
+        self.sliprate_npts[index] = len(sliprate)
+
+    def _get_sliprate_groups(self):
+        """
+        The indices of the point sources grouped by the number of samples
+        and the sampling interval of their sliprates. Each group can be
+        processed as a single 2D array.
+        """
+        if not len(self.points):
+            return []
+        if np.any(self.sliprate_npts < 0):
+            raise ValueError("source has no source time function")
+        keys = np.column_stack([self.sliprate_npts, self.points["dt"]])
+        _, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        return [np.where(inverse == _i)[0] for _i in range(inverse.max() + 1)]
+
+    def _get_M0(self):  # NOQA
+        """
+        The scalar moments of all point sources.
+        """
+        p = self.points
+        return (
+            p["m_rr"] ** 2
+            + p["m_tt"] ** 2
+            + p["m_pp"] ** 2
+            + 2 * p["m_rt"] ** 2
+            + 2 * p["m_rp"] ** 2
+            + 2 * p["m_tp"] ** 2
+        ) ** 0.5 * 0.5 ** 0.5
+
     def __len__(self):
-        return len(self.pointsources)
+        return len(self.points)
 
     def __iter__(self):
         return self
@@ -1088,17 +1584,23 @@ class FiniteSource(object):
         return self.__next__()
 
     def __next__(self):
-        if self.pointsources is None:
+        if self.points is None:
             raise ValueError("FiniteSource not Initialized")
-        if self.current > len(self.pointsources) - 1:
+        if self.current > len(self.points) - 1:
             self.current = 0
             raise StopIteration
         else:
             self.current += 1
-            return self.pointsources[self.current - 1]
+            return self[self.current - 1]
 
     def __getitem__(self, index):
-        return self.pointsources[index]
+        if isinstance(index, slice):
+            return [self[_i] for _i in range(len(self.points))[index]]
+        if index < 0:
+            index += len(self.points)
+        if not 0 <= index < len(self.points):
+            raise IndexError("point source index out of range")
+        return _FiniteSourcePoint(self, index)
 
     @classmethod
     def from_srf_file(cls, filename, normalize=False):
@@ -1133,89 +1635,75 @@ class FiniteSource(object):
             Max Longitude        :    9.0 deg
             Hypocenter Longitude :    0.0 deg
         """
+        columns = []
+        sliprates = []
         with open(filename, "rt") as f:
-            # go to POINTS block
-            line = f.readline()
-            while "POINTS" not in line:
-                line = f.readline()
-
-            npoints = int(line.split()[1])
-            sources = []
-
-            for _ in np.arange(npoints):
-                lon, lat, dep, stk, dip, area, tinit, dt = map(
-                    float, f.readline().split()
-                )
-
-                # Convert latitude to a geocentric latitude.
-                lat = elliptic_to_geocentric_latitude(lat)
+            for point in _read_srf_points(f, normalize=normalize):
+                columns.append(point[:-1])
+                sliprates.append(point[-1])
+
+        columns = np.array(columns, dtype=np.float64).reshape(-1, 9)
+        sliprates, sliprate_npts = _pack_sliprates(sliprates)
+        return cls.from_arrays(
+            _points_from_strike_dip_rake(*columns.T),
+            sliprates,
+            sliprate_npts,
+        )
 
-                rake, slip1, nt1, slip2, nt2, slip3, nt3 = map(
-                    float, f.readline().split()
-                )
+    @staticmethod
+    def iter_srf_file(filename, normalize=False):
+        """
+        Lazily yield the point sources of a 'standard rupture format' (.srf)
+        file one at a time.
 
-                dep *= 1e3  # km   > m
-                area *= 1e-4  # cm^2 > m^2
-                slip1 *= 1e-2  # cm   > m
-                slip2 *= 1e-2  # cm   > m
-                # slip3 *= 1e-2  # cm   > m
-
-                nt1, nt2, nt3 = map(int, (nt1, nt2, nt3))
-
-                if nt1 > 0:
-                    line = f.readline()
-                    while len(line.split()) < nt1:
-                        line = line + f.readline()
-                    stf = np.array(line.split(), dtype=float)
-                    if normalize:
-                        stf /= np.trapz(stf, dx=dt)
-
-                    m0 = area * DEFAULT_MU * slip1
-
-                    sources.append(
-                        Source.from_strike_dip_rake(
-                            lat,
-                            lon,
-                            dep,
-                            stk,
-                            dip,
-                            rake,
-                            m0,
-                            time_shift=tinit,
-                            sliprate=stf,
-                            dt=dt,
-                        )
-                    )
+        In contrast to :meth:`from_srf_file` this never holds more than a
+        chunk of the file in memory so point sources can already be used
+        while the rest of a potentially very large file is still being read.
+        The point sources can directly be passed to the
+        ``get_seismograms_finite_source()`` method of a database once their
+        sliprates are resampled to the sampling of the database.
 
-                if nt2 > 0:
-                    line = f.readline()
-                    while len(line.split()) < nt2:
-                        line = line + f.readline()
-                    stf = np.array(line.split(), dtype=float)
-                    if normalize:
-                        stf /= np.trapz(stf, dx=dt)
-
-                    m0 = area * DEFAULT_MU * slip2
-
-                    sources.append(
-                        Source.from_strike_dip_rake(
-                            lat,
-                            lon,
-                            dep,
-                            stk,
-                            dip,
-                            rake,
-                            m0,
-                            time_shift=tinit,
-                            sliprate=stf,
-                            dt=dt,
-                        )
-                    )
+        Coordinates are assumed to be defined on the WGS84 ellipsoid and
+        will be converted to geocentric coordinates.
 
-                if nt3 > 0:
-                    raise NotImplementedError("Slip along u3 axis")
+        :param filename: path to the .srf file
+        :type filename: str
+        :param normalize: normalize the sliprate to 1
+        :type normalize: bool, optional
 
-            return cls(pointsources=sources)
+        >>> import instaseis
+        >>> for source in instaseis.FiniteSource.iter_srf_file(srf_file):
+        ...     print(source.longitude)  # doctest: +ELLIPSIS
+        0.0
+        0.99925
+        ...
+        8.99322
+        """
+        with open(filename, "rt") as f:
+            for (
+                lat,
+                lon,
+                dep,
+                stk,
+                dip,
+                rake,
+                m0,
+                tinit,
+                dt,
+                stf,
+            ) in _read_srf_points(f, normalize=normalize):
+                yield Source.from_strike_dip_rake(
+                    lat,
+                    lon,
+                    dep,
+                    stk,
+                    dip,
+                    rake,
+                    m0,
+                    time_shift=tinit,
+                    sliprate=stf,
+                    dt=dt,
+                )
 
     @classmethod
     def from_usgs_param_file(
@@ -1283,7 +1771,7 @@ class FiniteSource(object):
         if not line.startswith("#Total number of fault_segments"):
             raise USGSParamFileParsingException("Not a valid USGS param file.")
         nseg = int(line.split()[-1])
-        sources = []
+        segments = []
 
         # parse all segments
         for _ in range(nseg):
@@ -1294,81 +1782,83 @@ class FiniteSource(object):
                 if "#Lat. Lon. depth" in line:
                     break
 
-            # read all point sources until reaching next segment
+            # read all point sources until reaching next segment and convert
+            # them all at once
+            lines = []
             for line in fh:
-                line = line.decode()
-                if "#Fault_segment" in line:
+                if b"#Fault_segment" in line:
                     break
-
-                # Lat. Lon. depth slip rake strike dip t_rup t_ris t_fal mo
-                (
-                    lat,
-                    lon,
-                    dep,
-                    slip,
-                    rake,
-                    stk,
-                    dip,
-                    tinit,
-                    trise,
-                    tfall,
-                    M0,
-                ) = map(float, line.split())
-
-                # Negative rupture times are not supported with the current
-                # logic.
-                if tinit < 0:  # pragma: no cover
-                    raise USGSParamFileParsingException(
-                        "File contains a negative rupture time "
-                        "which Instaseis cannot currently deal "
-                        "with."
-                    )
-
-                # Calculate the end time.
-                endtime = trise + tfall
-                if endtime > (npts - 1) * dt:
-                    raise USGSParamFileParsingException(
-                        "Rise + fall time are longer than the "
-                        "total length of calculated slip. "
-                        "Please use more samples."
-                    )
-
-                # Convert latitude to a geocentric latitude.
-                lat = elliptic_to_geocentric_latitude(lat)
-
-                dep *= 1e3  # km > m
-                slip *= 1e-2  # cm > m
-                M0 *= 1e-7  # dyn / cm > N * m
-
-                # These checks also take care of negative times.
-                if trise < trise_min:
-                    trise = trise_min
-
-                if tfall < trise_min:
-                    tfall = trise_min
-
-                stf = asymmetric_cosine(trise, tfall, npts, dt)
-                sources.append(
-                    Source.from_strike_dip_rake(
-                        lat,
-                        lon,
-                        dep,
-                        stk,
-                        dip,
-                        rake,
-                        M0,
-                        time_shift=tinit,
-                        sliprate=stf,
-                        dt=dt,
-                    )
+                lines.append(line)
+            segments.append(
+                np.array(b" ".join(lines).split(), dtype=np.float64).reshape(
+                    -1, 11
                 )
+            )
 
-        if not sources:
+        # Lat. Lon. depth slip rake strike dip t_rup t_ris t_fal mo
+        (
+            lat,
+            lon,
+            dep,
+            slip,
+            rake,
+            stk,
+            dip,
+            tinit,
+            trise,
+            tfall,
+            M0,
+        ) = np.concatenate(segments).T
+
+        if not len(lat):
             raise USGSParamFileParsingException(
                 "No point sources found in the file."
             )
 
-        return cls(pointsources=sources)
+        # Negative rupture times are not supported with the current
+        # logic.
+        if np.any(tinit < 0):  # pragma: no cover
+            raise USGSParamFileParsingException(
+                "File contains a negative rupture time "
+                "which Instaseis cannot currently deal "
+                "with."
+            )
+
+        # Calculate the end time.
+        endtime = trise + tfall
+        if np.any(endtime > (npts - 1) * dt):
+            raise USGSParamFileParsingException(
+                "Rise + fall time are longer than the "
+                "total length of calculated slip. "
+                "Please use more samples."
+            )
+
+        # Convert latitude to a geocentric latitude.
+        lat = elliptic_to_geocentric_latitude(lat)
+
+        dep *= 1e3  # km > m
+        slip *= 1e-2  # cm > m
+        M0 *= 1e-7  # dyn / cm > N * m
+
+        # These checks also take care of negative times.
+        trise = np.maximum(trise, trise_min)
+        tfall = np.maximum(tfall, trise_min)
+
+        # Many point sources share the same rise and fall times so only
+        # compute each source time function once.
+        times, inverse = np.unique(
+            np.stack([trise, tfall], axis=1), axis=0, return_inverse=True
+        )
+        stfs = np.array(
+            [asymmetric_cosine(_r, _f, npts, dt) for _r, _f in times]
+        )
+
+        return cls.from_arrays(
+            _points_from_strike_dip_rake(
+                lat, lon, dep, stk, dip, rake, M0, tinit, dt
+            ),
+            stfs[inverse.ravel()],
+        )
 
     @classmethod
     def from_Haskell(  # NOQA
@@ -1416,7 +1906,6 @@ class FiniteSource(object):
         """
         # raise NotImplementedError
 
-        sources = []
         nsources = nl * nw
 
         colatitude = 90.0 - latitude
@@ -1504,35 +1993,38 @@ class FiniteSource(object):
             npts = int((trise * 2) / dt) + 1
         stf = asymmetric_cosine(trise, tfall, npts, dt)
 
-        for i in np.arange(nsources):
-            # compute strike dip and rake in the coordinate system of each
-            # source point
-            l_src = rotations.rotate_vector_xyz_earth_to_xyz_src(
-                l_xyz, np.deg2rad(src_lon[i]), np.deg2rad(src_colat[i])
-            )
-            n_src = rotations.rotate_vector_xyz_earth_to_xyz_src(
-                n_xyz, np.deg2rad(src_lon[i]), np.deg2rad(src_colat[i])
-            )
-            strik, dip, rake = strike_dip_rake_from_ln(l_src, n_src)
+        # compute strike dip and rake in the coordinate system of each
+        # source point
+        src_lon_rad = np.deg2rad(src_lon)
+        src_colat_rad = np.deg2rad(src_colat)
+        l_src = rotations.rotate_vector_xyz_earth_to_xyz_src(
+            l_xyz, src_lon_rad, src_colat_rad
+        )
+        n_src = rotations.rotate_vector_xyz_earth_to_xyz_src(
+            n_xyz, src_lon_rad, src_colat_rad
+        )
+        # Only the dip and rake are taken from the local coordinate system,
+        # all point sources keep the strike of the fault.
+        _, src_dip, src_rake = strike_dip_rake_from_ln(l_src, n_src)
 
-            # initialize point source
-            src = Source.from_strike_dip_rake(
-                src_lat[i],
-                src_lon[i],
-                src_depth[i],
+        # return as FiniteSource
+        finite_source = self.from_arrays(
+            _points_from_strike_dip_rake(
+                src_lat,
+                src_lon,
+                src_depth,
                 strike,
-                dip,
-                rake,
+                src_dip,
+                src_rake,
                 M0 / nsources,
-                time_shift=time_shift[i],
-                origin_time=origin_time,
-                dt=dt,
-                sliprate=stf,
-            )
-            sources.append(src)
-
-        # return as FiniteSource
-        return self(pointsources=sources)
+                time_shift,
+                dt,
+            ),
+            origin_time=origin_time,
+        )
+        # All point sources share the same source time function.
+        finite_source._set_all_sliprates(stf, dt)
+        return finite_source
 
     def resample_sliprate(self, dt, nsamp):
         """
@@ -1543,56 +2035,100 @@ class FiniteSource(object):
         :param dt: desired sampling
         :param nsamp: desired number of samples
         """
-        for ps in self.pointsources:
-            ps.resample_sliprate(dt, nsamp)
+        t_new = np.linspace(0, nsamp * dt, nsamp, endpoint=False)
+
+        def resample(sliprates, old_dt):
+            npts = sliprates.shape[1]
+            t_old = np.linspace(0, old_dt * npts, npts, endpoint=False)
+            return _interp_rows(t_new, t_old, sliprates)
+
+        self._map_sliprates(resample)
+        self.points["dt"] = dt
 
     def set_sliprate_dirac(self, dt, nsamp):
         """
         :param dt: desired sampling
         :param nsamp: desired number of samples
         """
-        for ps in self.pointsources:
-            ps.set_sliprate_dirac(dt, nsamp)
+        stf = SourceTimeFunction()
+        stf.set_sliprate_dirac(dt, nsamp)
+        self._set_all_sliprates(stf.sliprate, dt)
 
     def set_sliprate_lp(self, dt, nsamp, freq, corners=4, zerophase=False):
         """
         :param dt: desired sampling
         :param nsamp: desired number of samples
         """
-        for ps in self.pointsources:
-            ps.set_sliprate_lp(dt, nsamp, freq, corners, zerophase)
+        stf = SourceTimeFunction()
+        stf.set_sliprate_lp(dt, nsamp, freq, corners, zerophase)
+        self._set_all_sliprates(stf.sliprate, dt)
+
+    def _set_all_sliprates(self, sliprate, dt):
+        # All point sources share the same read-only array.
+        self.sliprates = np.broadcast_to(
+            sliprate, (len(self.points), len(sliprate))
+        )
+        self.sliprate_npts[:] = len(sliprate)
+        self.points["dt"] = dt
+
+    def _map_sliprates(self, func):
+        """
+        Replace the sliprates of every group of point sources with the same
+        sampling by ``func(sliprates, dt)``. A sliprate shared by all point
+        sources is only processed once.
+        """
+        groups = self._get_sliprate_groups()
+        if len(groups) == 1 and self.sliprates.strides[0] == 0:
+            npts = self.sliprate_npts[0]
+            dt = self.points["dt"][0]
+            self._set_all_sliprates(func(self.sliprates[:1, :npts], dt)[0], dt)
+            return
+
+        results = []
+        for idx in groups:
+            npts = self.sliprate_npts[idx[0]]
+            results.append(
+                func(self.sliprates[idx, :npts], self.points["dt"][idx[0]])
+            )
+        width = max([_i.shape[1] for _i in results], default=0)
+        self.sliprates = np.zeros((len(self.points), width), dtype=np.float64)
+        for idx, sliprates in zip(groups, results):
+            self.sliprates[idx, : sliprates.shape[1]] = sliprates
+            self.sliprate_npts[idx] = sliprates.shape[1]
 
     def normalize_sliprate(self):
         """
         normalize the sliprate using trapezoidal rule
         """
-        for ps in self.pointsources:
-            ps.normalize_sliprate()
+        self._map_sliprates(
+            lambda sliprates, dt: sliprates
+            / np.trapz(sliprates, dx=dt, axis=-1)[:, np.newaxis]
+        )
 
     def lp_sliprate(self, freq, corners=4, zerophase=False):
-        for ps in self.pointsources:
-            ps.lp_sliprate(freq, corners, zerophase)
+        self._map_sliprates(
+            lambda sliprates, dt: _lowpass_rows(
+                sliprates, freq, 1.0 / dt, corners, zerophase
+            )
+        )
 
     def find_hypocenter(self):
         """
         Finds the hypo- and epicenter based on the point source that has the
         smallest timeshift
         """
-        ps_hypo = min(self.pointsources, key=lambda x: x.time_shift)
-        self.hypocenter_longitude = ps_hypo.longitude
-        self.hypocenter_latitude = ps_hypo.latitude
-        self.hypocenter_depth_in_m = ps_hypo.depth_in_m
+        ps_hypo = self.points[np.argmin(self.points["time_shift"])]
+        self.hypocenter_longitude = float(ps_hypo["longitude"])
+        self.hypocenter_latitude = float(ps_hypo["latitude"])
+        self.hypocenter_depth_in_m = float(ps_hypo["depth_in_m"])
 
     def compute_centroid(self, planet_radius=6371e3, dt=None, nsamp=None):
         """
         computes the centroid moment tensor by summing over all pointsource
         weihted by their scalar moment
         """
-        x = 0.0
-        y = 0.0
-        z = 0.0
+        p = self.points
         finite_m0 = self.M0
-        finite_mij = np.zeros(6)
         finite_time_shift = 0.0  # time shift is now included in the sliprate
 
         if dt is None:
@@ -1601,35 +2137,66 @@ class FiniteSource(object):
         # estimate the number of samples needed from the pointsource with
         # longest time_shift
         if nsamp is None:
-            ps_ts_max = max(self.pointsources, key=lambda x: x.time_shift)
-            nsamp = int(ps_ts_max.time_shift / dt + len(ps_ts_max.sliprate))
+            _i = np.argmax(p["time_shift"])
+            nsamp = int(p["time_shift"][_i] / dt + self.sliprate_npts[_i])
 
-        finite_sliprate = np.zeros(nsamp)
         nfft = next_pow_2(nsamp) * 2
         self.resample_sliprate(dt, nsamp)
 
-        for ps in self.pointsources:
-            x += ps.x(planet_radius) * ps.M0 / finite_m0
-            y += ps.y(planet_radius) * ps.M0 / finite_m0
-            z += ps.z(planet_radius) * ps.M0 / finite_m0
-
-            # finite_time_shift += ps.time_shift * ps.M0 / finite_m0
-
-            mij = rotations.rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(
-                ps.tensor_voigt,
-                np.deg2rad(ps.longitude),
-                np.deg2rad(ps.colatitude),
-            )
-            finite_mij += mij
-
-            # sum sliprates with time shift applied
-            sliprate_f = np.fft.rfft(ps.sliprate, n=nfft)
+        # Add up in the order of the point sources - the same as adding them
+        # one after the other.
+        m0 = self._get_M0()
+        radius = planet_radius - np.nan_to_num(p["depth_in_m"])
+        x = np.add.accumulate(
+            np.cos(np.deg2rad(p["latitude"]))
+            * np.cos(np.deg2rad(p["longitude"]))
+            * radius
+            * m0
+            / finite_m0
+        )[-1]
+        y = np.add.accumulate(
+            np.cos(np.deg2rad(p["latitude"]))
+            * np.sin(np.deg2rad(p["longitude"]))
+            * radius
+            * m0
+            / finite_m0
+        )[-1]
+        z = np.add.accumulate(
+            np.sin(np.deg2rad(p["latitude"])) * radius * m0 / finite_m0
+        )[-1]
+
+        mij = rotations.rotate_symm_tensor_voigt_xyz_src_to_xyz_earth(
+            np.array(
+                [
+                    p["m_tt"],
+                    p["m_pp"],
+                    p["m_rr"],
+                    p["m_rp"],
+                    p["m_rt"],
+                    p["m_tp"],
+                ]
+            ),
+            np.deg2rad(p["longitude"]),
+            np.deg2rad(90.0 - p["latitude"]),
+        )
+        finite_mij = np.add.accumulate(mij, axis=1)[:, -1]
+
+        # sum sliprates with time shift applied, a block of point sources at
+        # a time to limit the memory usage
+        finite_sliprate_f = np.zeros(nfft // 2 + 1, dtype=np.complex128)
+        for start in range(0, len(p), 1024):
+            block = slice(start, start + 1024)
+            sliprate_f = np.fft.rfft(self.sliprates[block], n=nfft, axis=-1)
             sliprate_f *= np.exp(
-                -1j * rfftfreq(nfft) * 2.0 * np.pi * ps.time_shift / dt
-            )
-            finite_sliprate += (
-                np.fft.irfft(sliprate_f)[:nsamp] * ps.M0 / finite_m0
+                -1j
+                * rfftfreq(nfft)
+                * 2.0
+                * np.pi
+                * p["time_shift"][block, np.newaxis]
+                / dt
             )
+            finite_sliprate_f += (m0[block] / finite_m0).dot(sliprate_f)
+        finite_sliprate = np.fft.irfft(finite_sliprate_f)[:nsamp]
 
         longitude = np.rad2deg(np.arctan2(y, x))
         colatitude = np.rad2deg(
@@ -1663,7 +2230,8 @@ class FiniteSource(object):
         """
         Scalar Moment M0 in Nm
         """
-        return sum(ps.M0 for ps in self.pointsources)
+        # Add up in the order of the point sources.
+        return float(np.add.accumulate(np.append(0.0, self._get_M0()))[-1])
 
     @property
     def moment_magnitude(self):
@@ -1674,37 +2242,35 @@ class FiniteSource(object):
 
     @property
     def min_depth_in_m(self):
-        return min(self.pointsources, key=lambda x: x.depth_in_m).depth_in_m
+        return float(np.min(self.points["depth_in_m"]))
 
     @property
     def max_depth_in_m(self):
-        return max(self.pointsources, key=lambda x: x.depth_in_m).depth_in_m
+        return float(np.max(self.points["depth_in_m"]))
 
     @property
     def min_longitude(self):
-        return min(self.pointsources, key=lambda x: x.longitude).longitude
+        return float(np.min(self.points["longitude"]))
 
     @property
     def max_longitude(self):
-        return max(self.pointsources, key=lambda x: x.longitude).longitude
+        return float(np.max(self.points["longitude"]))
 
     @property
     def min_latitude(self):
-        return min(self.pointsources, key=lambda x: x.latitude).latitude
+        return float(np.min(self.points["latitude"]))
 
     @property
     def max_latitude(self):
-        return max(self.pointsources, key=lambda x: x.latitude).latitude
+        return float(np.max(self.points["latitude"]))
 
     @property
     def rupture_duration(self):
-        ts_min = min(self.pointsources, key=lambda x: x.time_shift).time_shift
-        ts_max = max(self.pointsources, key=lambda x: x.time_shift).time_shift
-        return ts_max - ts_min
+        return float(np.ptp(self.points["time_shift"]))
 
     @property
     def time_shift(self):
-        return min(self.pointsources, key=lambda x: x.time_shift).time_shift
+        return float(np.min(self.points["time_shift"]))
 
     @property
     def epicenter_latitude(self):
@@ -1716,7 +2282,7 @@ class FiniteSource(object):
 
     @property
     def npointsources(self):
-        return len(self.pointsources)
+        return len(self.points)
 
     def __str__(self):
         if (
@@ -51,3 +51,77 @@ def lagrange_interpol_2D_td(points1, points2, coefficients, x1, x2):  # NOQA
         interpolant.ctypes.data_as(C.POINTER(C.c_double)),
     )
     return interpolant
+
+
+def lagrange_interpol_2D_td_batch(  # NOQA
+    points1, points2, coefficients, x1, x2, out=None
+):
+    """
+    Interpolate all components of the coefficients to many points at once.
+
+    :param points1: Collocation points along the first axis.
+    :param points2: Collocation points along the second axis.
+    :param coefficients: Values at the collocation points with the shape
+        ``(nsamp, N + 1, N + 1, ncomp)``. Fortran-ordered single precision
+        arrays are used as they are, everything else is converted to a
+        Fortran-ordered double precision array.
+    :param x1: First coordinate of the points. Scalar or 1D array.
+    :param x2: Second coordinate of the points. Scalar or 1D array.
+    :param out: Optional Fortran-ordered float64 array the result is written
+        to.
+
+    Returns an array with the shape ``(nsamp, ncomp, npoints)`` or
+    ``(nsamp, ncomp)`` if ``x1`` and ``x2`` are scalars.
+    """
+    points1 = np.require(
+        points1, dtype=np.float64, requirements=["F_CONTIGUOUS"]
+    )
+    points2 = np.require(
+        points2, dtype=np.float64, requirements=["F_CONTIGUOUS"]
+    )
+    if coefficients.dtype == np.float32 and coefficients.flags.f_contiguous:
+        fct = lib.lagrange_interpol_2D_td_batch_sp
+        c_type = C.c_float
+    else:
+        coefficients = np.require(
+            coefficients, dtype=np.float64, requirements=["F_CONTIGUOUS"]
+        )
+        fct = lib.lagrange_interpol_2D_td_batch
+        c_type = C.c_double
+    is_scalar = np.ndim(x1) == 0 and np.ndim(x2) == 0
+    x1 = np.require(np.atleast_1d(x1), dtype=np.float64, requirements=["C"])
+    x2 = np.require(np.atleast_1d(x2), dtype=np.float64, requirements=["C"])
+
+    assert len(points1) == len(points2)
+    assert x1.shape == x2.shape and x1.ndim == 1
+
+    n = len(points1) - 1
+    nsamp, ncomp = coefficients.shape[0], coefficients.shape[3]
+    npoints = len(x1)
+
+    shape = (nsamp, ncomp) if is_scalar else (nsamp, ncomp, npoints)
+    if out is None:
+        out = np.empty(shape, dtype=np.float64, order="F")
+    elif (
+        out.shape != shape
+        or out.dtype != np.float64
+        or not out.flags.f_contiguous
+    ):
+        raise ValueError(
+            "out must be a Fortran-ordered float64 array with the shape "
+            "%s." % str(shape)
+        )
+
+    fct(
+        C.c_int(n),
+        C.c_int(nsamp),
+        C.c_int(ncomp),
+        C.c_int(npoints),
+        points1.ctypes.data_as(C.POINTER(C.c_double)),
+        points2.ctypes.data_as(C.POINTER(C.c_double)),
+        coefficients.ctypes.data_as(C.POINTER(c_type)),
+        x1.ctypes.data_as(C.POINTER(C.c_double)),
+        x2.ctypes.data_as(C.POINTER(C.c_double)),
+        out.ctypes.data_as(C.POINTER(C.c_double)),
+    )
+    return out
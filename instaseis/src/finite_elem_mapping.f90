@@ -53,6 +53,7 @@ module finite_elem_mapping
     private
 
     public  :: inside_element
+    public  :: inside_element_batch
 
     public  :: mapping
     public  :: inv_mapping
@@ -120,6 +121,55 @@ subroutine inside_element(s, z, nodes, element_type, tolerance, in_element, xi,
 end subroutine inside_element
 !-----------------------------------------------------------------------------------------
 
+!-----------------------------------------------------------------------------------------
+subroutine inside_element_batch(npoints, ncandidates, ntolerances, s, z, nodes, &
+                                element_types, tolerances, candidate, xi, eta) &
+    bind(c, name="inside_element_batch")
+!< vectorized version of inside_element: for each point described by global
+!< coordinates s,z test its candidate elements and return the (zero based)
+!< index of the first candidate containing the point, using the tolerances in
+!< the given order. candidate is -1 if the point is in none of the candidates.
+
+  integer(c_int), intent(in), value             :: npoints, ncandidates, ntolerances
+  real(c_double), intent(in)                    :: s(npoints), z(npoints)
+  real(c_double), intent(in)                    :: nodes(4,2,ncandidates,npoints)
+  integer(c_int), intent(in)                    :: element_types(ncandidates,npoints)
+  real(c_double), intent(in)                    :: tolerances(ntolerances)
+  integer(c_int), intent(out)                   :: candidate(npoints)
+  real(c_double), intent(out)                   :: xi(npoints), eta(npoints)
+  real(c_double)                                :: xieta(2,ncandidates)
+  integer                                       :: ipoint, icand, itol
+
+  do ipoint = 1, npoints
+     candidate(ipoint) = -1
+     xi(ipoint) = 0
+     eta(ipoint) = 0
+
+     search: do itol = 1, ntolerances
+        do icand = 1, ncandidates
+           ! the mapping does not depend on the tolerance, so only compute it
+           ! in the first pass
+           if (itol == 1) &
+              xieta(:,icand) = inv_mapping(s(ipoint), z(ipoint), &
+                                           nodes(:,:,icand,ipoint), &
+                                           element_types(icand,ipoint))
+
+           if (xieta(1,icand) >= -1 - tolerances(itol) .and. &
+               xieta(1,icand) <=  1 + tolerances(itol) .and. &
+               xieta(2,icand) >= -1 - tolerances(itol) .and. &
+               xieta(2,icand) <=  1 + tolerances(itol)) then
+              candidate(ipoint) = icand - 1
+              xi(ipoint) = xieta(1,icand)
+              eta(ipoint) = xieta(2,icand)
+              exit search
+           endif
+        enddo
+     enddo search
+  enddo
+
+end subroutine inside_element_batch
+!-----------------------------------------------------------------------------------------
+
 !!!!!!! WRAPPING ROUTINES FOR MAPPING !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
 !-----------------------------------------------------------------------------------------
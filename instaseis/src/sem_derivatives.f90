@@ -9,6 +9,7 @@
 module sem_derivatives
   use global_parameters,      only : dp
   use finite_elem_mapping,    only : inv_jacobian
+  use spectral_basis,         only : lagrange_interpol_2D_td
   use iso_c_binding, only: c_double, c_int, c_bool
 
   implicit none
@@ -157,6 +158,75 @@ subroutine strain_quadpole_td(u, G, GT, xi, eta, npol, nsamp, nodes, element_typ
 end subroutine
 !-----------------------------------------------------------------------------------------
 
+!-----------------------------------------------------------------------------------------
+subroutine strain_interp_td(u, G, GT, xi, eta, npol, nsamp, nodes, element_type, axial, &
+                            excitation_type, x1, x2, strain) &
+  bind(c, name="strain_interp_td")
+  ! Computes the strain at the point (x1, x2) in reference coordinates of the element
+  ! without computing it at all GLL points of the element first.
+  ! The strain is linear in the displacement, so the strain of each unit displacement
+  ! is computed and interpolated to the point once. The strain at the point is then a
+  ! single matrix product of these weights with the displacement.
+
+  integer(c_int), intent(in), value  :: npol, nsamp
+  real(c_double), intent(in)         :: u(1:nsamp,1:3*(npol+1)**2) ! (nsamp,0:npol,0:npol,3)
+  real(c_double), intent(in)         :: G(0:npol,0:npol)  ! same for all elements (GLL)
+  real(c_double), intent(in)         :: GT(0:npol,0:npol) ! GLL for non-axial and GLJ for
+                                                          ! axial elements
+  real(c_double), intent(in)         :: xi(0:npol)  ! GLL for non-axial and GLJ for axial
+                                                    ! elements
+  real(c_double), intent(in)         :: eta(0:npol) ! same for all elements (GLL)
+  real(c_double), intent(in)         :: nodes(4,2)
+  integer(c_int), intent(in), value  :: element_type
+  logical(c_bool), intent(in), value :: axial
+  integer(c_int), intent(in), value  :: excitation_type ! 1: monopole, 2: dipole,
+                                                        ! 3: quadpole
+  real(c_double), intent(in), value  :: x1, x2
+  real(c_double), intent(out)        :: strain(1:nsamp,6)
+
+  real(kind=dp)                      :: unit_u(1:3*(npol+1)**2,0:npol,0:npol,3)
+  real(kind=dp)                      :: unit_strain(1:3*(npol+1)**2,0:npol,0:npol,6)
+  real(kind=dp)                      :: weights(1:3*(npol+1)**2,6)
+  integer                            :: nbasis, ipol, jpol, i, m
+
+  nbasis = 3 * (npol + 1) ** 2
+
+  ! same order as the columns of u
+  unit_u = 0
+  m = 0
+  do i = 1, 3
+     do jpol = 0, npol
+        do ipol = 0, npol
+           m = m + 1
+           unit_u(m,ipol,jpol,i) = 1
+        enddo
+     enddo
+  enddo
+
+  select case(excitation_type)
+     case(1)
+        call strain_monopole_td(unit_u, G, GT, xi, eta, npol, nbasis, nodes, &
+                                element_type, axial, unit_strain)
+     case(2)
+        call strain_dipole_td(unit_u, G, GT, xi, eta, npol, nbasis, nodes, &
+                              element_type, axial, unit_strain)
+     case(3)
+        call strain_quadpole_td(unit_u, G, GT, xi, eta, npol, nbasis, nodes, &
+                                element_type, axial, unit_strain)
+     case default
+        write(6,*) 'ERROR: unknown excitation type: ', excitation_type
+        stop
+  end select
+
+  do i = 1, 6
+     weights(:,i) = lagrange_interpol_2D_td(xi, eta, unit_strain(:,:,:,i), x1, x2)
+  enddo
+
+  strain = matmul(u, weights)
+
+end subroutine strain_interp_td
+!-----------------------------------------------------------------------------------------
+
 !-----------------------------------------------------------------------------------------
 function f_over_s_td(f, G, GT, xi, eta, npol, nsamp, nodes, element_type, axial)
   ! Computes the f / s
@@ -8,7 +8,7 @@
 
 module spectral_basis
     use global_parameters, only: sp, dp, pi
-    use iso_c_binding, only: c_double, c_int
+    use iso_c_binding, only: c_double, c_float, c_int
 
     implicit none
     private
@@ -34,6 +34,73 @@ subroutine lagrange_interpol_2D_td_wrapped(N, nsamp, points1, points2, coefficie
 end subroutine
 !-----------------------------------------------------------------------------------------
 
+!-----------------------------------------------------------------------------------------
+subroutine lagrange_interpol_2D_td_batch(N, nsamp, ncomp, npoints, points1, points2, &
+                                         coefficients, x1, x2, interpolant) &
+  bind(c, name="lagrange_interpol_2D_td_batch")
+  ! Interpolates all components of the coefficients to all points (x1, x2) in one call.
+  ! The Lagrange polynomials are only evaluated once per point.
+
+  integer(c_int), intent(in), value  :: N, nsamp, ncomp, npoints
+  real(c_double), intent(in)         :: points1(0:N), points2(0:N)
+  real(c_double), intent(in)         :: coefficients(1:nsamp, 0:N, 0:N, 1:ncomp)
+  real(c_double), intent(in)         :: x1(npoints), x2(npoints)
+  real(c_double), intent(out)        :: interpolant(nsamp, ncomp, npoints)
+
+  real(dp)                           :: l_i(0:N), l_j(0:N)
+  integer                            :: ipoint, icomp, i, j
+
+  do ipoint = 1, npoints
+     call lagrange_polynomials(points1, x1(ipoint), l_i)
+     call lagrange_polynomials(points2, x2(ipoint), l_j)
+
+     do icomp = 1, ncomp
+        interpolant(:,icomp,ipoint) = 0
+        do i=0, N
+           do j=0, N
+              interpolant(:,icomp,ipoint) = interpolant(:,icomp,ipoint) &
+                                            + coefficients(:,i,j,icomp) * l_i(i) * l_j(j)
+           enddo
+        enddo
+     enddo
+  enddo
+end subroutine
+!-----------------------------------------------------------------------------------------
+
+!-----------------------------------------------------------------------------------------
+subroutine lagrange_interpol_2D_td_batch_sp(N, nsamp, ncomp, npoints, points1, points2, &
+                                            coefficients, x1, x2, interpolant) &
+  bind(c, name="lagrange_interpol_2D_td_batch_sp")
+  ! Same as lagrange_interpol_2D_td_batch but for single precision coefficients which
+  ! are converted to double precision on the fly without making a copy of them.
+
+  integer(c_int), intent(in), value  :: N, nsamp, ncomp, npoints
+  real(c_double), intent(in)         :: points1(0:N), points2(0:N)
+  real(c_float), intent(in)          :: coefficients(1:nsamp, 0:N, 0:N, 1:ncomp)
+  real(c_double), intent(in)         :: x1(npoints), x2(npoints)
+  real(c_double), intent(out)        :: interpolant(nsamp, ncomp, npoints)
+
+  real(dp)                           :: l_i(0:N), l_j(0:N)
+  integer                            :: ipoint, icomp, i, j
+
+  do ipoint = 1, npoints
+     call lagrange_polynomials(points1, x1(ipoint), l_i)
+     call lagrange_polynomials(points2, x2(ipoint), l_j)
+
+     do icomp = 1, ncomp
+        interpolant(:,icomp,ipoint) = 0
+        do i=0, N
+           do j=0, N
+              interpolant(:,icomp,ipoint) = interpolant(:,icomp,ipoint) &
+                                            + real(coefficients(:,i,j,icomp), dp) &
+                                            * l_i(i) * l_j(j)
+           enddo
+        enddo
+     enddo
+  enddo
+end subroutine
+!-----------------------------------------------------------------------------------------
+
 !== END  C Wrappers ======================================================================
 
 !-----------------------------------------------------------------------------------------
@@ -81,5 +148,29 @@ function lagrange_interpol_2D_td(points1, points2, coefficients, x1, x2)
 end function lagrange_interpol_2D_td
 !-----------------------------------------------------------------------------------------
 
+!-----------------------------------------------------------------------------------------
+!> values of all Lagrange polynomials defined by the collocation points at x, same as in
+!  lagrange_interpol_2D_td
+subroutine lagrange_polynomials(points, x, l)
+
+  real(dp), intent(in)  :: points(0:)
+  real(dp), intent(in)  :: x
+  real(dp), intent(out) :: l(0:size(points)-1)
+
+  integer               :: i, m, n
+
+  n = size(points) - 1
+
+  do i=0, n
+     l(i) = 1
+     do m=0, n
+        if (m == i) cycle
+        l(i) = l(i) * (x - points(m)) / (points(i) - points(m))
+     enddo
+  enddo
+
+end subroutine lagrange_polynomials
+!-----------------------------------------------------------------------------------------
+
 end module
 !=========================================================================================
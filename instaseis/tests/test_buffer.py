@@ -9,9 +9,21 @@ Tests for the array buffer.
     GNU Lesser General Public License, Version 3 [non-commercial/academic use]
     (http://www.gnu.org/copyleft/lgpl.html)
 """
+import multiprocessing
+import pickle
+import threading
+import time
+
 import numpy as np
+import pytest
 
-from instaseis.database_interfaces.mesh import Buffer
+from instaseis.database_interfaces.mesh import (
+    BUFFER_POLICIES,
+    Buffer,
+    CompressedBuffer,
+    ReuseWindow,
+    SharedBuffer,
+)
 
 
 def test_buffer():
@@ -40,3 +52,328 @@ def test_buffer():
     # Once more not in.
     assert "d" not in buf
     assert buf.efficiency == 2.0 / 4.0
+
+
+@pytest.mark.parametrize("policy", sorted(BUFFER_POLICIES))
+def test_buffer_policies(policy):
+    # Room for exactly 10 items.
+    buf = Buffer(max_size_in_mb=10 * 1024 / 1024 ** 2, policy=policy)
+    keys = np.random.RandomState(12345).randint(0, 20, 1000)
+    for key in keys:
+        if key in buf:
+            buf.get(key)
+        else:
+            buf.add(key, np.zeros(1024, dtype=np.int8))
+        assert len(buf._buffer) <= 10
+        assert buf._total_size == len(buf._buffer) * 1024
+
+    assert buf.hits + buf.misses == 1000
+    assert buf.hits > 0
+    assert buf.evictions == buf.misses - 10
+    assert buf.efficiency == buf.hits / 1000.0
+
+    # Adding an existing item replaces it.
+    key = next(iter(buf._buffer))
+    buf.add(key, np.ones(1024, dtype=np.int8))
+    assert buf._total_size == 10 * 1024
+    np.testing.assert_array_equal(buf.get(key), np.ones(1024))
+
+
+@pytest.mark.parametrize("policy", ["lru", "arc", "tinylfu"])
+def test_buffer_policies_scan_resistance(policy):
+    """
+    A single scan over many items must not evict the frequently used items
+    with the scan-resistant policies.
+    """
+    buf = Buffer(max_size_in_mb=20 * 1024 / 1024 ** 2, policy=policy)
+    for key in range(10):
+        buf.add(key, np.zeros(1024, dtype=np.int8))
+        for _ in range(5):
+            buf.get(key)
+
+    for key in range(100, 1100):
+        if key not in buf:
+            buf.add(key, np.zeros(1024, dtype=np.int8))
+
+    hot = [key in buf for key in range(10)]
+    if policy == "lru":
+        assert not any(hot)
+    else:
+        assert all(hot)
+
+
+def test_buffer_unknown_policy():
+    with pytest.raises(ValueError) as err:
+        Buffer(policy="random")
+    assert err.value.args[0] == (
+        "Unknown buffer policy 'random'. Available policies: arc, lfu, lru, "
+        "tinylfu."
+    )
+
+
+@pytest.mark.parametrize("buffer_class", [Buffer, SharedBuffer])
+def test_buffer_get_or_load(buffer_class):
+    buf = buffer_class(max_size_in_mb=1.0)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return np.arange(10)
+
+    np.testing.assert_array_equal(buf.get_or_load(1, load), np.arange(10))
+    np.testing.assert_array_equal(buf.get_or_load(1, load), np.arange(10))
+    assert len(calls) == 1
+    assert (buf.hits, buf.misses) == (1, 1)
+
+    # Failed loads are not buffered.
+    def fail():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        buf.get_or_load(2, fail)
+    assert 2 not in buf
+    np.testing.assert_array_equal(buf.get_or_load(2, load), np.arange(10))
+
+
+@pytest.mark.parametrize("buffer_class", [Buffer, SharedBuffer])
+def test_buffer_get_or_load_single_flight(buffer_class):
+    """
+    Concurrent requests for the same missing item only load it once.
+    """
+    # Nothing is buffered - the result must still be shared.
+    buf = buffer_class(max_size_in_mb=0)
+    calls = []
+    started = threading.Event()
+
+    def load():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return np.ones(10)
+
+    results = []
+
+    def request():
+        results.append(buf.get_or_load(1, load))
+
+    threads = [threading.Thread(target=request)]
+    threads[0].start()
+    started.wait()
+    threads.extend(threading.Thread(target=request) for _ in range(7))
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    for r in results:
+        np.testing.assert_array_equal(r, np.ones(10))
+
+
+@pytest.mark.parametrize("buffer_class", [Buffer, SharedBuffer])
+def test_buffer_get_or_load_hits_do_not_wait_for_loads(buffer_class):
+    """
+    Buffered items are returned while another item is being registered for
+    loading.
+    """
+    buf = buffer_class(max_size_in_mb=1.0)
+    buf.add(1, np.ones(10))
+    results = []
+
+    def request():
+        results.append(buf.get_or_load(1, lambda: np.zeros(10)))
+
+    with buf._loading_lock:
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join(timeout=5.0)
+        assert not thread.is_alive()
+    np.testing.assert_array_equal(results[0], np.ones(10))
+
+
+def test_buffer_thread_safety():
+    buf = Buffer(max_size_in_mb=10 * 1024 / 1024 ** 2, policy="tinylfu")
+
+    def work(seed):
+        keys = np.random.RandomState(seed).randint(0, 30, 500)
+        for key in keys:
+            buf.get_or_load(key, lambda: np.zeros(1024, dtype=np.int8))
+
+    threads = [threading.Thread(target=work, args=(_i,)) for _i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert buf.hits + buf.misses >= 8 * 500
+    assert len(buf._buffer) <= 10
+    assert buf._total_size == len(buf._buffer) * 1024
+
+
+@pytest.mark.parametrize("codec", ["zlib", "float32", "float32+zlib"])
+def test_compressed_buffer(codec):
+    buf = CompressedBuffer(max_size_in_mb=1.0, codec=codec)
+    # Smooth and Fortran ordered like the strain arrays.
+    data = np.asfortranarray(
+        np.sin(np.linspace(0, 20, 20 * 5 * 5 * 6)).reshape(20, 5, 5, 6)
+    )
+    buf.add(1, data)
+    assert buf.get_size_mb() * 1024 ** 2 < data.nbytes
+    # Tuples may contain None.
+    buf.add(2, (data[..., 0].copy(), None))
+
+    value = buf.get(1)
+    assert value.dtype == np.float64
+    assert value.shape == data.shape
+    assert value.flags.f_contiguous
+    strain_x, strain_z = buf.get(2)
+    assert strain_z is None
+    if codec == "zlib":
+        np.testing.assert_array_equal(value, data)
+        np.testing.assert_array_equal(strain_x, data[..., 0])
+    else:
+        np.testing.assert_allclose(value, data, rtol=1e-6)
+        np.testing.assert_allclose(strain_x, data[..., 0], rtol=1e-6)
+
+
+def test_compressed_buffer_unknown_codec():
+    for codec in ["gzip", "zlib+zlib", "zlib+lz4"]:
+        with pytest.raises(ValueError) as err:
+            CompressedBuffer(codec=codec)
+        assert err.value.args[0] == (
+            "Unknown codec '%s'. Available codecs: float32, lz4, zlib, zstd, "
+            "optionally combined with float32 as in 'float32+zlib'." % codec
+        )
+
+
+def test_buffer_second_tier():
+    second_tier = CompressedBuffer(max_size_in_mb=1.0, codec="zlib")
+    # Room for two items.
+    buf = Buffer(max_size_in_mb=2 * 800 / 1024 ** 2, second_tier=second_tier)
+    for key in range(4):
+        buf.add(key, np.arange(100, dtype=np.float64) + key)
+    assert buf.evictions == 2
+    assert sorted(buf._buffer) == [2, 3]
+    assert sorted(second_tier._buffer) == [0, 1]
+
+    # Evicted items are promoted back from the second tier.
+    assert 0 in buf
+    np.testing.assert_array_equal(buf.get(0), np.arange(100))
+    assert sorted(buf._buffer) == [0, 3]
+    np.testing.assert_array_equal(
+        buf.get_or_load(1, lambda: None), np.arange(100) + 1
+    )
+    assert second_tier.hits == 2
+    assert 5 not in buf
+    assert second_tier.misses == 1
+
+
+def test_shared_buffer():
+    a = np.arange(100, dtype=np.float64)
+    # Room for exactly two items of the size of a.
+    size = len(pickle.dumps(a, protocol=pickle.HIGHEST_PROTOCOL))
+    buf = SharedBuffer(max_size_in_mb=2.5 * size / 1024 ** 2)
+    assert buf.efficiency == 0.0
+
+    buf.add(1, a)
+    buf.add(2, a + 1)
+    assert 1 in buf
+    np.testing.assert_array_equal(buf.get(1), a)
+    assert 2 in buf
+    np.testing.assert_array_equal(buf.get(2), a + 1)
+
+    # Returned items are copies.
+    buf.get(1)[:] = 0.0
+    np.testing.assert_array_equal(buf.get(1), a)
+
+    # 1 was accessed last, so 2 is removed.
+    buf.add(3, a + 2)
+    assert 2 not in buf
+    assert 1 in buf
+    assert 3 in buf
+    assert buf.get_size_mb() == 2 * size / 1024 ** 2
+    assert buf.efficiency == 4.0 / 5.0
+    assert (buf.hits, buf.misses, buf.evictions) == (4, 1, 1)
+
+    with pytest.raises(KeyError):
+        buf.get(2)
+
+    # Larger items are not buffered but counted and warned about once.
+    assert buf.rejections == 0
+    with pytest.warns(UserWarning) as w:
+        buf.add(4, np.arange(200, dtype=np.float64))
+        buf.add(5, np.arange(300, dtype=np.float64))
+    assert len(w) == 1
+    assert "is larger than the slots" in str(w[0].message)
+    assert buf.rejections == 2
+    assert 4 not in buf
+    assert 5 not in buf
+
+
+def test_shared_buffer_hash_table():
+    """
+    Keys colliding in the hash table and many evictions leaving deleted
+    buckets behind.
+    """
+    buf = SharedBuffer(max_size_in_mb=1.0, max_items=8)
+    n_buckets = len(buf._buckets)
+    for _i in range(200):
+        key = (_i % 13) * n_buckets + _i // 13
+        buf.add(key, np.array([key]))
+        assert key in buf
+        np.testing.assert_array_equal(buf.get(key), [key])
+
+        # The hash table points exactly to the slots of the buffered keys.
+        buffered = set(buf._keys[buf._keys != -1].tolist())
+        assert len(buffered) == min(_i + 1, 8)
+        assert (buf._buckets >= 0).sum() == len(buffered)
+        assert set(buf._buckets[buf._buckets >= 0].tolist()) == {
+            buf._find_slot(_j) for _j in buffered
+        }
+        assert buf._header[buf._DELETED] <= n_buckets // 4
+    assert buf.evictions == 192
+
+
+def _add_to_shared_buffer(buf):
+    buf.add(7, np.ones(10))
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="Requires forking processes.",
+)
+def test_shared_buffer_across_processes():
+    buf = SharedBuffer(max_size_in_mb=1.0)
+    p = multiprocessing.get_context("fork").Process(
+        target=_add_to_shared_buffer, args=(buf,)
+    )
+    p.start()
+    p.join()
+    assert p.exitcode == 0
+
+    assert 7 in buf
+    np.testing.assert_array_equal(buf.get(7), np.ones(10))
+
+
+def test_reuse_window():
+    window = ReuseWindow(size=4)
+    assert len(window) == 0
+    assert window.reuse_rate == 0.0
+
+    for key in [1, 2, 3, 4]:
+        window.add(key)
+    assert window.reuse_rate == 0.0
+
+    # Repeated keys are counted as reused.
+    window.add(4)
+    window.add(4)
+    assert len(window) == 4
+    assert window.reuse_rate == 0.5
+
+    # Only the window counts: keys dropped from it are new again.
+    window.add(1)
+    assert window.reuse_rate == 0.5
+    for _ in range(4):
+        window.add(5)
+    assert window.reuse_rate == 0.75
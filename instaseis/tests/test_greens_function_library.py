@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the precomputed Green's function libraries.
+
+:copyright:
+    Lion Krischer (lion.krischer@gmail.com), 2020
+:license:
+    GNU Lesser General Public License, Version 3 [non-commercial/academic use]
+    (http://www.gnu.org/copyleft/lgpl.html)
+"""
+import inspect
+import json
+import os
+import shutil
+
+import h5py
+import numpy as np
+import obspy
+import pytest
+
+from instaseis import InstaseisNotFoundError
+from instaseis.database_interfaces import find_and_open_files
+from instaseis.greens_function_library import (
+    GREENS_FUNCTION_COMPONENTS,
+    GreensFunctionLibrary,
+    create_greens_function_library,
+)
+
+
+# Most generic way to get the data folder path.
+DATA = os.path.join(
+    os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))),
+    "data",
+)
+
+DB = os.path.join(DATA, "100s_db_bwd_displ_only")
+
+
+@pytest.fixture(scope="module")
+def library(tmpdir_factory):
+    """
+    A small library with two units and two sampling intervals.
+    """
+    db = find_and_open_files(DB)
+    filename = str(tmpdir_factory.mktemp("library").join("greens.h5"))
+    progress = []
+    create_greens_function_library(
+        db,
+        filename,
+        epicentral_distances_in_degree=[10.0, 20.0],
+        source_depths_in_m=[0.0, 5000.0],
+        kinds=("displacement", "velocity"),
+        dts=(None, db.info.dt / 2.0),
+        compression="gzip",
+        progress_callback=lambda current, total: progress.append(
+            (current, total)
+        ),
+    )
+    assert progress == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    return db, filename
+
+
+@pytest.mark.parametrize("kind", ["displacement", "velocity"])
+@pytest.mark.parametrize("native_dt", [True, False])
+def test_library_lookup_matches_database(library, kind, native_dt):
+    db, filename = library
+    lib = GreensFunctionLibrary(filename)
+    origin_time = obspy.UTCDateTime(2010, 1, 1)
+    kwargs = {
+        "kind": kind,
+        "dt": None if native_dt else db.info.dt / 2.0,
+        "origin_time": origin_time,
+    }
+
+    for distance in [10.0, 20.0]:
+        for depth in [0.0, 5000.0]:
+            st = lib.get_greens_function(distance, depth, **kwargs)
+            st_db = db.get_greens_function(distance, depth, **kwargs)
+            assert [tr.stats.channel for tr in st] == [
+                tr.stats.channel for tr in st_db
+            ]
+            for tr, tr_db in zip(st, st_db):
+                assert tr.stats.starttime == tr_db.stats.starttime
+                assert tr.stats.delta == tr_db.stats.delta
+                assert tr.stats.instaseis.mu == tr_db.stats.instaseis.mu
+                np.testing.assert_allclose(tr.data, tr_db.data)
+
+            data = lib.get_greens_function(
+                distance, depth, return_obspy_stream=False, **kwargs
+            )
+            assert sorted(data.keys()) == sorted(
+                GREENS_FUNCTION_COMPONENTS + ["mu"]
+            )
+
+
+def test_library_interpolation(library):
+    db, filename = library
+
+    # Off-grid points are not available without interpolation.
+    lib = GreensFunctionLibrary(filename)
+    with pytest.raises(InstaseisNotFoundError):
+        lib.get_greens_function(15.0, 0.0)
+    with pytest.raises(InstaseisNotFoundError):
+        lib.get_greens_function(10.0, 2500.0)
+
+    lib = GreensFunctionLibrary(filename, interpolate=True)
+    data = lib.get_greens_function(15.0, 2500.0, return_obspy_stream=False)
+    corners = [
+        db.get_greens_function(d, z, return_obspy_stream=False)
+        for d in [10.0, 20.0]
+        for z in [0.0, 5000.0]
+    ]
+    for name in GREENS_FUNCTION_COMPONENTS + ["mu"]:
+        np.testing.assert_allclose(
+            data[name], sum(_i[name] for _i in corners) / 4.0
+        )
+
+    # Points outside of the grid are never available.
+    with pytest.raises(InstaseisNotFoundError):
+        lib.get_greens_function(25.0, 0.0)
+
+
+def test_library_missing_variants(library):
+    db, filename = library
+    lib = GreensFunctionLibrary(filename)
+    with pytest.raises(InstaseisNotFoundError):
+        lib.get_greens_function(10.0, 0.0, kind="acceleration")
+    with pytest.raises(InstaseisNotFoundError):
+        lib.get_greens_function(10.0, 0.0, dt=db.info.dt / 3.0)
+    with pytest.raises(InstaseisNotFoundError):
+        lib.get_greens_function(10.0, 0.0, dt=db.info.dt / 2.0, kernelwidth=2)
+    with pytest.raises(NotImplementedError):
+        lib.get_greens_function(10.0, 0.0, definition="other")
+
+
+def test_library_database_mismatch(library, tmpdir):
+    db, filename = library
+    assert GreensFunctionLibrary(filename, db=db).database == {
+        "velocity_model": "prem_iso_light",
+        "period": 100.0,
+        "stf": "errorf",
+        "dt": db.info.dt,
+        "npts": 73,
+        "src_shift": db.info.src_shift,
+    }
+
+    for key, value in [
+        ("velocity_model", "ak135f"),
+        ("period", 50.0),
+        ("dt", db.info.dt * 1.01),
+        ("npts", 74),
+    ]:
+        other = str(tmpdir.join("%s.h5" % key))
+        shutil.copy(filename, other)
+        with h5py.File(other, "r+") as f:
+            database = dict(json.loads(f.attrs["database"]), **{key: value})
+            f.attrs["database"] = json.dumps(database)
+        with pytest.raises(ValueError) as err:
+            GreensFunctionLibrary(other, db=db)
+        assert err.value.args[0].startswith(
+            "The Green's function library has been created from a "
+            "different database: %s is %r" % (key, value)
+        )
+        # Libraries can still be opened without a database to check.
+        GreensFunctionLibrary(other)
+
+
+def test_create_library_invalid_grids(tmpdir):
+    db = find_and_open_files(DB)
+    filename = str(tmpdir.join("greens.h5"))
+
+    with pytest.raises(ValueError) as err:
+        create_greens_function_library(db, filename, [20.0, 10.0], [0.0])
+    assert err.value.args[0] == "Distances must be strictly increasing."
+
+    with pytest.raises(ValueError) as err:
+        create_greens_function_library(db, filename, [10.0], [])
+    assert err.value.args[0] == "Depths must be a non-empty 1D array."
+
+    assert not os.path.exists(filename)
@@ -9,7 +9,15 @@ Tests for some helper routines.
     GNU Lesser General Public License, Version 3 [non-commercial/academic use]
     (http://www.gnu.org/copyleft/lgpl.html)
 """
-from instaseis.helpers import io_chunker
+import numpy as np
+
+from instaseis.helpers import (
+    find_runs,
+    get_morton_codes,
+    io_chunker,
+    plan_reads,
+    sort_gll_point_ids,
+)
 
 
 def test_io_chunker():
@@ -27,3 +35,73 @@ def test_io_chunker():
     # A couple more complex cases.
     assert io_chunker([0, 1, 2, 4, 6, 7, 8]) == [[0, 3], 4, [6, 9]]
     assert io_chunker([0, 2, 4, 6, 7, 8, 10]) == [0, 2, 4, [6, 9], 10]
+
+
+def test_find_runs():
+    starts, stops = find_runs([0, 1, 2, 4, 6, 7, 8])
+    np.testing.assert_array_equal(starts, [0, 4, 6])
+    np.testing.assert_array_equal(stops, [3, 5, 9])
+
+    starts, stops = find_runs([])
+    assert len(starts) == len(stops) == 0
+
+
+def test_plan_reads():
+    ids = [0, 1, 2, 4, 6, 7, 8, 20, 21]
+
+    # Without allowed gaps, the runs are read separately.
+    reads, positions = plan_reads(ids)
+    assert reads == [(0, 3), (4, 5), (6, 9), (20, 22)]
+    np.testing.assert_array_equal(positions, np.arange(9))
+
+    # Close runs are merged.
+    reads, positions = plan_reads(ids, max_gap=1)
+    assert reads == [(0, 9), (20, 22)]
+    np.testing.assert_array_equal(positions, [0, 1, 2, 4, 6, 7, 8, 9, 10])
+
+    reads, positions = plan_reads(ids, max_gap=20)
+    assert reads == [(0, 22)]
+    np.testing.assert_array_equal(positions, ids)
+
+    # Selecting the positions from the concatenated reads gives the data of
+    # the ids.
+    data = np.arange(100) * 10
+    for max_gap in [0, 1, 5, 20]:
+        reads, positions = plan_reads(ids, max_gap=max_gap)
+        read = np.concatenate([data[_a:_b] for _a, _b in reads])
+        np.testing.assert_array_equal(read[positions], data[ids])
+
+    reads, positions = plan_reads([])
+    assert reads == []
+    assert len(positions) == 0
+
+
+def test_sort_gll_point_ids():
+    gll_point_ids = np.array([[7, 3, 10], [0, 12, 5], [4, 1, 9]])
+    s_ids, positions = sort_gll_point_ids(gll_point_ids)
+    np.testing.assert_array_equal(s_ids, [0, 1, 3, 4, 5, 7, 9, 10, 12])
+    assert positions.shape == (3, 3)
+    # Indexed by [jpol, ipol].
+    for ipol in range(3):
+        for jpol in range(3):
+            assert s_ids[positions[jpol, ipol]] == gll_point_ids[ipol, jpol]
+
+
+def test_get_morton_codes():
+    # The bits of the three axes are interleaved.
+    codes = get_morton_codes(
+        [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 1]]
+    )
+    assert codes.dtype == np.uint64
+    assert list(codes) == [
+        0,
+        0x1249249249249249,
+        0x1249249249249249 << 1,
+        0x1249249249249249 << 2,
+        2 ** 63 - 1,
+    ]
+
+    # Sorting traverses a 2 x 2 x 2 grid in Z-order.
+    grid = [[x, y, z] for z in range(2) for y in range(2) for x in range(2)]
+    order = np.argsort(get_morton_codes(grid[::-1]))
+    assert [grid[::-1][_i] for _i in order] == grid
@@ -12,17 +12,31 @@ Basic integration tests for the AxiSEM database Python interface.
 """
 import inspect
 import io
+import json
 import math
 import numpy as np
 import obspy
 import os
 import pytest
 import shutil
+import threading
 
 import instaseis
 from instaseis import InstaseisError, InstaseisNotFoundError
 from instaseis.database_interfaces import find_and_open_files
+from instaseis.database_interfaces.base_netcdf_instaseis_db import (
+    Coordinates,
+)
+from instaseis.database_interfaces.mesh import ReuseWindow, SharedBuffer
+from instaseis.database_interfaces.native_mesh import (
+    NATIVE_FILENAME,
+    write_native_file,
+)
+from instaseis.database_interfaces.reciprocal_native_instaseis_db import (
+    ReciprocalNativeInstaseisDB,
+)
 from instaseis.database_interfaces.base_instaseis_db import (
+    BaseInstaseisDB,
     _get_seismogram_times,
 )
 from instaseis import Source, Receiver, ForceSource, FiniteSource
@@ -915,6 +929,84 @@ def test_get_greens_vs_get_seismogram(bwd_db):
     assert isinstance(greens_data, dict)
 
 
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_get_greens_function_single_pass(bwd_db):
+    """
+    The Green's functions are derived from one set of moment tensor kernels
+    and must be the same as extracting them with get_seismograms().
+    """
+    db = find_and_open_files(bwd_db)
+    receiver = Receiver(latitude=70.0, longitude=0.0)
+    kwargs = {"kind": "velocity", "dt": db.info.dt / 2.0}
+
+    st = db.get_greens_function(20.0, 1000.0, **kwargs)
+    assert [tr.stats.channel for tr in st] == [
+        "TSS",
+        "ZSS",
+        "RSS",
+        "TDS",
+        "ZDS",
+        "RDS",
+        "ZDD",
+        "RDD",
+        "ZEP",
+        "REP",
+    ]
+
+    for name, tensor in [
+        ("TSS", {"m_tp": -1.0}),
+        ("ZSS", {"m_tt": 1.0, "m_pp": -1.0}),
+        ("TDS", {"m_rp": -1.0}),
+        ("RDS", {"m_rt": 1.0}),
+        ("ZDD", {"m_rr": 2.0, "m_tt": -1.0, "m_pp": -1.0}),
+        ("REP", {"m_rr": 1.0, "m_tt": 1.0, "m_pp": 1.0}),
+    ]:
+        source = Source(
+            latitude=90.0, longitude=0.0, depth_in_m=1000.0, **tensor
+        )
+        tr = db.get_seismograms(
+            source=source, receiver=receiver, components=name[0], **kwargs
+        )[0]
+        tr_greens = st.select(channel=name)[0]
+        assert tr.stats.starttime == tr_greens.stats.starttime
+        assert tr.stats.delta == tr_greens.stats.delta
+        assert tr.stats.instaseis.mu == tr_greens.stats.instaseis.mu
+        np.testing.assert_allclose(
+            tr_greens.data,
+            tr.data,
+            rtol=1e-7,
+            atol=np.abs(tr.data).max() * 1e-9,
+        )
+
+    # Arrays of distances and depths.
+    distances = [20.0, 30.0, 40.0]
+    result = db.get_greens_function(
+        distances, 1000.0, return_obspy_stream=False, **kwargs
+    )
+    assert isinstance(result, list)
+    assert len(result) == 3
+    for distance, data in zip(distances, result):
+        expected = db.get_greens_function(
+            distance, 1000.0, return_obspy_stream=False, **kwargs
+        )
+        assert sorted(data.keys()) == sorted(expected.keys())
+        for key in expected:
+            np.testing.assert_array_equal(data[key], expected[key])
+
+    # Broadcast arrays are returned as a flat list of streams.
+    depths = [1000.0, 5000.0]
+    result = db.get_greens_function(
+        np.array(distances[:2])[:, np.newaxis], depths, **kwargs
+    )
+    assert isinstance(result, list)
+    assert len(result) == 4
+    pairs = [(_d, _z) for _d in distances[:2] for _z in depths]
+    for (distance, depth), st in zip(pairs, result):
+        assert isinstance(st, obspy.Stream)
+        expected = db.get_greens_function(distance, depth, **kwargs)
+        assert st == expected
+
+
 @pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
 def test_greens_function_failures(bwd_db):
     """
@@ -1093,6 +1185,353 @@ def test_finite_source(bwd_db):
     assert st != st_2
 
 
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_finite_source_summation_in_frequency_domain(bwd_db, monkeypatch):
+    """
+    The point sources of a finite source are summed in the frequency domain
+    in blocks. Point sources sharing a location are contracted as moment
+    tensor kernels. Must be the same as summing the single seismograms.
+    """
+    from obspy.signal.filter import lowpass
+
+    # Small blocks to test summing over multiple blocks.
+    monkeypatch.setattr(
+        "instaseis.database_interfaces.base_instaseis_db."
+        "FINITE_SOURCE_BLOCK_SIZE",
+        2,
+    )
+
+    db = find_and_open_files(bwd_db)
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    components = ("Z", "N", "E", "R", "T")
+
+    dt = db.info.dt
+    sliprate = np.zeros(1000)
+    sliprate[0] = 1.0
+    sliprate = lowpass(sliprate, 1.0 / 100.0, 1.0 / dt, corners=4)
+
+    sources = []
+    for _i, (lat, depth) in enumerate(
+        [(89.91, 12000), (89.0, 15000), (89.0, 15000), (88.0, 5000)] * 2
+    ):
+        source = Source(
+            latitude=lat,
+            longitude=10.0,
+            depth_in_m=depth,
+            m_rr=1e17 * (_i + 1),
+            m_tt=-2e16 * _i,
+            m_pp=-1e17,
+            m_rt=4e16,
+            m_rp=-8e16 * _i,
+            m_tp=-1.2e17,
+        )
+        source.set_sliprate(
+            sliprate[: 500 + 100 * _i], dt, time_shift=10.0 * _i
+        )
+        sources.append(source)
+
+    progress = []
+    st_fin = db.get_seismograms_finite_source(
+        sources=sources,
+        receiver=receiver,
+        components=components,
+        correct_mu=True,
+        progress_callback=lambda current, total: progress.append(
+            (current, total)
+        ),
+    )
+    assert progress == [(_i + 1, len(sources)) for _i in range(len(sources))]
+
+    for comp in components:
+        ref = np.zeros(db.info.npts)
+        for source in sources:
+            data = db.get_seismograms(
+                source=source,
+                receiver=receiver,
+                components=[comp],
+                reconvolve_stf=True,
+                remove_source_shift=False,
+                return_obspy_stream=False,
+            )
+            ref += data[comp] * data["mu"] / 32e9
+        np.testing.assert_allclose(
+            st_fin.select(component=comp)[0].data,
+            ref,
+            rtol=1e-7,
+            atol=np.abs(ref).max() * 1e-10,
+        )
+
+    # The calculation can be cancelled.
+    assert (
+        db.get_seismograms_finite_source(
+            sources=sources,
+            receiver=receiver,
+            components=components,
+            progress_callback=lambda current, total: current == 3,
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_finite_source_parallel(bwd_db):
+    """
+    Summing the point sources in several worker processes must give the
+    same result as doing it serially.
+    """
+    db = find_and_open_files(bwd_db)
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+
+    sources = []
+    for _i in range(10):
+        source = Source(
+            latitude=89.0 - 0.1 * (_i // 2),
+            longitude=10.0 * _i,
+            depth_in_m=10000.0,
+            m_rr=1e17,
+            m_tt=-1e17 * _i,
+            m_rp=3e16,
+        )
+        source.set_sliprate(np.hanning(50), db.info.dt, time_shift=5.0 * _i)
+        sources.append(source)
+
+    st_serial = db.get_seismograms_finite_source(
+        sources=sources, receiver=receiver, dt=db.info.dt / 2.0
+    )
+
+    progress = []
+    st_parallel = db.get_seismograms_finite_source(
+        sources=sources,
+        receiver=receiver,
+        dt=db.info.dt / 2.0,
+        n_workers=3,
+        progress_callback=lambda current, total: progress.append(
+            (current, total)
+        ),
+    )
+    assert progress[-1] == (10, 10)
+    assert progress == sorted(progress)
+
+    assert len(st_serial) == len(st_parallel)
+    for tr_serial, tr_parallel in zip(st_serial, st_parallel):
+        assert tr_serial.stats == tr_parallel.stats
+        np.testing.assert_allclose(
+            tr_parallel.data,
+            tr_serial.data,
+            rtol=1e-10,
+            atol=np.abs(tr_serial.data).max() * 1e-12,
+        )
+
+    # The calculation can be cancelled.
+    assert (
+        db.get_seismograms_finite_source(
+            sources=sources,
+            receiver=receiver,
+            n_workers=2,
+            progress_callback=lambda current, total: True,
+        )
+        is None
+    )
+
+    # Parallel calls from several threads must not mix up their sources.
+    other_sources = sources[::-1][:5]
+    st_other = db.get_seismograms_finite_source(
+        sources=other_sources, receiver=receiver
+    )
+    results = {}
+
+    def _run(name, srcs):
+        for _ in range(3):
+            results.setdefault(name, []).append(
+                db.get_seismograms_finite_source(
+                    sources=srcs, receiver=receiver, n_workers=2
+                )
+            )
+
+    threads = [
+        threading.Thread(target=_run, args=("all", sources[:])),
+        threading.Thread(target=_run, args=("other", other_sources)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    st_all = db.get_seismograms_finite_source(
+        sources=sources, receiver=receiver
+    )
+    for name, expected in [("all", st_all), ("other", st_other)]:
+        assert len(results[name]) == 3
+        for st in results[name]:
+            for tr, tr_expected in zip(st, expected):
+                np.testing.assert_allclose(
+                    tr.data,
+                    tr_expected.data,
+                    rtol=1e-10,
+                    atol=np.abs(tr_expected.data).max() * 1e-12,
+                )
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_finite_source_sorted_traversal(bwd_db):
+    """
+    Sorting the point sources must not change the result.
+    """
+    db = find_and_open_files(bwd_db)
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+
+    # Row-major order along a fault.
+    sources = []
+    for _i in range(4):
+        for _j in range(5):
+            source = Source(
+                latitude=89.0 + 0.2 * _j,
+                longitude=10.0 * _j,
+                depth_in_m=5000.0 + 3000.0 * _i,
+                m_rr=1e17,
+                m_tt=-1e17,
+                m_rp=3e16 * _j,
+            )
+            source.set_sliprate(
+                np.hanning(50), db.info.dt, time_shift=2.0 * _j
+            )
+            sources.append(source)
+
+    # The sort keys are the element ids.
+    keys = db._get_finite_source_sort_keys(sources, receiver)
+    for key, source in zip(keys, sources):
+        coordinates = db._get_coordinates(source=source, receiver=receiver)
+        assert key == db._get_element_info(coordinates).id_elem
+
+    # The default implementation uses a space filling curve.
+    keys = BaseInstaseisDB._get_finite_source_sort_keys(db, sources, receiver)
+    assert len(set(keys)) == len(sources)
+
+    st = db.get_seismograms_finite_source(sources=sources, receiver=receiver)
+    progress = []
+    st_sorted = db.get_seismograms_finite_source(
+        sources=sources,
+        receiver=receiver,
+        sort_sources=True,
+        progress_callback=lambda current, total: progress.append(current),
+    )
+    assert progress == list(range(1, 21))
+
+    for tr, tr_sorted in zip(st, st_sorted):
+        assert tr.stats == tr_sorted.stats
+        np.testing.assert_allclose(
+            tr_sorted.data, tr.data, rtol=1e-10, atol=1e-12
+        )
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_finite_source_grouped_by_element(bwd_db):
+    """
+    Point sources in the same element are summed after each other and
+    share the reads of the element, which must not change the result.
+    Sources given by any iterable are summed while iterating.
+    """
+    db = find_and_open_files(bwd_db)
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+
+    # Alternate between two spots with several close locations each.
+    sources = []
+    for _i in range(3):
+        for latitude in (89.0, 70.0):
+            source = Source(
+                latitude=latitude + 0.001 * _i,
+                longitude=10.0,
+                depth_in_m=10000.0 + 10.0 * _i,
+                m_rr=1e17,
+                m_tt=-1e17 * _i,
+                m_rp=3e16,
+            )
+            source.set_sliprate(
+                np.hanning(50), db.info.dt, time_shift=2.0 * _i
+            )
+            sources.append(source)
+
+    groups, element_ids = db._group_finite_source(
+        sources=sources, receiver=receiver, components="ZNE"
+    )
+    assert [_i[0] for _i in groups] == sources[::2] + sources[1::2]
+    assert element_ids[:3] == [element_ids[0]] * 3
+    assert element_ids[3:] == [element_ids[3]] * 3
+    assert element_ids[0] != element_ids[3]
+
+    st = db.get_seismograms_finite_source(sources=sources, receiver=receiver)
+
+    progress = []
+    st_iterated = db.get_seismograms_finite_source(
+        sources=(_i for _i in sources),
+        receiver=receiver,
+        progress_callback=lambda current, total: progress.append(
+            (current, total)
+        ),
+    )
+    assert progress == [(_i, None) for _i in range(1, 7)]
+
+    # Finite sources start over once they are exhausted.
+    st_finite = db.get_seismograms_finite_source(
+        sources=FiniteSource(pointsources=sources), receiver=receiver
+    )
+
+    # Without knowing the elements every location is read on its own.
+    db._get_finite_source_element_ids = lambda sources, receiver: None
+    st_ungrouped = db.get_seismograms_finite_source(
+        sources=sources, receiver=receiver
+    )
+
+    for tr, tr_iterated, tr_finite, tr_ungrouped in zip(
+        st, st_iterated, st_finite, st_ungrouped
+    ):
+        assert tr.stats == tr_iterated.stats == tr_ungrouped.stats
+        assert tr.stats == tr_finite.stats
+        np.testing.assert_allclose(
+            tr_iterated.data, tr.data, rtol=1e-10, atol=1e-12
+        )
+        np.testing.assert_allclose(
+            tr_finite.data, tr.data, rtol=1e-10, atol=1e-12
+        )
+        np.testing.assert_allclose(
+            tr_ungrouped.data,
+            tr.data,
+            rtol=1e-10,
+            atol=np.abs(tr.data).max() * 1e-12,
+        )
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_finite_source_from_srf_iterator(bwd_db):
+    """
+    The point sources lazily read from a .srf file can directly be summed.
+    """
+    db = find_and_open_files(bwd_db)
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    filename = os.path.join(DATA, "strike_slip_eq_10pts.srf")
+
+    finite_source = FiniteSource.from_srf_file(filename, True)
+    finite_source.resample_sliprate(dt=db.info.dt, nsamp=db.info.npts)
+    st = db.get_seismograms_finite_source(
+        sources=finite_source, receiver=receiver, dt=db.info.dt
+    )
+
+    def iter_sources():
+        for source in FiniteSource.iter_srf_file(filename, True):
+            source.resample_sliprate(dt=db.info.dt, nsamp=db.info.npts)
+            yield source
+
+    st_iterated = db.get_seismograms_finite_source(
+        sources=iter_sources(), receiver=receiver, dt=db.info.dt
+    )
+
+    assert len(st) == len(st_iterated)
+    for tr, tr_iterated in zip(st, st_iterated):
+        assert tr.stats == tr_iterated.stats
+        np.testing.assert_allclose(
+            tr_iterated.data, tr.data, rtol=1e-10, atol=1e-12
+        )
+
+
 def test_get_band_code_method():
     """
     Dummy test assuring the band code is determined correctly.
@@ -1936,6 +2375,14 @@ def test_wgs84_to_geocentric():
     assert 0.19 < 45.0 - elliptic_to_geocentric_latitude(45.0) < 0.2
     assert -0.19 > -45 - elliptic_to_geocentric_latitude(-45.0) > -0.2
 
+    # Arrays are converted element-wise.
+    lat = np.array([-90.0, -45.0, -0.1, 0.0, 1e-7, 30.0, 89.9, 90.0])
+    np.testing.assert_allclose(
+        elliptic_to_geocentric_latitude(lat),
+        [elliptic_to_geocentric_latitude(_i) for _i in lat],
+        rtol=1e-14,
+    )
+
 
 def test_geocentric_to_wgs84():
     """
@@ -2169,6 +2616,411 @@ def test_failures_when_opening_databases(tmpdir):
     )
 
 
+@pytest.mark.parametrize("database_folder", DBS)
+@pytest.mark.parametrize("read_on_demand", [True, False])
+def test_get_element_info_batch(database_folder, read_on_demand):
+    """
+    The vectorized element lookup must find the same elements as the scalar
+    one.
+    """
+    db = find_and_open_files(database_folder, read_on_demand=read_on_demand)
+
+    np.random.seed(12345)
+    radius = db.info.planet_radius - np.random.uniform(0.0, 100e3, 50)
+    theta = np.random.uniform(0.0, np.pi, 50)
+    s = radius * np.sin(theta)
+    z = radius * np.cos(theta)
+
+    table = db._get_element_info_batch(s=s, z=z)
+    assert len(table.id_elem) == 50
+
+    for _i in range(len(s)):
+        ref = db._get_element_info(Coordinates(s=s[_i], phi=0.0, z=z[_i]))
+        info = db._get_element_info_from_table(table, _i)
+        assert info._fields == ref._fields
+        for name, value in zip(ref._fields, ref):
+            np.testing.assert_array_equal(getattr(info, name), value)
+
+
+@pytest.mark.parametrize("database_folder", DBS)
+def test_mesh_index(tmpdir, database_folder):
+    """
+    Tests the on-disk index of the mesh.
+    """
+    # Native databases need no index.
+    if "native" in database_folder:
+        return
+
+    folder = os.path.join(tmpdir.strpath, "db")
+    shutil.copytree(database_folder, folder)
+
+    db = find_and_open_files(folder, read_on_demand=False)
+    assert db.parsed_mesh._has_index is False
+    db.parsed_mesh.write_index()
+    assert os.path.exists(db.parsed_mesh.index_folder)
+
+    indexed = find_and_open_files(folder, read_on_demand=False)
+    assert indexed.parsed_mesh._has_index is True
+    assert isinstance(indexed.parsed_mesh.mesh_mu, np.memmap)
+    np.testing.assert_array_equal(
+        indexed.parsed_mesh.mesh, db.parsed_mesh.mesh
+    )
+    np.testing.assert_array_equal(
+        indexed.parsed_mesh.mesh_mu, db.parsed_mesh.mesh_mu
+    )
+    if db.info.dump_type == "displ_only":
+        for name in ["fem_mesh", "eltypes", "sem_mesh", "axis"]:
+            np.testing.assert_array_equal(
+                getattr(indexed.parsed_mesh, name),
+                getattr(db.parsed_mesh, name),
+            )
+
+    s = db.parsed_mesh.mesh[::7, 0]
+    z = db.parsed_mesh.mesh[::7, 1]
+    for a, b in zip(
+        db._get_element_info_batch(s=s, z=z),
+        indexed._get_element_info_batch(s=s, z=z),
+    ):
+        np.testing.assert_array_equal(a, b)
+
+    # The index is no longer used once it does not match the file.
+    meta_filename = os.path.join(db.parsed_mesh.index_folder, "index.json")
+    with io.open(meta_filename, "r") as fh:
+        meta = json.load(fh)
+    meta["file size"] += 1
+    with io.open(meta_filename, "w") as fh:
+        json.dump(meta, fh)
+
+    with pytest.warns(UserWarning) as w:
+        stale = find_and_open_files(folder, read_on_demand=False)
+    assert "will not be used" in str(w[0].message)
+    assert stale.parsed_mesh._has_index is False
+
+    # Unreadable indices are not used either.
+    db.parsed_mesh.write_index()
+    with io.open(
+        os.path.join(db.parsed_mesh.index_folder, "kdtree_points.npy"), "wb"
+    ) as fh:
+        fh.write(b"not an array")
+    with pytest.warns(UserWarning) as w:
+        broken = find_and_open_files(folder, read_on_demand=False)
+    assert "could not be read" in str(w[0].message)
+    assert broken.parsed_mesh._has_index is False
+    np.testing.assert_array_equal(broken.parsed_mesh.mesh, db.parsed_mesh.mesh)
+
+
+@pytest.mark.parametrize("database_folder", DBS)
+def test_shared_buffers(database_folder):
+    """
+    Buffers in shared memory must not change the results.
+    """
+    # The test source is not valid for deep forward DBs.
+    if "fwd_deep" in database_folder:
+        return
+
+    db = find_and_open_files(database_folder)
+    shared_db = find_and_open_files(database_folder, shared_buffers=True)
+    assert isinstance(shared_db.parsed_mesh.displ_buffer, SharedBuffer)
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    source = Source(
+        latitude=89.91,
+        longitude=0.0,
+        depth_in_m=None if "fwd" in database_folder else 12000,
+        m_rr=4.710000e24 / 1e7,
+        m_tt=3.810000e22 / 1e7,
+        m_pp=-4.740000e24 / 1e7,
+        m_rt=3.990000e23 / 1e7,
+        m_rp=-8.050000e23 / 1e7,
+        m_tp=-1.230000e24 / 1e7,
+    )
+    components = db.available_components
+
+    st = db.get_seismograms(
+        source=source, receiver=receiver, components=components
+    )
+    # The second time is served from the buffers.
+    for _ in range(2):
+        st_shared = shared_db.get_seismograms(
+            source=source, receiver=receiver, components=components
+        )
+        for tr, tr_shared in zip(st, st_shared):
+            np.testing.assert_array_equal(tr.data, tr_shared.data)
+
+    buffers = [
+        shared_db.parsed_mesh.displ_buffer,
+        shared_db.parsed_mesh.strain_buffer,
+    ]
+    assert max(_i.efficiency for _i in buffers) > 0.0
+
+
+@pytest.mark.parametrize("buffer_policy", ["lfu", "arc", "tinylfu"])
+def test_buffer_policies(buffer_policy):
+    """
+    The buffer policy must not change the results.
+    """
+    path = os.path.join(DATA, "100s_db_bwd_displ_only")
+    db = find_and_open_files(path)
+    # Small buffers to force evictions.
+    other_db = find_and_open_files(
+        path, buffer_size_in_mb=0.05, buffer_policy=buffer_policy
+    )
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    for _i in range(10):
+        source = Source(
+            latitude=10.0 * _i,
+            longitude=12.0 * _i,
+            depth_in_m=12000,
+            m_rr=4.710000e24 / 1e7,
+            m_tt=3.810000e22 / 1e7,
+            m_pp=-4.740000e24 / 1e7,
+        )
+        st = db.get_seismograms(source=source, receiver=receiver)
+        st_other = other_db.get_seismograms(source=source, receiver=receiver)
+        for tr, tr_other in zip(st, st_other):
+            np.testing.assert_array_equal(tr.data, tr_other.data)
+
+    assert other_db.parsed_mesh.strain_buffer.evictions > 0
+
+    with pytest.raises(ValueError) as err:
+        find_and_open_files(
+            path, shared_buffers=True, buffer_policy=buffer_policy
+        )
+    assert err.value.args[0] == (
+        "Shared buffers only support the 'lru' buffer policy."
+    )
+
+
+@pytest.mark.parametrize("codec", ["zlib", "float32+zlib"])
+def test_compressed_buffer(codec):
+    """
+    The second buffer tier must not change the results - apart from the
+    rounding when storing in single precision.
+    """
+    path = os.path.join(DATA, "100s_db_bwd_displ_only")
+    db = find_and_open_files(path)
+    # Small buffers to force evictions to the second tier.
+    other_db = find_and_open_files(
+        path,
+        buffer_size_in_mb=0.05,
+        compressed_buffer_size_in_mb=10,
+        compressed_buffer_codec=codec,
+    )
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    for _ in range(2):
+        for _i in range(10):
+            source = Source(
+                latitude=10.0 * _i,
+                longitude=12.0 * _i,
+                depth_in_m=12000,
+                m_rr=4.710000e24 / 1e7,
+                m_tt=3.810000e22 / 1e7,
+                m_pp=-4.740000e24 / 1e7,
+            )
+            st = db.get_seismograms(source=source, receiver=receiver)
+            st_other = other_db.get_seismograms(
+                source=source, receiver=receiver
+            )
+            for tr, tr_other in zip(st, st_other):
+                if codec == "zlib":
+                    np.testing.assert_array_equal(tr.data, tr_other.data)
+                else:
+                    np.testing.assert_allclose(
+                        tr.data,
+                        tr_other.data,
+                        rtol=1e-5,
+                        atol=1e-5 * np.abs(tr.data).max(),
+                    )
+
+    assert other_db.parsed_mesh.strain_buffer.second_tier.hits > 0
+
+    with pytest.raises(ValueError) as err:
+        find_and_open_files(
+            path, shared_buffers=True, compressed_buffer_size_in_mb=10
+        )
+    assert err.value.args[0] == (
+        "Shared buffers cannot be combined with a compressed buffer."
+    )
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_interpolation_buffer(bwd_db):
+    """
+    Repeated requests for the same receiver reuse the interpolated strain.
+    """
+    db = find_and_open_files(bwd_db)
+    other_db = find_and_open_files(bwd_db, interpolation_buffer_size_in_mb=10)
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    for _i in range(3):
+        source = Source(
+            latitude=89.91,
+            longitude=0.0,
+            depth_in_m=12000,
+            m_rr=4.710000e24 / 1e7 * (_i + 1),
+            m_tt=3.810000e22 / 1e7,
+            m_pp=-4.740000e24 / 1e7,
+            m_rt=3.990000e23 / 1e7 * _i,
+            m_rp=-8.050000e23 / 1e7,
+            m_tp=-1.230000e24 / 1e7,
+        )
+        st = db.get_seismograms(source=source, receiver=receiver)
+        st_other = other_db.get_seismograms(source=source, receiver=receiver)
+        for tr, tr_other in zip(st, st_other):
+            np.testing.assert_array_equal(tr.data, tr_other.data)
+
+    buffers = [_i.interp_buffer for _i in other_db.meshes if _i is not None]
+    assert sum(_i.hits for _i in buffers) > 0
+    assert sum(_i.misses for _i in buffers) == sum(
+        len(_i._buffer) for _i in buffers
+    )
+
+    # The disabled default buffer is not even queried.
+    buffers = [_i.interp_buffer for _i in db.meshes if _i is not None]
+    assert not any(_i.enabled for _i in buffers)
+    assert sum(_i.hits + _i.misses for _i in buffers) == 0
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_unbuffered_strain_is_evaluated_at_point(bwd_db):
+    """
+    Without strain buffer the strain is directly evaluated at the source
+    location which must give the same result.
+    """
+    db = find_and_open_files(bwd_db)
+    other_db = find_and_open_files(bwd_db, buffer_size_in_mb=0)
+    assert not any(
+        _i.strain_buffer.enabled for _i in other_db.meshes if _i is not None
+    )
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    for depth_in_m in [0.0, 12000.0, 100000.0]:
+        for latitude in [89.91, 10.0, -45.0]:
+            source = Source(
+                latitude=latitude,
+                longitude=12.0,
+                depth_in_m=depth_in_m,
+                m_rr=4.710000e24 / 1e7,
+                m_tt=3.810000e22 / 1e7,
+                m_pp=-4.740000e24 / 1e7,
+                m_rt=3.990000e23 / 1e7,
+                m_rp=-8.050000e23 / 1e7,
+                m_tp=-1.230000e24 / 1e7,
+            )
+            st = db.get_seismograms(source=source, receiver=receiver)
+            st_other = other_db.get_seismograms(
+                source=source, receiver=receiver
+            )
+            for tr, tr_other in zip(st, st_other):
+                np.testing.assert_allclose(
+                    tr_other.data,
+                    tr.data,
+                    rtol=1e-10,
+                    atol=1e-10 * np.abs(tr.data).max(),
+                )
+
+    buffers = [_i.strain_buffer for _i in other_db.meshes if _i is not None]
+    assert sum(_i.get_size_mb() for _i in buffers) == 0.0
+
+
+@pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
+def test_strain_is_evaluated_at_point_if_buffer_misses(bwd_db):
+    """
+    While most recently requested elements are new, they are no longer
+    buffered but the strain is directly evaluated at the source location.
+    Buffering resumes once elements are requested repeatedly again.
+    """
+    db = find_and_open_files(bwd_db)
+    other_db = find_and_open_files(bwd_db)
+    other_db._FUSED_STRAIN_MIN_REQUESTS = 4
+    meshes = [_i for _i in other_db.meshes if _i is not None]
+    for mesh in meshes:
+        mesh.strain_requests = ReuseWindow(size=4)
+    buffers = [_i.strain_buffer for _i in meshes]
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+
+    def _extract(latitude):
+        source = Source(
+            latitude=latitude,
+            longitude=12.0,
+            depth_in_m=12000.0,
+            m_rr=4.710000e24 / 1e7,
+            m_tt=3.810000e22 / 1e7,
+            m_pp=-4.740000e24 / 1e7,
+            m_rt=3.990000e23 / 1e7,
+            m_rp=-8.050000e23 / 1e7,
+            m_tp=-1.230000e24 / 1e7,
+        )
+        st = db.get_seismograms(source=source, receiver=receiver)
+        st_other = other_db.get_seismograms(source=source, receiver=receiver)
+        for tr, tr_other in zip(st, st_other):
+            np.testing.assert_allclose(
+                tr_other.data,
+                tr.data,
+                rtol=1e-10,
+                atol=1e-10 * np.abs(tr.data).max(),
+            )
+
+    # Phase with only new elements: the first three are buffered, the
+    # others are evaluated directly.
+    for latitude in [89.91, 10.0, -45.0, 30.0]:
+        _extract(latitude)
+    size = sum(_i.get_size_mb() for _i in buffers)
+    assert size > 0.0
+    for mesh in meshes:
+        assert mesh.strain_requests.reuse_rate == 0.0
+    hits = [_i.hits for _i in buffers]
+
+    # Phase repeatedly requesting a single new element: it is buffered
+    # again once the repeated requests dominate the window.
+    for _ in range(4):
+        _extract(-20.0)
+    for mesh in meshes:
+        assert mesh.strain_requests.reuse_rate == 0.75
+    assert sum(_i.get_size_mb() for _i in buffers) > size
+    for buffer, old_hits in zip(buffers, hits):
+        assert buffer.hits == old_hits + 1
+
+
+@pytest.mark.parametrize("database_folder", DBS)
+@pytest.mark.parametrize("max_gap", [0, 1000000])
+def test_coalesced_reads(database_folder, max_gap, monkeypatch):
+    """
+    Reading the GLL points of an element with more or less merged reads
+    must not change the results.
+    """
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    source = Source(
+        latitude=10.0,
+        longitude=12.0,
+        depth_in_m=12000,
+        m_rr=4.710000e24 / 1e7,
+        m_tt=3.810000e22 / 1e7,
+        m_pp=-4.740000e24 / 1e7,
+        m_rt=3.990000e23 / 1e7,
+        m_rp=-8.050000e23 / 1e7,
+        m_tp=-1.230000e24 / 1e7,
+    )
+
+    st = find_and_open_files(database_folder).get_seismograms(
+        source=source, receiver=receiver
+    )
+
+    monkeypatch.setattr(
+        "instaseis.database_interfaces.base_netcdf_instaseis_db.IO_MAX_GAP",
+        max_gap,
+    )
+    st_other = find_and_open_files(database_folder).get_seismograms(
+        source=source, receiver=receiver
+    )
+
+    for tr, tr_other in zip(st, st_other):
+        np.testing.assert_array_equal(tr.data, tr_other.data)
+
+
 @pytest.mark.parametrize("database_folder", DBS)
 @pytest.mark.parametrize("read_on_demand", [True, False])
 def test_read_on_demand(database_folder, read_on_demand):
@@ -2228,6 +3080,81 @@ def test_read_on_demand(database_folder, read_on_demand):
     )
 
 
+@pytest.mark.parametrize(
+    "database_folder", [_i for _i in DBS if "merged" in os.path.basename(_i)]
+)
+def test_read_merged_element(database_folder):
+    """
+    Elements of merged databases are directly read into Fortran-ordered
+    arrays in the order of the compiled routines.
+    """
+    db = find_and_open_files(database_folder)
+    mesh = db.meshes.merged
+    dataset = mesh.f["MergedSnapshots"]
+
+    for id_elem in [0, 17, dataset.shape[0] - 1]:
+        expected = np.transpose(dataset[id_elem], (3, 1, 2, 0))
+        for dtype in [None, np.float64]:
+            utemp = mesh.read_merged_element(id_elem, dtype=dtype)
+            assert utemp.flags.f_contiguous
+            assert utemp.dtype == (dtype or dataset.dtype)
+            np.testing.assert_array_equal(utemp, expected)
+            # Slices of the components do not need a copy.
+            assert utemp[:, :, :, -2:].flags.f_contiguous
+
+
+@pytest.mark.parametrize("database_folder", DBS)
+def test_memory_mapped_datasets(database_folder):
+    """
+    Contiguous datasets are read through memory maps which must not change
+    the results.
+    """
+    db = find_and_open_files(database_folder)
+    db_hdf5 = find_and_open_files(database_folder, memory_map=False)
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    source = Source(
+        latitude=10.0,
+        longitude=12.0,
+        depth_in_m=12000,
+        m_rr=4.710000e24 / 1e7,
+        m_tt=3.810000e22 / 1e7,
+        m_pp=-4.740000e24 / 1e7,
+        m_rt=3.990000e23 / 1e7,
+        m_rp=-8.050000e23 / 1e7,
+        m_tp=-1.230000e24 / 1e7,
+    )
+    st = db.get_seismograms(source=source, receiver=receiver)
+    st_hdf5 = db_hdf5.get_seismograms(source=source, receiver=receiver)
+    for tr, tr_hdf5 in zip(st, st_hdf5):
+        np.testing.assert_array_equal(tr.data, tr_hdf5.data)
+
+    # Only contiguous datasets are mapped.
+    for mesh in db.meshes:
+        if mesh is None:
+            continue
+        for name, memory_map in mesh._memory_maps.items():
+            dataset = mesh.f[name]
+            assert (memory_map is not None) == (dataset.chunks is None)
+            if memory_map is not None:
+                np.testing.assert_array_equal(memory_map, dataset[...])
+    for mesh in db_hdf5.meshes:
+        if mesh is not None:
+            assert all(_i is None for _i in mesh._memory_maps.values())
+
+    # Some of the repacked databases are contiguous.
+    if os.path.basename(database_folder) in (
+        "repacked_100s_db_bwd_displ_only",
+        "merged_100s_db_bwd_displ_only",
+    ):
+        assert any(
+            _i is not None
+            for mesh in db.meshes
+            if mesh is not None
+            for _i in mesh._memory_maps.values()
+        )
+
+
 @pytest.mark.skipif(
     "merged_100s_db_fwd" not in _CONFIG_DBS["databases"],
     reason="requires generated tests databases.",
@@ -2277,6 +3204,114 @@ def test_merged_forward_database_layout():
                 assert st_fwd == st_fwd_m
 
 
+@pytest.mark.skipif(
+    "native_100s_db_bwd_displ_only" not in _CONFIG_DBS["databases"],
+    reason="requires generated tests databases.",
+)
+@pytest.mark.parametrize("memory_map", [True, False])
+def test_native_database(tmpdir, memory_map):
+    """
+    Native databases must return the same results as the merged databases
+    they are converted from.
+    """
+    merged = _CONFIG_DBS["databases"]["merged_100s_db_bwd_displ_only"]
+    merged_db = find_and_open_files(merged)
+    db = find_and_open_files(
+        _CONFIG_DBS["databases"]["native_100s_db_bwd_displ_only"],
+        memory_map=memory_map,
+    )
+    assert isinstance(db, ReciprocalNativeInstaseisDB)
+
+    # Half precision with a smaller alignment.
+    half_precision = tmpdir.mkdir("float16")
+    write_native_file(
+        os.path.join(merged, "merged_output.nc4"),
+        half_precision.join(NATIVE_FILENAME).strpath,
+        dtype="float16",
+        alignment=512,
+    )
+    half_db = find_and_open_files(
+        half_precision.strpath, memory_map=memory_map
+    )
+    assert half_db.info.filesize < db.info.filesize
+
+    for mesh, alignment in [
+        (db.meshes.merged, 4096),
+        (half_db.meshes.merged, 512),
+    ]:
+        assert mesh.merged_shape == merged_db.meshes.merged.merged_shape
+        assert np.all(mesh.f.element_offsets % alignment == 0)
+        # Only plain arrays are stored - the kd-tree is built on opening.
+        assert "kdtree" not in mesh.f.header["arrays"]
+        np.testing.assert_array_equal(
+            mesh.kdtree.data, merged_db.meshes.merged.kdtree.data
+        )
+
+    for id_elem in [0, 17, db.meshes.merged.merged_shape[0] - 1]:
+        expected = merged_db.meshes.merged.read_merged_element(id_elem)
+        utemp = db.meshes.merged.read_merged_element(id_elem)
+        assert utemp.flags.f_contiguous
+        np.testing.assert_array_equal(utemp, expected)
+
+        utemp = half_db.meshes.merged.read_merged_element(id_elem)
+        assert utemp.flags.f_contiguous
+        assert utemp.dtype == np.float32
+        np.testing.assert_allclose(
+            utemp, expected, rtol=0, atol=np.abs(expected).max() * 2.0 ** -10
+        )
+
+    receiver = Receiver(latitude=42.6390, longitude=74.4940)
+    for source in [
+        Source(
+            latitude=10.0,
+            longitude=12.0,
+            depth_in_m=12000,
+            m_rr=4.710000e24 / 1e7,
+            m_tt=3.810000e22 / 1e7,
+            m_pp=-4.740000e24 / 1e7,
+            m_rt=3.990000e23 / 1e7,
+            m_rp=-8.050000e23 / 1e7,
+            m_tp=-1.230000e24 / 1e7,
+        ),
+        ForceSource(
+            latitude=10.0,
+            longitude=12.0,
+            depth_in_m=12000,
+            f_r=1.23e10,
+            f_t=1.23e10,
+            f_p=1.23e10,
+        ),
+    ]:
+        st = merged_db.get_seismograms(source=source, receiver=receiver)
+        st_native = db.get_seismograms(source=source, receiver=receiver)
+        st_half = half_db.get_seismograms(source=source, receiver=receiver)
+        for tr, tr_native, tr_half in zip(st, st_native, st_half):
+            np.testing.assert_array_equal(tr_native.data, tr.data)
+            np.testing.assert_allclose(
+                tr_half.data, tr.data, atol=np.abs(tr.data).max() * 2e-2
+            )
+
+    # Files with the name of native files must also have the format.
+    invalid = tmpdir.mkdir("invalid")
+    invalid.join(NATIVE_FILENAME).write("not a database")
+    with pytest.raises(InstaseisError) as err:
+        find_and_open_files(invalid.strpath)
+    assert "is not a native Instaseis database file" in str(err.value)
+
+    with pytest.raises(ValueError):
+        write_native_file(
+            os.path.join(merged, "merged_output.nc4"),
+            tmpdir.join("double").strpath,
+            dtype="float64",
+        )
+    with pytest.raises(ValueError):
+        write_native_file(
+            os.path.join(merged, "merged_output.nc4"),
+            tmpdir.join("unaligned").strpath,
+            alignment=1000,
+        )
+
+
 @pytest.mark.parametrize("bwd_db", BW_DISPL_DBS)
 def test_error_handling_source_too_deep(bwd_db):
     """
@@ -2587,3 +3622,164 @@ def test_exception_when_using_a_finite_source_instead_of_a_normal_source(db):
         "Please use the `get_seismograms_finite_source()` method to compute "
         "seisomgrams with finite sources."
     )
+
+
+@pytest.mark.parametrize(
+    "db", BW_DISPL_DBS + [os.path.join(DATA, "100s_db_fwd")]
+)
+def test_get_seismograms_batch(db):
+    """
+    The batched extraction must return exactly the same as calling
+    get_seismograms() for every receiver.
+    """
+    db = find_and_open_files(db)
+    components = db.available_components
+
+    if db.info.is_reciprocal:
+        depth_in_m = 12000
+    else:
+        depth_in_m = None
+
+    source = Source(
+        latitude=10.0,
+        longitude=20.0,
+        depth_in_m=depth_in_m,
+        m_rr=4.71e17,
+        m_tt=3.81e17,
+        m_pp=-4.74e17,
+        m_rt=3.99e17,
+        m_rp=-8.05e17,
+        m_tp=-1.23e17,
+    )
+    receivers = [
+        Receiver(latitude=40.0, longitude=50.0),
+        Receiver(latitude=-10.0, longitude=100.0),
+        Receiver(latitude=60.0, longitude=-120.0),
+    ]
+
+    for kwargs in [
+        {},
+        {"dt": db.info.dt / 3.0, "kind": "velocity"},
+        {"kind": "acceleration", "remove_source_shift": False},
+    ]:
+        data = db.get_seismograms_batch(
+            source=source, receivers=receivers, components=components, **kwargs
+        )
+        assert data.shape[:2] == (len(receivers), len(components))
+        for _i, receiver in enumerate(receivers):
+            st = db.get_seismograms(
+                source=source,
+                receiver=receiver,
+                components=components,
+                **kwargs,
+            )
+            for _j, comp in enumerate(components):
+                np.testing.assert_array_equal(
+                    data[_i, _j], st.select(component=comp)[0].data
+                )
+
+    # The receiver depths are checked like those of single receivers.
+    if not db.info.is_reciprocal:
+        deep_receiver = Receiver(
+            latitude=-10.0, longitude=100.0, depth_in_m=1e7
+        )
+        with pytest.raises(ValueError) as err:
+            db.get_seismograms_batch(
+                source=source, receivers=[receivers[0], deep_receiver]
+            )
+        with pytest.raises(ValueError) as err_single:
+            db.get_seismograms(source=source, receiver=deep_receiver)
+        assert err.value.args[0].startswith("Receiver too deep.")
+        assert err.value.args[0] == err_single.value.args[0]
+
+    # Distances are checked for all receivers.
+    db.info.max_d = 50.0
+    with pytest.raises(ValueError) as err:
+        db.get_seismograms_batch(source=source, receivers=receivers)
+    assert err.value.args[0].startswith("Epicentral distance is")
+
+
+@pytest.mark.parametrize(
+    "db", BW_DISPL_DBS + [os.path.join(DATA, "100s_db_fwd")]
+)
+def test_get_moment_tensor_kernels(db):
+    """
+    Contracting the kernels with a moment tensor must give the same as
+    get_seismograms() with that moment tensor.
+    """
+    db = find_and_open_files(db)
+    components = db.available_components
+
+    if db.info.is_reciprocal:
+        depth_in_m = 12000
+    else:
+        depth_in_m = None
+
+    tensors = np.array(
+        [
+            [4.71e17, 3.81e17, -4.74e17, 3.99e17, -8.05e17, -1.23e17],
+            [1.0e17, -2.0e17, 1.0e17, 0.0, 0.0, 5.0e17],
+        ]
+    )
+    receiver = Receiver(latitude=40.0, longitude=50.0)
+    location = Source(latitude=10.0, longitude=20.0, depth_in_m=depth_in_m)
+
+    # The single pass extraction must be identical to extracting the
+    # seismograms of six unit moment tensors.
+    kernels, mu = db._get_moment_tensor_kernels(location, receiver, components)
+    kernels_unit, mu_unit = BaseInstaseisDB._get_moment_tensor_kernels(
+        db, location, receiver, components
+    )
+    np.testing.assert_array_equal(kernels, kernels_unit)
+    assert mu == mu_unit
+
+    for kwargs in [
+        {},
+        {"dt": db.info.dt / 3.0, "kind": "velocity"},
+        {"kind": "acceleration", "remove_source_shift": False},
+    ]:
+        kernels = db.get_moment_tensor_kernels(
+            source=location,
+            receiver=receiver,
+            components=components,
+            **kwargs,
+        )
+        assert kernels.shape[:2] == (len(components), 6)
+
+        data = np.einsum("cmt,nm->nct", kernels, tensors)
+        for _i, tensor in enumerate(tensors):
+            source = Source(
+                latitude=10.0,
+                longitude=20.0,
+                depth_in_m=depth_in_m,
+                m_rr=tensor[0],
+                m_tt=tensor[1],
+                m_pp=tensor[2],
+                m_rt=tensor[3],
+                m_rp=tensor[4],
+                m_tp=tensor[5],
+            )
+            st = db.get_seismograms(
+                source=source,
+                receiver=receiver,
+                components=components,
+                **kwargs,
+            )
+            for _j, comp in enumerate(components):
+                expected = st.select(component=comp)[0].data
+                np.testing.assert_allclose(
+                    data[_i, _j],
+                    expected,
+                    rtol=1e-7,
+                    atol=np.abs(expected).max() * 1e-9,
+                )
+
+    with pytest.raises(ValueError) as err:
+        db.get_moment_tensor_kernels(
+            source=ForceSource(latitude=10.0, longitude=20.0),
+            receiver=receiver,
+        )
+    assert err.value.args[0] == (
+        "Moment tensor kernels can only be computed for moment tensor "
+        "sources."
+    )
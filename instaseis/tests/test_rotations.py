@@ -226,3 +226,69 @@ def test_coord_transform_lat_lon_depth_to_xyz_2():
     np.testing.assert_allclose(
         np.array([latitude, longitude, depth_in_m]), np.array([lat, lon, dep])
     )
+
+
+def test_rotations_broadcast_over_arrays():
+    """
+    The rotations of arrays return the stacked results of the single
+    rotations.
+    """
+    rng = np.random.RandomState(12345)
+    n = 20
+    mt = rng.randn(6, n) * 1e20
+    phi = rng.uniform(-np.pi, np.pi, n)
+    theta = rng.uniform(0.0, np.pi, n)
+
+    for name, angles in [
+        ("rotate_symm_tensor_voigt_xyz_earth_to_xyz_src", (phi, theta)),
+        ("rotate_symm_tensor_voigt_xyz_src_to_xyz_earth", (phi, theta)),
+        ("rotate_symm_tensor_voigt_xyz_to_src", (phi,)),
+    ]:
+        rotate = getattr(rotations, name)
+        ref = np.array(
+            [rotate(mt[:, _i], *[_a[_i] for _a in angles]) for _i in range(n)]
+        ).T
+        np.testing.assert_allclose(rotate(mt, *angles), ref, rtol=1e-14)
+
+        # A single tensor broadcasts against arrays of angles.
+        ref = np.array(
+            [rotate(mt[:, 0], *[_a[_i] for _a in angles]) for _i in range(n)]
+        ).T
+        np.testing.assert_allclose(rotate(mt[:, 0], *angles), ref, rtol=1e-14)
+
+    # Many time samples of vectors per set of angles.
+    vec = rng.randn(3, n, 10)
+    angles = [rng.uniform(0.0, np.pi, n) for _ in range(5)]
+    w = rotations.rotate_vector_src_to_NEZ(
+        vec, *[_a[:, np.newaxis] for _a in angles]
+    )
+    for _i in range(n):
+        np.testing.assert_allclose(
+            w[:, _i],
+            rotations.rotate_vector_src_to_NEZ(
+                vec[:, _i], *[_a[_i] for _a in angles]
+            ),
+            rtol=1e-14,
+        )
+    w = rotations.rotate_vector_xyz_src_to_xyz_rec(
+        vec, *[_a[:, np.newaxis] for _a in angles[1:]]
+    )
+    for _i in range(n):
+        np.testing.assert_allclose(
+            w[:, _i],
+            rotations.rotate_vector_xyz_src_to_xyz_rec(
+                vec[:, _i], *[_a[_i] for _a in angles[1:]]
+            ),
+            rtol=1e-14,
+        )
+
+    x, y, z = rng.randn(3, n)
+    lon = rng.uniform(-180.0, 180.0, n)
+    colat = rng.uniform(0.0, 180.0, n)
+    srd, phird, zrd = rotations.rotate_frame_rd(x, y, z, lon, colat)
+    for _i in range(n):
+        np.testing.assert_allclose(
+            [srd[_i], phird[_i], zrd[_i]],
+            rotations.rotate_frame_rd(x[_i], y[_i], z[_i], lon[_i], colat[_i]),
+            rtol=1e-14,
+        )
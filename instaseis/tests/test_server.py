@@ -14,6 +14,7 @@ import io
 import json
 import zipfile
 
+import h5py
 import obspy
 import numpy as np
 from scipy.integrate import simps
@@ -22,6 +23,10 @@ from .tornado_testing_fixtures import *  # NOQA
 from .tornado_testing_fixtures import _assemble_url
 
 import instaseis
+from instaseis.greens_function_library import (
+    GreensFunctionLibrary,
+    create_greens_function_library,
+)
 from instaseis.helpers import geocentric_to_elliptic_latitude
 from instaseis.server import util
 
@@ -683,6 +688,58 @@ def test_greens_function_start_and_origintime(all_greens_clients):
     assert abs(st_new[0].stats.endtime - (time + 60 * 20)) < 60
 
 
+def test_greens_function_retrieval_from_library(all_greens_clients, tmpdir):
+    """
+    Green's functions on the grid of a precomputed library are served from
+    it, all others are still extracted from the database.
+    """
+    client = all_greens_clients
+    db = instaseis.open_db(client.filepath)
+
+    filename = str(tmpdir.join("greens.h5"))
+    create_greens_function_library(
+        db, filename, [10.0, 20.0], [0.0, 1000.0], kinds=("velocity",)
+    )
+    # Scale the library to be able to tell where the data comes from.
+    with h5py.File(filename, "r+") as f:
+        f["greens_functions/velocity_native"][...] *= 2.0
+    client.application.greens_function_library = GreensFunctionLibrary(
+        filename, db=db
+    )
+
+    time = obspy.UTCDateTime(2010, 1, 2, 3, 4, 5)
+    for distance, scale in [(20.0, 2.0), (15.0, 1.0)]:
+        params = {
+            "sourcedepthinmeters": 1e3,
+            "sourcedistanceindegrees": distance,
+            "units": "velocity",
+            "origintime": str(time),
+            "format": "miniseed",
+        }
+        request = fetch_sync(
+            client, _assemble_url("greens_function", **params)
+        )
+        assert request.code == 200
+        st_server = obspy.read(request.buffer)
+
+        st_db = db.get_greens_function(
+            epicentral_distance_in_degree=distance,
+            source_depth_in_m=1e3,
+            origin_time=time,
+            kind="velocity",
+        )
+        assert len(st_server) == len(st_db) == 10
+        for tr_server, tr_db in zip(st_server, st_db):
+            assert tr_server.stats.channel == tr_db.stats.channel
+            assert tr_server.stats.starttime == tr_db.stats.starttime
+            np.testing.assert_allclose(
+                tr_server.data,
+                scale * tr_db.data,
+                rtol=1e-5,
+                atol=1e-5 * np.abs(tr_db.data).max(),
+            )
+
+
 def test_raw_seismograms_error_handling(all_clients):
     """
     Tests error handling of the /seismograms_raw route. Potentially outwards
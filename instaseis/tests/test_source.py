@@ -9,6 +9,7 @@ Tests for source handling.
     GNU Lesser General Public License, Version 3 [non-commercial/academic use]
     (http://www.gnu.org/copyleft/lgpl.html)
 """
+import copy
 import io
 import obspy
 import os
@@ -25,6 +26,9 @@ from instaseis import (
 from instaseis.helpers import elliptic_to_geocentric_latitude
 from instaseis.source import moment2magnitude, magnitude2moment
 from instaseis.source import (
+    FINITE_SOURCE_DTYPE,
+    asymmetric_cosine,
+    _NumberReader,
     fault_vectors_lmn,
     strike_dip_rake_from_ln,
     USGSParamFileParsingException,
@@ -215,6 +219,43 @@ def test_parse_srf_file(tmpdir):
     assert finitesource_2.npointsources == 10
 
 
+def test_iterating_srf_file():
+    """
+    Lazily iterating over the point sources of a .srf file yields the same
+    point sources as reading it at once.
+    """
+    finitesource = FiniteSource.from_srf_file(SRF_FILE, True)
+    sources = FiniteSource.iter_srf_file(SRF_FILE, True)
+    assert not isinstance(sources, list)
+    sources = list(sources)
+    assert len(sources) == finitesource.npointsources
+    for src, ref in zip(sources, finitesource):
+        assert (src.latitude, src.longitude, src.depth_in_m) == (
+            ref.latitude,
+            ref.longitude,
+            ref.depth_in_m,
+        )
+        assert (src.time_shift, src.dt) == (ref.time_shift, ref.dt)
+        np.testing.assert_equal(src.tensor_voigt, ref.tensor_voigt)
+        np.testing.assert_equal(src.sliprate, ref.sliprate)
+
+
+def test_number_reader_chunks():
+    """
+    Numbers cut by the chunk boundaries are read correctly.
+    """
+    text = "1.5 22 -3e2\n 4   \n\n55.25 6\n7"
+    for chunk_size in [1, 2, 3, 5, 1000]:
+        reader = _NumberReader(io.StringIO(text), chunk_size=chunk_size)
+        np.testing.assert_equal(reader.read(2), [1.5, 22.0])
+        np.testing.assert_equal(reader.read(0), [])
+        np.testing.assert_equal(reader.read(4), [-300.0, 4.0, 55.25, 6.0])
+        np.testing.assert_equal(reader.read(1), [7.0])
+        with pytest.raises(SourceParseError) as err:
+            reader.read(1)
+        assert err.value.args[0] == "Unexpected end of file."
+
+
 def test_parsing_empty_usgs_file():
     """
     Parsing an empty USGS file should fail.
@@ -343,6 +384,49 @@ def test_haskell():
     )
 
 
+def test_haskell_shares_source_time_function():
+    """
+    All point sources of a Haskell source share one source time function
+    until a single one of them is changed.
+    """
+    finitesource = FiniteSource.from_Haskell(
+        10.0,
+        20.0,
+        20000.0,
+        30.0,
+        40.0,
+        50.0,
+        1e20,
+        50e3,
+        10e3,
+        3000.0,
+        nl=10,
+        nw=2,
+        trise=2.0,
+        dt=0.5,
+    )
+    assert finitesource.npointsources == 20
+    assert finitesource.sliprates.strides[0] == 0
+    stf = asymmetric_cosine(2.0, None, 9, 0.5)
+    for src in finitesource:
+        np.testing.assert_allclose(src.sliprate, stf)
+        assert src.dt == 0.5
+        np.testing.assert_allclose(src.M0, 1e20 / 20)
+
+    # Stays shared when processing all sliprates.
+    finitesource.normalize_sliprate()
+    finitesource.resample_sliprate(dt=0.25, nsamp=20)
+    assert finitesource.sliprates.strides[0] == 0
+    ref = Source(0.0, 0.0, sliprate=stf, dt=0.5)
+    ref.normalize_sliprate()
+    ref.resample_sliprate(dt=0.25, nsamp=20)
+    np.testing.assert_allclose(finitesource[5].sliprate, ref.sliprate)
+
+    finitesource[0].sliprate = np.ones(3)
+    np.testing.assert_allclose(finitesource[0].sliprate, np.ones(3))
+    np.testing.assert_allclose(finitesource[1].sliprate, ref.sliprate)
+
+
 def test_resample_stf():
     """
     Tests resampling sliprates
@@ -627,14 +711,16 @@ def test_sliprate_convenience_methods_finite_source():
     src = Source(latitude=0.0, longitude=90.0)
     fs = FiniteSource(pointsources=[src])
     fs.set_sliprate_dirac(2.0, 5)
-    np.testing.assert_allclose(np.array([0.5, 0, 0, 0, 0]), src.sliprate)
+    np.testing.assert_allclose(np.array([0.5, 0, 0, 0, 0]), fs[0].sliprate)
+    # The point sources are copied into the finite source.
+    assert src.sliprate is None
 
     src = Source(latitude=0.0, longitude=90.0)
     fs = FiniteSource(pointsources=[src])
     fs.set_sliprate_lp(2.0, 5, 0.1)
     np.testing.assert_allclose(
         np.array([0.023291, 0.111382, 0.211022, 0.186723, 0.045481]),
-        src.sliprate,
+        fs[0].sliprate,
         rtol=1e-3,
     )
 
@@ -643,7 +729,7 @@ def test_sliprate_convenience_methods_finite_source():
     src.dt = 0.25
     fs = FiniteSource(pointsources=[src])
     fs.normalize_sliprate()
-    np.testing.assert_allclose(np.ones(5), src.sliprate)
+    np.testing.assert_allclose(np.ones(5), fs[0].sliprate)
 
 
 def test_sliprate_convenience_methods_force_source():
@@ -743,6 +829,150 @@ def test_finite_source_iteration_over_empty_fs():
     assert err.value.args[0] == "FiniteSource not Initialized"
 
 
+def test_finite_source_from_arrays():
+    """
+    Tests initializing a finite source from arrays and accessing the point
+    sources as views into these arrays.
+    """
+    points = np.zeros(3, dtype=FINITE_SOURCE_DTYPE)
+    points["latitude"] = [10.0, 20.0, 30.0]
+    points["longitude"] = [-10.0, 0.0, 10.0]
+    points["depth_in_m"] = 1000.0
+    points["m_rr"] = [1e18, 2e18, 3e18]
+    points["dt"] = 0.5
+    sliprates = np.array([[0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [2.0, 0.0, 0.0]])
+    fs = FiniteSource.from_arrays(
+        points,
+        sliprates,
+        sliprate_npts=[3, 2, 1],
+        origin_time=obspy.UTCDateTime(2010, 1, 1),
+    )
+
+    assert fs.npointsources == 3
+    assert fs[-1].latitude == 30.0
+    assert fs[1].origin_time == obspy.UTCDateTime(2010, 1, 1)
+    np.testing.assert_allclose(fs[0].sliprate, [0.0, 1.0, 0.0])
+    np.testing.assert_allclose(fs[1].sliprate, [1.0, 1.0])
+    np.testing.assert_allclose(fs[2].sliprate, [2.0])
+    assert fs[0].dt == 0.5
+    assert [_i.latitude for _i in fs[1:]] == [20.0, 30.0]
+    with pytest.raises(IndexError):
+        fs[3]
+
+    # Writing to a view writes to the arrays.
+    fs[0].m_tt = 5e17
+    fs[2].sliprate = np.ones(5)
+    assert fs.points["m_tt"][0] == 5e17
+    np.testing.assert_allclose(fs[2].sliprate, np.ones(5))
+    np.testing.assert_allclose(fs[0].sliprate, [0.0, 1.0, 0.0])
+    assert fs.M0 == sum(_i.M0 for _i in fs)
+
+    # Point sources given to the constructor are copied.
+    src = Source(latitude=0.0, longitude=90.0, m_rr=1e18)
+    fs = FiniteSource(pointsources=[src])
+    fs[0].m_rr = 2e18
+    assert src.m_rr == 1e18
+    assert fs.pointsources[0].m_rr == 2e18
+
+    # The point sources can only be replaced as a whole.
+    assert isinstance(fs.pointsources, tuple)
+    with pytest.raises(AttributeError):
+        fs.pointsources.append(src)
+    fs.pointsources = fs.pointsources + (src,)
+    assert fs.npointsources == 2
+    assert fs.pointsources[1] == src
+
+    # Views are mutable and thus not hashable.
+    with pytest.raises(TypeError):
+        hash(fs[0])
+
+    # Views compare by value with sources and other views.
+    src = Source(
+        latitude=10.0,
+        longitude=-20.0,
+        depth_in_m=1000.0,
+        m_rr=1e18,
+        m_tp=-2e17,
+        time_shift=1.5,
+        sliprate=[0.0, 1.0, 0.5],
+        dt=0.5,
+        origin_time=obspy.UTCDateTime(2010, 1, 1),
+    )
+    fs = FiniteSource(pointsources=[src, Source(latitude=0.0, longitude=0.0)])
+    assert fs.pointsources[0] == src
+    assert src == fs.pointsources[0]
+    assert fs[0] == fs[0]
+    assert fs[0] != fs[1]
+    assert fs[1] == Source(latitude=0.0, longitude=0.0)
+    fs[0].sliprate = [0.0, 1.0]
+    assert fs[0] != src
+
+    # Deep copies are independent sources, shallow copies views.
+    deep = copy.deepcopy(fs[0])
+    assert type(deep) is Source
+    assert deep == fs[0]
+    deep.m_rr = 3e18
+    assert fs[0].m_rr == 1e18
+    shallow = copy.copy(fs[0])
+    shallow.m_rr = 3e18
+    assert fs[0].m_rr == 3e18
+
+    # Setters check the coordinates.
+    with pytest.raises(ValueError) as err:
+        fs[0].latitude = 91.0
+    assert err.value.args[0] == (
+        "Invalid latitude value. Latitude must be -90 <= x <= 90."
+    )
+    with pytest.raises(ValueError) as err:
+        fs[0].longitude = -181.0
+    assert err.value.args[0] == (
+        "Invalid longitude value. Longitude must be -180 <= x <= 180."
+    )
+    assert fs[0].latitude == 10.0
+    assert fs[0].longitude == -20.0
+
+    points["latitude"][0] = 100.0
+    with pytest.raises(ValueError):
+        FiniteSource.from_arrays(points)
+
+
+def test_finite_source_sliprate_methods_with_mixed_sliprates():
+    """
+    The sliprate methods operate on groups of point sources with the same
+    sampling - make sure they agree with the methods of single sources.
+    """
+    sources = []
+    for i, (npts, dt) in enumerate([(10, 0.5), (20, 0.5), (10, 0.25)] * 2):
+        src = Source(latitude=float(i), longitude=0.0, m_rr=1e18)
+        src.sliprate = np.sin(np.linspace(0.0, np.pi, npts)) * (i + 1)
+        src.dt = dt
+        sources.append(src)
+    fs = FiniteSource(pointsources=sources)
+
+    fs.normalize_sliprate()
+    for src in sources:
+        src.normalize_sliprate()
+    for src, view in zip(sources, fs):
+        np.testing.assert_allclose(view.sliprate, src.sliprate)
+
+    fs.lp_sliprate(freq=0.2, corners=2)
+    for src in sources:
+        src.lp_sliprate(freq=0.2, corners=2)
+    for src, view in zip(sources, fs):
+        np.testing.assert_allclose(
+            view.sliprate, src.sliprate, rtol=1e-7, atol=1e-12
+        )
+
+    fs.resample_sliprate(dt=0.1, nsamp=60)
+    for src in sources:
+        src.resample_sliprate(dt=0.1, nsamp=60)
+    for src, view in zip(sources, fs):
+        assert view.dt == 0.1
+        np.testing.assert_allclose(
+            view.sliprate, src.sliprate, rtol=1e-7, atol=1e-12
+        )
+
+
 def test_reading_finite_source_with_slip_along_u2_axis():
     """
     Tests SRF files with slips along the u2 axis with a constructed file.
@@ -10,9 +10,9 @@ Mostly testing the various wrappers.
     (http://www.gnu.org/copyleft/lgpl.html)
 """
 import numpy as np
+import pytest
 
-
-from instaseis import finite_elem_mapping, rotations
+from instaseis import finite_elem_mapping, rotations, spectral_basis
 
 
 def test_rotate_frame_rd():
@@ -214,3 +214,88 @@ def test_inside_element():
         xi_ref=-0.7846998127497518,
         eta_ref=-0.8109601156061497,
     )
+
+
+def test_inside_element_batch():
+    """
+    The batched version must give the same result as the scalar one.
+    """
+    nodes = np.array(
+        [
+            [4668274.5, 4313461.5],
+            [4703863.5, 4274623.0],
+            [4714964.5, 4284711.0],
+            [4679291.5, 4323641.0],
+        ],
+        dtype=np.float64,
+    )
+    # Second candidate is shifted so it does not contain the first point.
+    shifted = nodes + 1e5
+    s = np.array([4676105.76848, 4676105.76848 + 1e5, 0.0])
+    z = np.array([4309398.54759, 4309398.54759 + 1e5, 0.0])
+    all_nodes = np.array([[shifted, nodes]] * 3)
+    element_types = np.zeros((3, 2), dtype=np.int32)
+
+    candidate, xi, eta = finite_elem_mapping.inside_element_batch(
+        s=s,
+        z=z,
+        nodes=all_nodes,
+        element_types=element_types,
+        tolerances=[1e-3, 1e-2],
+    )
+
+    np.testing.assert_array_equal(candidate, [1, 0, -1])
+    for _i in range(2):
+        is_in, xi_ref, eta_ref = finite_elem_mapping.inside_element(
+            s=s[_i],
+            z=z[_i],
+            nodes=all_nodes[_i, candidate[_i]],
+            element_type=0,
+            tolerance=1e-3,
+        )
+        assert is_in
+        assert xi[_i] == xi_ref
+        assert eta[_i] == eta_ref
+
+
+def test_lagrange_interpol_2D_td_batch():  # NOQA
+    """
+    The batched version must give the same result as interpolating each
+    component at each point separately.
+    """
+    rng = np.random.RandomState(12345)
+    points = np.array([-1.0, -0.65465367, 0.0, 0.65465367, 1.0])
+    coefficients = rng.randn(20, 5, 5, 6)
+    x1 = np.array([0.1, -0.5, 0.99])
+    x2 = np.array([0.3, 0.0, -0.2])
+
+    result = spectral_basis.lagrange_interpol_2D_td_batch(
+        points, points, coefficients, x1, x2
+    )
+    assert result.shape == (20, 6, 3)
+    for _p in range(3):
+        for _c in range(6):
+            np.testing.assert_array_equal(
+                result[:, _c, _p],
+                spectral_basis.lagrange_interpol_2D_td(
+                    points, points, coefficients[:, :, :, _c], x1[_p], x2[_p]
+                ),
+            )
+
+    # Scalar points and output buffers.
+    out = np.empty((20, 6), order="F")
+    result = spectral_basis.lagrange_interpol_2D_td_batch(
+        points, points, coefficients, x1[1], x2[1], out=out
+    )
+    assert result is out
+    np.testing.assert_array_equal(
+        out,
+        spectral_basis.lagrange_interpol_2D_td_batch(
+            points, points, coefficients, x1, x2
+        )[:, :, 1],
+    )
+
+    with pytest.raises(ValueError):
+        spectral_basis.lagrange_interpol_2D_td_batch(
+            points, points, coefficients, x1, x2, out=np.empty((20, 6, 3))
+        )
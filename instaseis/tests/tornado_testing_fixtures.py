@@ -175,8 +175,7 @@ def get_travel_time(
 
 @pytest.fixture
 def io_loop(request):
-    """Create an instance of the `tornado.ioloop.IOLoop` for each test case.
-    """
+    """Create an instance of the `tornado.ioloop.IOLoop` for each test case."""
     io_loop = IOLoop()
     io_loop.make_current()
 
@@ -202,6 +201,7 @@ def create_async_client(
     application.event_info_callback = event_info_callback
     application.travel_time_callback = travel_time_callback
     application.max_size_of_finite_sources = 1000
+    application.greens_function_library = None
 
     # Build server.
     sock, port = bind_unused_port()